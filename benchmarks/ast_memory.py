@@ -0,0 +1,51 @@
+import argparse
+import random
+import tracemalloc
+from compiler.ast.arena import parse_to_arena
+from compiler.lexer.tokenizer import Tokenizer
+from compiler.parser.parser import Parser
+from expression_generator.arithmetic_expression_generator import ArithmeticExpressionGenerator
+
+def generate_corpus(size: int, difficulty: str, seed: int) -> list:
+    """Generate a reproducible corpus of expressions."""
+    random.seed(seed)
+    generator = ArithmeticExpressionGenerator()
+    return [generator.generate_random_expression(difficulty) for _ in range(size)]
+
+def measure_bytes(build) -> tuple:
+    """Measure the bytes still allocated after calling build, and return them with its result."""
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    result = build()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return after - before, result
+
+def main():
+    # Setup argument parser
+    parser = argparse.ArgumentParser(description="Compare the memory held by a parsed corpus as node objects and as an AST arena.")
+    parser.add_argument("-n", "--num_expressions", type=int, default=100_000, help="Number of expressions in the corpus.")
+    parser.add_argument(
+        "-d", "--difficulty",
+        type=str,
+        choices=["very easy", "easy", "pretty easy", "medium", "hard", "pretty hard", "very hard"],
+        default="medium",
+        help="Set the difficulty level of the expressions."
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the corpus.")
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.num_expressions, args.difficulty, args.seed)
+
+    # both are built from the same token streams, the tokens themselves are only retained by the nodes
+    node_bytes, nodes = measure_bytes(
+        lambda: [Parser(Tokenizer(expression, use_regex=True).iter_tokens()).parse() for expression in corpus]
+    )
+    arena_bytes, arena = measure_bytes(lambda: parse_to_arena(corpus))
+
+    print(f"expressions: {len(corpus)}, nodes: {arena.node_count}, pooled literals: {len(arena.literal_pool)}")
+    for label, total in [("node objects", node_bytes), ("arena", arena_bytes)]:
+        print(f"{label:<15} total: {total / 1_048_576:8.2f} MiB  per node: {total / arena.node_count:6.1f} bytes")
+
+if __name__ == "__main__":
+    main()
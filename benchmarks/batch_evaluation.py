@@ -0,0 +1,49 @@
+import argparse
+import random
+import time
+from compiler.ast.arena import parse_to_arena
+from compiler.evaluator.batch_evaluator import BatchEvaluator
+from compiler.evaluator.decimal_evaluator import EvaluationError, native_eval
+from expression_generator.arithmetic_expression_generator import ArithmeticExpressionGenerator
+
+
+def main():
+    # Setup argument parser
+    parser = argparse.ArgumentParser(description="Compare evaluating a corpus one expression at a time with the batch evaluator.")
+    parser.add_argument("-n", "--num_expressions", type=int, default=100_000, help="Number of expressions in the corpus.")
+    parser.add_argument(
+        "-d", "--difficulty",
+        type=str,
+        choices=["very easy", "easy", "pretty easy", "medium", "hard", "pretty hard", "very hard"],
+        default="medium",
+        help="Set the difficulty level of the expressions."
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the corpus.")
+    args = parser.parse_args()
+
+    # generate and parse the corpus
+    random.seed(args.seed)
+    generator = ArithmeticExpressionGenerator()
+    arena = parse_to_arena(generator.generate_random_expression(args.difficulty) for _ in range(args.num_expressions))
+
+    # the per-row time doesn't include rebuilding the nodes from the arena
+    trees = [arena.tree(index) for index in range(len(arena))]
+    start = time.perf_counter()
+    for tree in trees:
+        try:
+            native_eval(tree)
+        except EvaluationError:
+            pass
+    row_time = time.perf_counter() - start
+
+    evaluator = BatchEvaluator()
+    start = time.perf_counter()
+    evaluator.evaluate_arena(arena)
+    batch_time = time.perf_counter() - start
+
+    print(f"expressions: {len(arena)}, float rows: {evaluator.float_rows}, decimal rows: {evaluator.decimal_rows}")
+    print(f"one at a time: {row_time:8.3f}s")
+    print(f"batch:         {batch_time:8.3f}s  ({row_time / batch_time:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import json
+import random
+import time
+from decimal import Decimal
+from compiler.arithmetic_compiler import ArithmeticCompiler
+from compiler.instructions.infix_expression_calculator_instruction import InfixExpressionCalculatorInstruction
+from compiler.lexer.token import Token
+from compiler.parser.arithmetic_expression import ArithmeticExpression, parse_cache
+from expression_generator.arithmetic_expression_generator import ArithmeticExpressionGenerator
+
+def reflective_ast_to_dict(ast_node):
+    """The previous AST to dict conversion, walking each node's __dict__."""
+    if isinstance(ast_node, list):
+        return [reflective_ast_to_dict(node) for node in ast_node]
+    elif isinstance(ast_node, dict):
+        return {key: reflective_ast_to_dict(value) for key, value in ast_node.items()}
+    elif isinstance(ast_node, Decimal):
+        return str(ast_node)
+    elif isinstance(ast_node, Token):
+        return {"type": ast_node.type, "value": ast_node.value, "position": ast_node.position}
+    elif hasattr(ast_node, '__dict__'):
+        node_dict = {key: reflective_ast_to_dict(value) for key, value in ast_node.__dict__.items()}
+        node_dict['type'] = ast_node.__class__.__name__
+        return node_dict
+    else:
+        return ast_node
+
+def front_end_before(expression: str):
+    """Tokenize, parse, serialize the AST to JSON, and load it back in the instruction."""
+    arithmetic_expression = ArithmeticExpression(expression)
+    tokens = arithmetic_expression.tokenize()
+    ast = arithmetic_expression.parse()
+    json_ast = json.dumps(reflective_ast_to_dict(ast), indent=2)
+    return InfixExpressionCalculatorInstruction(json_ast, tokens)
+
+def front_end_after(expression: str, use_cache: bool):
+    """Tokenize and parse (or hit the parse cache), handing the AST dict straight to the instruction."""
+    compiler = ArithmeticCompiler(expression, use_cache=use_cache)
+    compiler.parse_expression()
+    compiler.generate_instruction(None)
+    return compiler.instruction
+
+def time_per_sample(func, corpus: list) -> float:
+    """Average time per sample in microseconds."""
+    start = time.perf_counter()
+    for expression in corpus:
+        func(expression)
+    return (time.perf_counter() - start) / len(corpus) * 1_000_000
+
+def main():
+    # Setup argument parser
+    parser = argparse.ArgumentParser(description="Measure the per-sample front end cost, before and after the in-memory AST handoff.")
+    parser.add_argument("-n", "--num_samples", type=int, default=20_000, help="Number of expressions per difficulty.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the corpus.")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    generator = ArithmeticExpressionGenerator()
+
+    print(f"{'difficulty':<12} {'before':>12} {'after':>12} {'after+cache':>12} {'hit rate':>9}  (us per sample)")
+    for difficulty in ["very easy", "easy", "medium", "very hard"]:
+        corpus = [generator.generate_random_expression(difficulty) for _ in range(args.num_samples)]
+
+        before = time_per_sample(front_end_before, corpus)
+        after = time_per_sample(lambda e: front_end_after(e, use_cache=False), corpus)
+
+        parse_cache.clear()
+        cached = time_per_sample(lambda e: front_end_after(e, use_cache=True), corpus)
+
+        hit_rate = parse_cache.stats()["hit_rate"]
+        print(f"{difficulty:<12} {before:>12.1f} {after:>12.1f} {cached:>12.1f} {hit_rate:>9.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List
+
+# the command line entry points, which shouldn't pay for importing the LLM or sympy dependencies
+ENTRY_POINTS = ["main", "ast_cli", "generate_chat_samples", "generate_verifier_samples", "generate_boxed_verifier_samples"]
+
+# dependencies that are only imported once they are used
+HEAVY_MODULES = ["langchain", "langchain_core", "langchain_ollama", "jinja2", "sympy", "numpy"]
+
+# the root of the repository, where the entry points live
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# a line of -X importtime output: "import time: self [us] | cumulative | imported package"
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+def import_times(module: str) -> Dict[str, int]:
+    """Import a module in a fresh interpreter, returning the cumulative import time (us) of every module it loaded."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, check=True, cwd=REPOSITORY_ROOT)
+    times = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            times[match.group(4)] = int(match.group(2))
+    return times
+
+def heavy_imports(times: Dict[str, int]) -> List[str]:
+    """The heavy top-level modules that were imported."""
+    return [module for module in HEAVY_MODULES if module in times]
+
+def main():
+    # Setup argument parser
+    parser = argparse.ArgumentParser(description="Measure the import time of the command line entry points.")
+    parser.add_argument("--budget", type=float, default=None, help="Fail if an entry point takes longer than this many milliseconds to import.")
+    args = parser.parse_args()
+
+    over_budget = False
+    for module in ENTRY_POINTS:
+        times = import_times(module)
+        milliseconds = times[module] / 1000
+        heavy = heavy_imports(times)
+        print(f"{module:32} {milliseconds:8.1f}ms  heavy imports: {', '.join(heavy) or 'none'}")
+        over_budget |= args.budget is not None and milliseconds > args.budget
+
+    if over_budget:
+        sys.exit(f"over the import time budget of {args.budget}ms")
+
+if __name__ == "__main__":
+    main()
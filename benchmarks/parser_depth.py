@@ -0,0 +1,62 @@
+import argparse
+import random
+import time
+from compiler.lexer.tokenizer import Tokenizer
+from compiler.parser.parser import Parser
+
+def chained_expression(operand_count: int) -> str:
+    """A flat chain of binary operators, e.g. 1 + 2 * 3 - 4 ..."""
+    operators = ["+", "-", "*", "/"]
+    parts = [str(random.randint(1, 99))]
+    for _ in range(operand_count - 1):
+        parts.append(random.choice(operators))
+        parts.append(str(random.randint(1, 99)))
+    return " ".join(parts)
+
+def nested_expression(operand_count: int) -> str:
+    """Right-nested parentheses, e.g. (1 + (2 * (3 - ...)))"""
+    operators = ["+", "-", "*", "/"]
+    prefix = "".join(f"({random.randint(1, 99)} {random.choice(operators)} " for _ in range(operand_count - 1))
+    return prefix + str(random.randint(1, 99)) + ")" * (operand_count - 1)
+
+def time_parse(tokens: list, iterative: bool, repeat: int) -> str:
+    """Best-of time to parse the tokens, or a note if the parser hit the recursion limit."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            Parser(tokens, iterative=iterative).parse()
+        except RecursionError:
+            return "recursion limit"
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return f"{best * 1000:.2f} ms"
+
+def main():
+    # Setup argument parser
+    parser = argparse.ArgumentParser(description="Compare recursive and iterative parse time against expression length.")
+    parser.add_argument("--max_tokens", type=int, default=100_000, help="Largest expression size in tokens.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timing runs per size (best is reported).")
+    args = parser.parse_args()
+
+    random.seed(0)
+
+    # sizes from 10 tokens up to the maximum, in decades
+    sizes = []
+    size = 10
+    while size <= args.max_tokens:
+        sizes.append(size)
+        size *= 10
+
+    print(f"{'shape':<8} {'tokens':>8} {'recursive':>16} {'iterative':>16}")
+    for shape, build in [("chained", chained_expression), ("nested", nested_expression)]:
+        for size in sizes:
+            # roughly two tokens per operand for chains, four for nested groups
+            operand_count = max(2, size // (2 if shape == "chained" else 4))
+            tokens = Tokenizer(build(operand_count), use_regex=True).tokenize()
+            recursive = time_parse(tokens, iterative=False, repeat=args.repeat)
+            iterative = time_parse(tokens, iterative=True, repeat=args.repeat)
+            print(f"{shape:<8} {len(tokens):>8} {recursive:>16} {iterative:>16}")
+
+if __name__ == "__main__":
+    main()
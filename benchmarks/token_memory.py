@@ -0,0 +1,61 @@
+import argparse
+import random
+import tracemalloc
+from compiler.lexer.token import Token
+from compiler.lexer.tokenizer import Tokenizer
+from expression_generator.arithmetic_expression_generator import ArithmeticExpressionGenerator
+
+class DictToken:
+    """The previous Token layout, a plain class with a per-instance __dict__."""
+    def __init__(self, type: str, value, position: int):
+        self.type = type
+        self.value = value
+        self.position = position
+
+def generate_corpus(size: int, difficulty: str, seed: int) -> list:
+    """Generate a reproducible corpus of expressions."""
+    random.seed(seed)
+    generator = ArithmeticExpressionGenerator()
+    return [generator.generate_random_expression(difficulty) for _ in range(size)]
+
+def measure_token_bytes(token_class, token_lists: list) -> int:
+    """Measure the bytes allocated to hold a copy of every token using the given class."""
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+
+    # the values and types are shared with the source tokens, so only the token objects are counted
+    copies = [[token_class(t.type, t.value, t.position) for t in tokens] for tokens in token_lists]
+
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # the per-expression lists are the same for both classes, remove them
+    list_bytes = sum(copies_list.__sizeof__() for copies_list in copies) + copies.__sizeof__()
+    return after - before - list_bytes
+
+def main():
+    # Setup argument parser
+    parser = argparse.ArgumentParser(description="Measure the per-token memory footprint for a generated corpus.")
+    parser.add_argument("-n", "--num_expressions", type=int, default=100_000, help="Number of expressions in the corpus.")
+    parser.add_argument(
+        "-d", "--difficulty",
+        type=str,
+        choices=["very easy", "easy", "pretty easy", "medium", "hard", "pretty hard", "very hard"],
+        default="medium",
+        help="Set the difficulty level of the expressions."
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the corpus.")
+    args = parser.parse_args()
+
+    # tokenize the corpus once, the measured copies share its values
+    corpus = generate_corpus(args.num_expressions, args.difficulty, args.seed)
+    token_lists = [Tokenizer(expression, use_regex=True).tokenize() for expression in corpus]
+    token_count = sum(len(tokens) for tokens in token_lists)
+
+    print(f"expressions: {len(corpus)}, tokens: {token_count}")
+    for label, token_class in [("before (__dict__)", DictToken), ("after (__slots__)", Token)]:
+        total = measure_token_bytes(token_class, token_lists)
+        print(f"{label:<20} total: {total / 1_048_576:8.2f} MiB  per token: {total / token_count:6.1f} bytes")
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,78 @@
+import json
+from compiler.evaluator.evaluator import DEFAULT_BACKEND
+from compiler.evaluator.magnitude_check import MagnitudeLimits
 from compiler.instructions.math_problem_instruction import MATHProblemInstruction
-from compiler.parser.arithmetic_expression import ArithmeticExpression
+from compiler.parser.arithmetic_expression import ArithmeticExpression, ast_to_dict, parse_expression_cached
 from compiler.instructions.infix_expression_calculator_instruction import InfixExpressionCalculatorInstruction
 
 class ArithmeticCompiler:
-    def __init__(self, expression: str):
+    def __init__(self, expression: str, use_cache: bool = False, evaluator: str = DEFAULT_BACKEND,
+                 limits: MagnitudeLimits = None):
         # Set the expression
         self.expression = expression
 
+        # Use the shared parse cache, so duplicate expressions skip the front end.
+        # Off by default: the retained ASTs add garbage collector work, which only pays off with many duplicates.
+        self.use_cache = use_cache
+
+        # The backend used to evaluate the expression, "native" walks the AST, "sympy" evaluates the expression text
+        self.evaluator = evaluator
+
+        # Limits on the size of the result, expressions over them get no instruction (the reason is kept in limit_error)
+        self.limits = limits
+        self.limit_error = None
+
         # Set up the arithmetic expression parser
         self.arithmetic_expression = ArithmeticExpression(expression)
 
         # Initialize
         self.ast = None
-        self.json_ast = None
+        self.ast_dict = None
         self.tokens = None
         self.instruction = None
         
 
+    @property
+    def json_ast(self):
+        """The AST as JSON, serialized on demand (the instruction is given the dict directly)."""
+        if self.ast_dict is None:
+            return None
+        return json.dumps(self.ast_dict, indent=2)
+
     def parse_expression(self):
-        """Parse the expression into an AST and its JSON representation."""
+        """Parse the expression into an AST and its dictionary representation."""
         try:
-            # Tokenize and parse the expression
-            self.tokens = self.arithmetic_expression.tokenize()
-            self.ast = self.arithmetic_expression.parse()
-            
-            # Get the AST as JSON
-            self.json_ast = self.arithmetic_expression.ast_as_json()
+            if self.use_cache:
+                # Tokenize and parse the expression, or get the cached result
+                result = parse_expression_cached(self.expression)
+                self.tokens = result.tokens
+                self.ast = result.ast
+                self.ast_dict = result.ast_dict
+            else:
+                # Tokenize and parse the expression
+                self.tokens = self.arithmetic_expression.tokenize()
+                self.ast = self.arithmetic_expression.parse()
+                self.ast_dict = ast_to_dict(self.ast)
         except Exception as e:
             print(f"Error during parsing: {e}")
             self.tokens = []
             self.ast = None
-            self.json_ast = None
+            self.ast_dict = None
 
     def generate_instruction(self, llm: str):
         """Generate instruction outputs based on the AST and tokens."""
         try:
+            # skip expressions whose result is over the limits, before any evaluation or LLM work
+            self.limit_error = self.limits.check(self.ast) if self.limits else None
+            if self.limit_error:
+                self.instruction = None
+                return
+
             # ensure we have an ast or tokens
             if self.ast and self.tokens:
                 # set the instruction
-                self.instruction = InfixExpressionCalculatorInstruction(self.json_ast, self.tokens, llm=llm)
-                #self.instruction = MATHProblemInstruction(self.json_ast, self.tokens, llm=llm)
+                self.instruction = InfixExpressionCalculatorInstruction(self.ast_dict, self.tokens, llm=llm, ast_node=self.ast, evaluator=self.evaluator)
+                #self.instruction = MATHProblemInstruction(self.ast_dict, self.tokens, llm=llm, ast_node=self.ast, evaluator=self.evaluator)
             else:
                 print("No AST or tokens available to generate instruction.")
                 self.instruction = None
@@ -0,0 +1,228 @@
+from array import array
+from typing import Any, Iterable, List, Optional
+from compiler.ast.ast_node import ASTNode
+from compiler.ast.expressions import BinaryExpression, Literal, UnaryExpression
+from compiler.ast.expressions.literal_expression import literal_value
+from compiler.ast.visitor import ASTVisitor
+from compiler.lexer.token import Token
+from compiler.lexer.tokenizer import Tokenizer, OPERATORS, PUNCTUATIONS
+from compiler.parser.parser import Parser, PRECEDENCE, PREFIX_OPERATORS
+
+# node kinds
+KIND_BINARY = 0
+KIND_UNARY = 1
+KIND_LITERAL = 2
+
+# index used for a missing child (e.g. the right hand side of '3 +') or a missing AST
+NO_NODE = -1
+
+# operator symbols the arena can hold, its operator code is the index in this tuple
+# (the symbol is kept rather than the token type, as some types have two spellings, e.g. '!=' and '<>')
+ARENA_OPERATORS = tuple(
+    symbol for symbol, token_type in {**OPERATORS, **PUNCTUATIONS}.items()
+    if token_type in PRECEDENCE or token_type in PREFIX_OPERATORS
+)
+ARENA_OPERATOR_CODES = {symbol: code for code, symbol in enumerate(ARENA_OPERATORS)}
+ARENA_OPERATOR_TYPES = tuple({**OPERATORS, **PUNCTUATIONS}[symbol] for symbol in ARENA_OPERATORS)
+
+class ASTArena:
+    """
+    Flat storage for many ASTs.
+
+    Every node is a row across parallel arrays, and children are referenced by row index:
+      - kinds: KIND_BINARY, KIND_UNARY or KIND_LITERAL
+      - operators: the operator code (index into ARENA_OPERATORS), 0 for literals
+      - positions: the position of the operator token, NO_NODE for literals
+      - lefts / rights: the child rows, NO_NODE if missing (a unary operand is held in lefts)
+      - literals: the index of the value in the literal pool, NO_NODE for operators
+
+    Equal literal values are stored once in the literal pool, and roots holds the root row of each AST added.
+    Children are always added before their parents, so a child row is lower than its parent row.
+    """
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.operators = array('B')
+        self.positions = array('i')
+        self.lefts = array('i')
+        self.rights = array('i')
+        self.literals = array('i')
+        self.roots = array('i')
+
+        # literal pool, and the pool index of each value
+        self.literal_pool: List[Any] = []
+        self._literal_index = {}
+
+    def __len__(self) -> int:
+        # number of ASTs
+        return len(self.roots)
+
+    @property
+    def node_count(self) -> int:
+        """Total number of nodes across all ASTs."""
+        return len(self.kinds)
+
+    def nbytes(self) -> int:
+        """The size of the node arrays in bytes (excluding the literal pool)."""
+        columns = (self.kinds, self.operators, self.positions, self.lefts, self.rights, self.literals, self.roots)
+        return sum(column.itemsize * len(column) for column in columns)
+
+    def _add_row(self, kind: int, operator: int, position: int, left: int, right: int, literal: int) -> int:
+        self.kinds.append(kind)
+        self.operators.append(operator)
+        self.positions.append(position)
+        self.lefts.append(left)
+        self.rights.append(right)
+        self.literals.append(literal)
+        return len(self.kinds) - 1
+
+    def truncate(self, node_count: int, literal_count: int):
+        """
+        Drop the nodes added after the first node_count, and the literals added to the pool after the first
+        literal_count (e.g. those of an AST that failed to parse).
+        """
+        for column in (self.kinds, self.operators, self.positions, self.lefts, self.rights, self.literals):
+            del column[node_count:]
+
+        # the index holds the literals in pool order, so the newest entries are the last ones
+        del self.literal_pool[literal_count:]
+        while len(self._literal_index) > literal_count:
+            self._literal_index.popitem()
+
+    def _operator_code(self, operator: Token) -> int:
+        code = ARENA_OPERATOR_CODES.get(operator.value)
+        if code is None:
+            raise ValueError(f"Unsupported operator: {operator}")
+        return code
+
+    def add_literal(self, value: Any) -> int:
+        """Add a literal node, converting the value to a Decimal as Literal does, and return its row."""
+        # keyed on the representation too, so Decimal('1') and Decimal('1.0') stay distinct
+        key = (value.__class__, repr(value))
+        literal = self._literal_index.get(key)
+
+        if literal is None:
+            literal = self._literal_index[key] = len(self.literal_pool)
+            self.literal_pool.append(literal_value(value))
+
+        return self._add_row(KIND_LITERAL, 0, NO_NODE, NO_NODE, NO_NODE, literal)
+
+    def add_binary(self, left: Optional[int], operator: Token, right: Optional[int]) -> int:
+        """Add a binary expression node over existing rows (None for a missing child), and return its row."""
+        return self._add_row(
+            KIND_BINARY, self._operator_code(operator), operator.position,
+            NO_NODE if left is None else left, NO_NODE if right is None else right, NO_NODE
+        )
+
+    def add_unary(self, operator: Token, operand: Optional[int]) -> int:
+        """Add a unary expression node over an existing row (None for a missing operand), and return its row."""
+        return self._add_row(
+            KIND_UNARY, self._operator_code(operator), operator.position,
+            NO_NODE if operand is None else operand, NO_NODE, NO_NODE
+        )
+
+    def add_root(self, row: Optional[int]) -> int:
+        """Record the root row of an AST (None for an empty AST), and return the index of the AST."""
+        self.roots.append(NO_NODE if row is None else row)
+        return len(self.roots) - 1
+
+    def add_node(self, ast_node: Optional[ASTNode]) -> int:
+        """Copy an AST of node objects into the arena, and return the index of the AST."""
+        if ast_node is None:
+            return self.add_root(None)
+        return self.add_root(ArenaBuilder(self).visit(ast_node))
+
+    def operator_token(self, row: int) -> Token:
+        """Rebuild the operator token of a row."""
+        code = self.operators[row]
+        return Token(ARENA_OPERATOR_TYPES[code], ARENA_OPERATORS[code], self.positions[row])
+
+    def to_node(self, row: int) -> Optional[ASTNode]:
+        """Rebuild the node objects for the subtree at a row."""
+        if row == NO_NODE:
+            return None
+
+        kinds = self.kinds
+        lefts = self.lefts
+        rights = self.rights
+
+        # rows already rebuilt
+        built = {NO_NODE: None}
+
+        # rows waiting to be built, once their children are
+        stack = [row]
+        while stack:
+            current = stack[-1]
+            kind = kinds[current]
+
+            if kind == KIND_LITERAL:
+                built[current] = Literal(self.literal_pool[self.literals[current]])
+                stack.pop()
+                continue
+
+            left = lefts[current]
+            right = rights[current]
+
+            # build the children first
+            pending = [child for child in (right, left) if child not in built]
+            if pending:
+                stack.extend(pending)
+                continue
+
+            stack.pop()
+            if kind == KIND_BINARY:
+                built[current] = BinaryExpression(built[left], self.operator_token(current), built[right])
+            else:
+                built[current] = UnaryExpression(operator=self.operator_token(current), operand=built[left])
+
+        return built[row]
+
+    def tree(self, index: int) -> Optional[ASTNode]:
+        """Rebuild the node objects for an AST, by its index."""
+        return self.to_node(self.roots[index])
+
+    @classmethod
+    def from_nodes(cls, ast_nodes: Iterable[Optional[ASTNode]]) -> 'ASTArena':
+        """Build an arena from ASTs of node objects."""
+        arena = cls()
+        for ast_node in ast_nodes:
+            arena.add_node(ast_node)
+        return arena
+
+class ArenaBuilder(ASTVisitor):
+    """Copies node objects into an arena, returning the row of each node."""
+
+    def __init__(self, arena: ASTArena):
+        super().__init__()
+        self.arena = arena
+
+    def visit_none(self) -> int:
+        return NO_NODE
+
+    def visit_BinaryExpression(self, node: BinaryExpression, left, right) -> int:
+        return self.arena.add_binary(left, node.operator, right)
+
+    def visit_UnaryExpression(self, node: UnaryExpression, operand) -> int:
+        return self.arena.add_unary(node.operator, operand)
+
+    def visit_Literal(self, node: Literal) -> int:
+        return self.arena.add_literal(node.value)
+
+def parse_to_arena(expressions: Iterable[str], arena: ASTArena = None, iterative: bool = False) -> ASTArena:
+    """
+    Tokenize and parse expressions straight into an arena, without creating any node objects.
+    The AST of the i-th expression is arena.tree(i) (when the arena starts empty).
+
+    If an expression fails to parse, the nodes and literals added for it are dropped before the error is raised,
+    so the arena still holds exactly the ASTs of the expressions before it.
+    """
+    arena = arena if arena is not None else ASTArena()
+    for expression in expressions:
+        node_count, literal_count = arena.node_count, len(arena.literal_pool)
+        try:
+            parser = Parser(Tokenizer(expression, use_regex=True).iter_tokens(), iterative=iterative, arena=arena)
+            arena.add_root(parser.parse())
+        except Exception:
+            arena.truncate(node_count, literal_count)
+            raise
+    return arena
@@ -0,0 +1,70 @@
+from typing import Optional, Tuple
+from compiler.ast.expressions import BinaryExpression, Literal, UnaryExpression
+from compiler.ast.visitor import ASTVisitor
+from compiler.parser.parser import SYMBOL_PRECEDENCE, RIGHT_ASSOCIATIVE_SYMBOLS
+
+def needs_parentheses(child_op: Optional[str], parent_op: str, is_right: bool = False) -> bool:
+    """Determines if a binary sub-expression (child_op is None for anything else) needs parentheses under parent_op."""
+    if child_op is None:
+        return False
+
+    # Precedence rules (shared with the parser)
+    child_precedence = SYMBOL_PRECEDENCE.get(child_op, 0)
+    parent_precedence = SYMBOL_PRECEDENCE.get(parent_op, 0)
+    if child_precedence != parent_precedence:
+        return child_precedence < parent_precedence
+
+    # Same precedence, so the side the parser wouldn't group needs parentheses, e.g. 8 - (4 - 2) or (2 ^ 3) ^ 2
+    if parent_op in RIGHT_ASSOCIATIVE_SYMBOLS:
+        return not is_right
+
+    # Addition and multiplication give the same value either way, so keep those minimal
+    return is_right and parent_op not in ('+', '*')
+
+class ExpressionPrinter(ASTVisitor):
+    """
+    Prints the AST as an infix expression with minimal parentheses.
+
+    Each visit returns (text, operator), where operator is the symbol of a binary expression and None otherwise,
+    so the parent can decide on parentheses without looking at the child node again.
+    """
+
+    def print(self, node) -> str:
+        """Print the expression, an empty string for no AST."""
+        if node is None:
+            return ""
+        return self.visit(node)[0]
+
+    def visit_none(self) -> Tuple[str, None]:
+        return "", None
+
+    def visit_BinaryExpression(self, node: BinaryExpression, left, right) -> Tuple[str, str]:
+        op = node.operator.value
+        left_expr, left_op = left
+        right_expr, right_op = right
+
+        if needs_parentheses(left_op, op):
+            left_expr = f"({left_expr})"
+        if needs_parentheses(right_op, op, is_right=True):
+            right_expr = f"({right_expr})"
+
+        return f"{left_expr} {op} {right_expr}", op
+
+    def visit_UnaryExpression(self, node: UnaryExpression, operand) -> Tuple[str, None]:
+        operand_expr, operand_op = operand
+
+        # a binary operand is always grouped, e.g. -(3 + 4)
+        if operand_op is not None:
+            operand_expr = f"({operand_expr})"
+
+        return f"{node.operator.value}{operand_expr}", None
+
+    def visit_Literal(self, node: Literal) -> Tuple[str, None]:
+        return str(node.value), None
+
+# the printer holds no per-tree state, so one instance is shared
+expression_printer = ExpressionPrinter()
+
+def print_expression(node) -> str:
+    """Print the AST as an infix expression with minimal parentheses."""
+    return expression_printer.print(node)
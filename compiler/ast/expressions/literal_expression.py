@@ -1,12 +1,19 @@
 import decimal
 from .expression import Expression
 
+def literal_value(value):
+    """Convert a literal value to a Decimal, leaving values that aren't numbers as they are."""
+    try:
+        if isinstance(value, float) and not value.is_integer():
+            # floats use their shortest repr, so 3.1 is Decimal('3.1') rather than its binary expansion
+            return decimal.Decimal(repr(value))
+        return decimal.Decimal(value)
+    except (ValueError, decimal.InvalidOperation):
+        return value
+
 class Literal(Expression):
     def __init__(self, value):
-        try:
-            self.value = decimal.Decimal(value)
-        except (ValueError, decimal.InvalidOperation):
-            self.value = value
+        self.value = literal_value(value)
 
     def __str__(self):
         return str(self.value)
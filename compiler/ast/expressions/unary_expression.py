@@ -7,10 +7,6 @@ class UnaryExpression(Expression):
 
     def __eq__(self, other):
         if isinstance(other, UnaryExpression):
-            if self.operator != other.operator:
-                print(f"Operator mismatch: {self.operator} != {other.operator}")
-            if self.operand != other.operand:
-                print(f"Operand mismatch: {self.operand} != {other.operand}")
             return self.operator == other.operator and self.operand == other.operand
         return False
 
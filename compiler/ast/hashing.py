@@ -0,0 +1,141 @@
+from typing import Any, Dict, List, Optional, Tuple
+from compiler.ast.ast_node import ASTNode
+from compiler.ast.expressions import BinaryExpression, Literal, UnaryExpression
+from compiler.ast.visitor import ASTVisitor
+
+# structural id of a missing child (e.g. the right hand side of '3 +')
+NO_ID = -1
+
+def literal_key(value: Any) -> Tuple[type, str]:
+    """Key for a literal value, keeping its spelling, so Decimal('1.0') and Decimal('1') are different literals."""
+    return value.__class__, str(value)
+
+class StructuralHasher(ASTVisitor):
+    """
+    Gives every distinct subtree a small integer id, computed bottom-up.
+
+    Two subtrees get the same id when they have the same shape, operators and literal values
+    (operator positions are ignored), so ids can be compared, or used as dict / set keys, in O(1)
+    once computed. Ids are only comparable between trees given to the same hasher.
+
+    With share_subtrees set the hasher also hash-conses: intern() returns a canonical tree
+    in which identical subtrees are one shared object.
+    """
+
+    def __init__(self, share_subtrees: bool = False):
+        super().__init__()
+        self.share_subtrees = share_subtrees
+
+        # (operator or literal key, child ids) -> id
+        self._ids: Dict[tuple, int] = {}
+
+        # canonical node for each id, when sharing subtrees
+        self._nodes: List[ASTNode] = []
+
+    def __len__(self) -> int:
+        # number of distinct subtrees seen
+        return len(self._ids)
+
+    def structural_id(self, node: Optional[ASTNode]) -> int:
+        """The id of the tree, NO_ID for no tree."""
+        if node is None:
+            return NO_ID
+        return self.visit(node)
+
+    def intern(self, node: Optional[ASTNode]) -> Optional[ASTNode]:
+        """The canonical tree for the given tree, sharing identical subtrees with every tree interned before."""
+        if not self.share_subtrees:
+            raise ValueError("intern() needs a StructuralHasher created with share_subtrees=True")
+        if node is None:
+            return None
+        return self._nodes[self.visit(node)]
+
+    def _add(self, key: tuple, canonical: ASTNode) -> int:
+        # a new structure, give it the next id
+        node_id = self._ids[key] = len(self._ids)
+        if self.share_subtrees:
+            self._nodes.append(canonical)
+        return node_id
+
+    def _canonical(self, node_id: int) -> Optional[ASTNode]:
+        return None if node_id == NO_ID else self._nodes[node_id]
+
+    def visit_none(self) -> int:
+        return NO_ID
+
+    def visit_BinaryExpression(self, node: BinaryExpression, left: int, right: int) -> int:
+        key = (node.operator.value, left, right)
+        node_id = self._ids.get(key)
+        if node_id is not None:
+            return node_id
+
+        # the first tree seen with this structure is kept, unless its children were replaced by shared ones
+        canonical = node
+        if self.share_subtrees:
+            canonical_left = self._canonical(left)
+            canonical_right = self._canonical(right)
+            if node.left is not canonical_left or node.right is not canonical_right:
+                canonical = BinaryExpression(canonical_left, node.operator, canonical_right)
+
+        return self._add(key, canonical)
+
+    def visit_UnaryExpression(self, node: UnaryExpression, operand: int) -> int:
+        # unary operators are keyed apart from the binary ones with the same symbol
+        key = ("unary", node.operator.value, operand)
+        node_id = self._ids.get(key)
+        if node_id is not None:
+            return node_id
+
+        canonical = node
+        if self.share_subtrees:
+            canonical_operand = self._canonical(operand)
+            if node.operand is not canonical_operand:
+                canonical = UnaryExpression(operator=node.operator, operand=canonical_operand)
+
+        return self._add(key, canonical)
+
+    def visit_Literal(self, node: Literal) -> int:
+        key = literal_key(node.value)
+        node_id = self._ids.get(key)
+        if node_id is not None:
+            return node_id
+        return self._add(key, node)
+
+class StructuralKeyBuilder(ASTVisitor):
+    """
+    Builds the postfix form of a tree, where literals are keyed by literal_key(),
+    operators by (symbol, number of operands) and missing children by None.
+    """
+
+    # each result is only used by its parent, so the left hand list is extended in place rather than copied
+
+    def visit_none(self) -> list:
+        return [None]
+
+    def visit_BinaryExpression(self, node: BinaryExpression, left: list, right: list) -> list:
+        left.extend(right)
+        left.append((node.operator.value, 2))
+        return left
+
+    def visit_UnaryExpression(self, node: UnaryExpression, operand: list) -> list:
+        operand.append((node.operator.value, 1))
+        return operand
+
+    def visit_Literal(self, node: Literal) -> list:
+        return [literal_key(node.value)]
+
+# the key builder holds no per-tree state, so one instance is shared
+structural_key_builder = StructuralKeyBuilder()
+
+def structural_key(node: Optional[ASTNode]) -> tuple:
+    """
+    An exact, hashable key for the structure of a tree, equal for trees with the same shape, operators and literals.
+    Unlike StructuralHasher ids, keys don't depend on a table, so they can be compared between any trees.
+    """
+    if node is None:
+        return (None,)
+    return tuple(structural_key_builder.visit(node))
+
+def structural_hash(node: Optional[ASTNode]) -> int:
+    """The hash of the structural key of a tree (stable within a process)."""
+    return hash(structural_key(node))
@@ -0,0 +1,112 @@
+from typing import Any, Callable, Dict, Optional, Tuple
+from compiler.ast.expressions.binary_expression import BinaryExpression
+from compiler.ast.expressions.literal_expression import Literal
+from compiler.ast.expressions.unary_expression import UnaryExpression
+
+# the children of each node class, in evaluation order (None for leaves), subclasses are added as they are seen
+NODE_CHILDREN: Dict[type, Optional[Callable[[Any], Tuple]]] = {
+    BinaryExpression: lambda node: (node.left, node.right),
+    UnaryExpression: lambda node: (node.operand,),
+}
+
+# marks a class not yet in NODE_CHILDREN, as None marks a leaf
+UNSEEN = object()
+
+def node_children(node_class: type) -> Optional[Callable[[Any], Tuple]]:
+    """The children of a node class, from its nearest base class in NODE_CHILDREN, None for leaves (the result is added to the table)."""
+    get_children = None
+    for base in node_class.__mro__:
+        if base in NODE_CHILDREN:
+            get_children = NODE_CHILDREN[base]
+            break
+    NODE_CHILDREN[node_class] = get_children
+    return get_children
+
+class ASTVisitor:
+    """
+    Post-order visitor over compiler.ast.expressions trees.
+
+    Subclasses define a visit_<ClassName> method per node class, which is called with the node followed by
+    the results of visiting its children, e.g. visit_BinaryExpression(node, left, right).
+    Missing children (None) are visited with visit_none(), and classes without a method with generic_visit(node).
+
+    Methods are looked up once per class into a dispatch table, and the tree is walked with an explicit stack,
+    so deep trees don't hit the recursion limit.
+    """
+
+    def __init__(self):
+        # class -> bound visit method, filled in as classes are seen
+        self._dispatch: Dict[type, Callable] = {}
+
+    def visit(self, root: Any) -> Any:
+        """Visit the tree, returning the result for the root."""
+        dispatch = self._dispatch
+        results = []
+
+        # (node, children visited) pairs
+        stack = [(root, False)]
+
+        while stack:
+            node, children_visited = stack.pop()
+
+            # missing child
+            if node is None:
+                results.append(self.visit_none())
+                continue
+
+            node_class = type(node)
+            get_children = NODE_CHILDREN.get(node_class, UNSEEN)
+            if get_children is UNSEEN:
+                get_children = node_children(node_class)
+
+            if get_children is not None and not children_visited:
+                # come back to this node once its children are done
+                stack.append((node, True))
+                for child in reversed(get_children(node)):
+                    stack.append((child, False))
+                continue
+
+            # look up the visit method
+            method = dispatch.get(node_class)
+            if method is None:
+                method = dispatch[node_class] = self._find_method(node_class)
+
+            if get_children is None:
+                results.append(method(node))
+            else:
+                # the child results are the last entries on the results stack
+                count = len(get_children(node))
+                child_results = results[-count:]
+                del results[-count:]
+                results.append(method(node, *child_results))
+
+        # return the result for the root
+        return results[0]
+
+    def _find_method(self, node_class: type) -> Callable:
+        """Find the visit method for a class, falling back to its base classes, then generic_visit."""
+        for base in node_class.__mro__:
+            method = getattr(self, f"visit_{base.__name__}", None)
+            if method is not None:
+                return method
+        return self.generic_visit
+
+    def visit_none(self) -> Any:
+        """Visit a missing child (e.g. the right hand side of '3 +')."""
+        return None
+
+    def generic_visit(self, node: Any, *child_results) -> Any:
+        """Visit a node with no visit method."""
+        raise TypeError(f"{self.__class__.__name__} can't visit {node.__class__.__name__}")
+
+class ASTTransformer(ASTVisitor):
+    """A visitor that rebuilds the tree from the results for the children, override methods to change nodes."""
+
+    def visit_BinaryExpression(self, node: BinaryExpression, left, right) -> BinaryExpression:
+        return BinaryExpression(left, node.operator, right)
+
+    def visit_UnaryExpression(self, node: UnaryExpression, operand) -> UnaryExpression:
+        return UnaryExpression(operator=node.operator, operand=operand)
+
+    def visit_Literal(self, node: Literal) -> Literal:
+        return node
@@ -0,0 +1,290 @@
+from decimal import Decimal, DecimalException
+from typing import Callable, Dict, List, Optional, Sequence
+from compiler.ast.arena import ARENA_OPERATOR_CODES, ARENA_OPERATORS, ASTArena, KIND_BINARY, KIND_LITERAL, KIND_UNARY, NO_NODE
+from compiler.ast.ast_node import ASTNode
+from compiler.evaluator.decimal_evaluator import (
+    BINARY_OPERATIONS, EvaluationError, RESULT_DECIMAL_PLACES, finish_result, native_eval, new_evaluation_context
+)
+
+try:
+    import numpy
+except ImportError:  # numpy is optional, without it every row is evaluated with Decimal
+    numpy = None
+
+# the binary operators evaluated with float64, the rest (e.g. '^') are evaluated with Decimal
+FLOAT_OPERATORS = ('+', '-', '*', '/')
+
+# unit roundoff of float64, and the magnitude below which every integer is exact
+UNIT_ROUNDOFF = 2.0 ** -53
+EXACT_INTEGER_LIMIT = 2.0 ** 53
+
+class BatchEvaluator:
+    """
+    Evaluates many trees at once, giving the same results as the native backend.
+
+    The trees are held in an ASTArena and evaluated with NumPy float64 operations over every node of the
+    same height at once (one pass per height and operator), so the cost doesn't depend on how many
+    different tree shapes there are.
+
+    Alongside each value a bound on its rounding error is carried. Rows whose float result might round
+    to a different answer (too large, too close to a rounding boundary, a division by ~0, ...) are evaluated
+    with Decimal instead, as are trees the float path doesn't support (e.g. '^'), and every row when NumPy
+    isn't installed.
+
+    Rows that can't be evaluated get None, and their error is kept in errors, keyed by row.
+    """
+
+    def __init__(self, use_numpy: bool = True, places: int = RESULT_DECIMAL_PLACES):
+        self.use_numpy = use_numpy and numpy is not None
+        self.places = places
+        self.context = new_evaluation_context()
+
+        # errors from the last evaluation, and how many rows were evaluated with each path
+        self.errors: Dict[int, EvaluationError] = {}
+        self.float_rows = 0
+        self.decimal_rows = 0
+
+    def evaluate(self, ast_nodes: Sequence[Optional[ASTNode]]) -> List[Optional[Decimal]]:
+        """
+        Evaluate the trees, returning the results aligned with them (None where evaluation failed).
+        The trees are copied into an arena first, evaluate_arena() on an arena from parse_to_arena() skips that.
+        """
+        self._reset()
+        results: List[Optional[Decimal]] = [None] * len(ast_nodes)
+
+        # the float path fills in the rows it can, and returns the rest
+        fallback_rows = self._evaluate_floats(ASTArena.from_nodes(ast_nodes), results) if self.use_numpy else range(len(ast_nodes))
+        self._evaluate_nodes(fallback_rows, ast_nodes.__getitem__, results)
+        return results
+
+    def evaluate_arena(self, arena: ASTArena) -> List[Optional[Decimal]]:
+        """Evaluate every tree in an arena (e.g. from parse_to_arena), returning the results aligned with its roots."""
+        self._reset()
+        results: List[Optional[Decimal]] = [None] * len(arena)
+
+        # the float path fills in the rows it can, then the rest are evaluated with Decimal over the arena rows
+        fallback_rows = self._evaluate_floats(arena, results) if self.use_numpy else range(len(arena))
+        failed_rows = self._evaluate_decimal_rows(arena, fallback_rows, results)
+
+        # rows that failed are evaluated again from their nodes, for the same error as the native backend
+        self._evaluate_nodes(failed_rows, arena.tree, results)
+        return results
+
+    def _reset(self):
+        self.errors = {}
+        self.float_rows = 0
+        self.decimal_rows = 0
+
+    def _evaluate_nodes(self, rows, get_tree: Callable[[int], ASTNode], results: list):
+        """Evaluate rows one at a time with the native evaluator, filling in results."""
+        for row in rows:
+            self.decimal_rows += 1
+            try:
+                results[row] = native_eval(get_tree(row), self.context)
+            except EvaluationError as error:
+                self.errors[row] = error
+
+    def _evaluate_decimal_rows(self, arena: ASTArena, rows, results: list) -> List[int]:
+        """Evaluate rows of the arena with Decimal, filling in results, and return the rows that failed."""
+        kinds = arena.kinds
+        operators = arena.operators
+        lefts = arena.lefts
+        rights = arena.rights
+        literals = arena.literals
+        literal_pool = arena.literal_pool
+        context = self.context
+
+        # the nodes of the rows, children always have lower indexes than their parents so they are calculated first
+        nodes = set()
+        stack = [arena.roots[row] for row in rows]
+        while stack:
+            node = stack.pop()
+            if node != NO_NODE and node not in nodes:
+                nodes.add(node)
+                stack.append(lefts[node])
+                stack.append(rights[node])
+
+        # calculated values, a missing value marks a node that couldn't be calculated
+        values = {}
+        for node in sorted(nodes):
+            kind = kinds[node]
+            try:
+                if kind == KIND_LITERAL:
+                    value = literal_pool[literals[node]]
+                    if isinstance(value, Decimal):
+                        values[node] = value
+                elif kind == KIND_UNARY:
+                    if ARENA_OPERATORS[operators[node]] == '-' and lefts[node] in values:
+                        values[node] = context.minus(values[lefts[node]])
+                else:
+                    operation = BINARY_OPERATIONS.get(ARENA_OPERATORS[operators[node]])
+                    if operation is not None and lefts[node] in values and rights[node] in values:
+                        values[node] = operation(context, values[lefts[node]], values[rights[node]])
+            except (DecimalException, ArithmeticError):
+                pass
+
+        failed_rows = []
+        for row in rows:
+            value = values.get(arena.roots[row])
+            if value is None:
+                failed_rows.append(row)
+                continue
+
+            self.decimal_rows += 1
+            try:
+                results[row] = finish_result(value, context)
+            except EvaluationError as error:
+                self.errors[row] = error
+
+        return failed_rows
+
+    def _evaluate_floats(self, arena: ASTArena, results: list) -> List[int]:
+        """Evaluate the arena with float64, filling in the results that are safe, and return the other rows."""
+        np = numpy
+        if not arena.node_count:
+            return list(range(len(arena)))
+
+        kinds = np.frombuffer(arena.kinds, dtype=np.uint8)
+        operators = np.frombuffer(arena.operators, dtype=np.uint8)
+        lefts = np.frombuffer(arena.lefts, dtype=np.intc)
+        rights = np.frombuffer(arena.rights, dtype=np.intc)
+        literals = np.frombuffer(arena.literals, dtype=np.intc)
+        roots = np.frombuffer(arena.roots, dtype=np.intc)
+
+        # (value, error bound) for every node, nodes that are never calculated have no bound
+        values = np.full(arena.node_count, np.nan)
+        errors = np.full(arena.node_count, np.inf)
+
+        # literals, from the literal pool
+        is_literal = kinds == KIND_LITERAL
+        pool_values, pool_errors = self._literal_pool_columns(arena.literal_pool)
+        values[is_literal] = pool_values[literals[is_literal]]
+        errors[is_literal] = pool_errors[literals[is_literal]]
+
+        with np.errstate(all='ignore'):
+            for level in self._levels(kinds, lefts, rights, is_literal):
+                level_kinds = kinds[level]
+                level_operators = operators[level]
+
+                # negation
+                nodes = level[(level_kinds == KIND_UNARY) & (level_operators == ARENA_OPERATOR_CODES['-'])]
+                values[nodes] = -values[lefts[nodes]]
+                errors[nodes] = errors[lefts[nodes]]
+
+                # binary operators
+                for symbol in FLOAT_OPERATORS:
+                    nodes = level[(level_kinds == KIND_BINARY) & (level_operators == ARENA_OPERATOR_CODES[symbol])]
+                    if nodes.size:
+                        left = lefts[nodes]
+                        right = rights[nodes]
+                        values[nodes], errors[nodes] = self._apply(symbol, values[left], errors[left], values[right], errors[right])
+
+                # nodes missing a child can't be calculated (the values above were read from the wrong row)
+                missing = level[(lefts[level] == NO_NODE) | ((level_kinds == KIND_BINARY) & (rights[level] == NO_NODE))]
+                values[missing] = np.nan
+                errors[missing] = np.inf
+
+            # the results, rows without a tree have no bound
+            has_root = roots != NO_NODE
+            value = np.where(has_root, values[roots], np.nan)
+            error = np.where(has_root, errors[roots], np.inf)
+
+            # the value scaled to the result decimal places, its error bound, and the integer it rounds to
+            scaled = value * 10.0 ** self.places
+            scaled_error = error * 10.0 ** self.places + np.abs(scaled) * UNIT_ROUNDOFF
+            rounded = np.floor(scaled + 0.5)
+
+            # safe when the whole error interval is clear of the nearest half-way point k + 0.5, by more than the
+            # rounding of the sums above (so half-way ties, which Decimal rounds half-even, always fall back)
+            tie_distance = np.abs(scaled - (np.floor(scaled) + 0.5))
+            safe = (np.isfinite(scaled_error) & (tie_distance > scaled_error + np.spacing(np.abs(scaled) + 0.5))
+                    & (np.abs(rounded) < EXACT_INTEGER_LIMIT))
+
+        # build the Decimals for the safe rows
+        context = self.context
+        fallback_rows = []
+        for row, (rounded, is_safe) in enumerate(zip(rounded.tolist(), safe.tolist())):
+            if not is_safe:
+                fallback_rows.append(row)
+            elif rounded == 0:
+                # a result of zero is never -0 (see finish_result)
+                results[row] = Decimal(0)
+            else:
+                results[row] = Decimal(int(rounded)).scaleb(-self.places, context).normalize(context)
+
+        self.float_rows = len(results) - len(fallback_rows)
+        return fallback_rows
+
+    def _literal_pool_columns(self, literal_pool: list):
+        """The float64 value of each literal in the pool, and a bound on its conversion error."""
+        np = numpy
+        try:
+            # converting with float() first is much faster than letting NumPy convert each Decimal
+            values = np.fromiter(map(float, literal_pool), dtype=np.float64, count=len(literal_pool))
+        except (TypeError, ValueError):
+            # a literal that isn't a number, those have no value
+            values = np.array([float(literal) if isinstance(literal, Decimal) else np.nan for literal in literal_pool], dtype=np.float64)
+        errors = np.where(np.isfinite(values), np.abs(values) * UNIT_ROUNDOFF, np.inf)
+
+        # integers below the limit convert exactly, checked against the Decimal as the float may have been rounded to one
+        candidates = np.flatnonzero((values == np.floor(values)) & (np.abs(values) < EXACT_INTEGER_LIMIT))
+        exact = [index for index, value in zip(candidates.tolist(), values[candidates].tolist()) if literal_pool[index] == int(value)]
+        errors[exact] = 0.0
+
+        return values, errors
+
+    def _levels(self, kinds, lefts, rights, is_literal) -> list:
+        """The operator nodes grouped by height (literals are height 0), lowest first, so children come before parents."""
+        np = numpy
+        nodes = np.flatnonzero(~is_literal)
+        left = lefts[nodes]
+        right = rights[nodes]
+        heights = np.zeros(len(kinds), dtype=np.intc)
+
+        # raise the heights until they stop changing, one pass per level of the tallest tree
+        while nodes.size:
+            node_heights = np.maximum(np.where(left != NO_NODE, heights[left], 0), np.where(right != NO_NODE, heights[right], 0)) + 1
+            if np.array_equal(node_heights, heights[nodes]):
+                break
+            heights[nodes] = node_heights
+
+        # split the nodes by height
+        order = np.argsort(heights[nodes], kind='stable')
+        nodes = nodes[order]
+        return np.split(nodes, np.flatnonzero(np.diff(heights[nodes])) + 1) if nodes.size else []
+
+    def _apply(self, operator: str, left, left_error, right, right_error):
+        """Apply a binary operator to columns, returning the result and a bound on its error."""
+        np = numpy
+        exact = (left_error == 0) & (right_error == 0)
+
+        if operator == '+':
+            value = left + right
+            error = left_error + right_error
+        elif operator == '-':
+            value = left - right
+            error = left_error + right_error
+        elif operator == '*':
+            value = left * right
+            error = np.abs(left) * right_error + np.abs(right) * left_error + left_error * right_error
+        else:
+            value = left / right
+
+            # dividing by a value that could be 0 has no bound
+            divisor = np.abs(right) - right_error
+            error = np.where(divisor > 0, (left_error + np.abs(value) * right_error) / divisor, np.inf)
+
+            # a quotient of integers is only exact when it divides exactly
+            exact &= (value * right == left)
+
+        return value, error + self._rounding_error(value, exact)
+
+    def _rounding_error(self, value, exact):
+        """The error from rounding a result to float64, none for an integer below the limit calculated from exact values."""
+        np = numpy
+        is_exact = exact & (value == np.floor(value)) & (np.abs(value) < EXACT_INTEGER_LIMIT)
+        return np.where(is_exact, 0.0, np.abs(value) * UNIT_ROUNDOFF)
+
+def evaluate_batch(ast_nodes: Sequence[Optional[ASTNode]]) -> List[Optional[Decimal]]:
+    """Evaluate many trees at once, returning the native backend result for each (None where evaluation failed)."""
+    return BatchEvaluator().evaluate(ast_nodes)
@@ -0,0 +1,103 @@
+import threading
+from decimal import Context, Decimal, DecimalException, DivisionByZero, InvalidOperation, Overflow, ROUND_HALF_EVEN
+from typing import Optional
+from compiler.ast.ast_node import ASTNode
+from compiler.ast.expressions import BinaryExpression, Literal, UnaryExpression
+from compiler.ast.visitor import ASTVisitor
+
+# precision used for evaluation (the same as the sympy path uses for its conversion to Decimal)
+EVALUATION_PRECISION = 64
+
+# results are given to 4 decimal places, then normalized
+RESULT_DECIMAL_PLACES = 4
+RESULT_QUANTUM = Decimal('1.0000')
+
+# per-thread evaluation contexts (contexts record flags as they are used, so they aren't shared between threads)
+_thread_contexts = threading.local()
+
+def new_evaluation_context() -> Context:
+    """A Decimal context for evaluation, set up in full rather than from the (mutable) default context."""
+    return Context(prec=EVALUATION_PRECISION, rounding=ROUND_HALF_EVEN, Emin=-999999, Emax=999999,
+                   capitals=1, clamp=0, flags=[], traps=[InvalidOperation, DivisionByZero, Overflow])
+
+def evaluation_context() -> Context:
+    """The evaluation context of the current thread, created on first use, so evaluation never touches getcontext()."""
+    context = getattr(_thread_contexts, "context", None)
+    if context is None:
+        context = _thread_contexts.context = new_evaluation_context()
+    return context
+
+class EvaluationError(ValueError):
+    """Raised when an expression can't be evaluated, e.g. a division by zero or an incomplete expression."""
+
+def remainder(context: Context, left: Decimal, right: Decimal) -> Decimal:
+    # the result takes the sign of the divisor, as in Python (and sympy), e.g. -7 % 3 is 2
+    result = context.remainder(left, right)
+    if result and (result < 0) != (right < 0):
+        result = context.add(result, right)
+    return result
+
+# binary operators, evaluated in the given context
+BINARY_OPERATIONS = {
+    '+': Context.add,
+    '-': Context.subtract,
+    '*': Context.multiply,
+    '/': Context.divide,
+    '^': Context.power,
+    '%': remainder,
+}
+
+def quantize_result(value: Decimal, context: Context) -> Decimal:
+    """Round a result to 4 decimal places and normalize it, the form used for the answers."""
+    return context.quantize(value, RESULT_QUANTUM).normalize(context)
+
+class DecimalEvaluator(ASTVisitor):
+    """Evaluates the AST nodes with Decimal arithmetic, every operation rounded to the precision of the context."""
+
+    def __init__(self, context: Context = None):
+        super().__init__()
+        self.context = context if context is not None else evaluation_context()
+
+    def evaluate(self, node: Optional[ASTNode]) -> Decimal:
+        """Evaluate the tree, raising EvaluationError if it can't be evaluated."""
+        if node is None:
+            raise EvaluationError("Empty expression")
+
+        try:
+            return self.visit(node)
+        except (DecimalException, ArithmeticError) as error:
+            raise EvaluationError(f"Calculation error: {error.__class__.__name__}") from error
+
+    def visit_none(self):
+        raise EvaluationError("Incomplete expression")
+
+    def visit_BinaryExpression(self, node: BinaryExpression, left: Decimal, right: Decimal) -> Decimal:
+        operation = BINARY_OPERATIONS.get(node.operator.value)
+        if operation is None:
+            raise EvaluationError(f"Unsupported operator: {node.operator.value}")
+        return operation(self.context, left, right)
+
+    def visit_UnaryExpression(self, node: UnaryExpression, operand: Decimal) -> Decimal:
+        if node.operator.value != '-':
+            raise EvaluationError(f"Unsupported operator: {node.operator.value}")
+        return self.context.minus(operand)
+
+    def visit_Literal(self, node: Literal) -> Decimal:
+        if not isinstance(node.value, Decimal):
+            raise EvaluationError(f"Not a number: {node.value}")
+        return node.value
+
+def finish_result(result: Decimal, context: Context) -> Decimal:
+    """Turn a calculated value into the result, rounded to 4 decimal places and normalized."""
+    try:
+        result = quantize_result(result, context)
+    except DecimalException as error:
+        raise EvaluationError(f"Calculation error: {error.__class__.__name__}") from error
+
+    # a result of zero is always 0, never -0 (e.g. 0 * -5, or -0.00001 rounded), as the exact backend has no negative zero
+    return result.copy_abs() if result.is_zero() else result
+
+def native_eval(ast_node: Optional[ASTNode], context: Context = None) -> Decimal:
+    """Evaluate the AST nodes, returning the result rounded to 4 decimal places and normalized."""
+    evaluator = DecimalEvaluator(context)
+    return finish_result(evaluator.evaluate(ast_node), evaluator.context)
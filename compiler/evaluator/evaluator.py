@@ -0,0 +1,46 @@
+from decimal import Decimal
+from typing import Optional
+from compiler.ast.ast_node import ASTNode
+from compiler.evaluator.decimal_evaluator import native_eval
+from compiler.evaluator.fraction_evaluator import exact_eval
+from compiler.lexer.tokenizer import Tokenizer, TokenizationError
+from compiler.parser.parser import Parser
+
+# the evaluator backends
+# - native: walks the parsed AST with Decimal arithmetic
+# - exact: walks the parsed AST with Fraction arithmetic, only rounding the final result
+# - sympy: sympify() and evalf() on the expression text
+EVALUATOR_BACKENDS = ("native", "exact", "sympy")
+
+# sympy stays the default, as the other backends keep more significant digits than evalf (15), so large results
+# can differ in their last digits (and sympy writes results past 1e15 in exponent form), changing emitted datasets.
+# native is much faster and opt-in.
+DEFAULT_BACKEND = "sympy"
+
+def parse_for_evaluation(expression: str) -> Optional[ASTNode]:
+    """Parse expression text for the native backend."""
+    try:
+        return Parser(Tokenizer(expression, use_regex=True).iter_tokens()).parse()
+    except (TokenizationError, SyntaxError) as error:
+        raise ValueError(f"Invalid expression or calculation error: {error}")
+
+def evaluate(expression: str, backend: str = DEFAULT_BACKEND, ast_node: ASTNode = None) -> Decimal:
+    """
+    Evaluate an expression with the selected backend, returning the result rounded to 4 decimal places and normalized.
+    The native and exact backends use ast_node when given (it must be the AST of expression), rather than parsing the text.
+    Raises ValueError if the expression can't be evaluated.
+    """
+    if backend in ("native", "exact"):
+        if ast_node is None:
+            ast_node = parse_for_evaluation(expression)
+        try:
+            return native_eval(ast_node) if backend == "native" else exact_eval(ast_node)
+        except ValueError as error:
+            raise ValueError(f"Invalid expression or calculation error: {error}")
+
+    if backend == "sympy":
+        # imported on first use, so the native backend doesn't pay for importing sympy
+        from compiler.evaluator.sympy_evaluator import sympy_eval
+        return sympy_eval(expression)
+
+    raise ValueError(f"Unknown evaluator backend: {backend}, expected one of {', '.join(EVALUATOR_BACKENDS)}")
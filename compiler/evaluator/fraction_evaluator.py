@@ -0,0 +1,82 @@
+from decimal import Context, Decimal
+from fractions import Fraction
+from typing import Any, Optional
+from compiler.ast.ast_node import ASTNode
+from compiler.ast.expressions import BinaryExpression, Literal, UnaryExpression
+from compiler.evaluator.decimal_evaluator import EvaluationError, RESULT_DECIMAL_PLACES
+from compiler.ast.visitor import ASTVisitor
+
+def power(left: Fraction, right: Fraction) -> Fraction:
+    # only integer powers of a rational are rational
+    if right.denominator != 1:
+        raise EvaluationError(f"Exact evaluation needs an integer exponent, got {right}")
+    return left ** right.numerator
+
+# binary operators over exact rationals, shared by the exact evaluator and the explanation generators
+FRACTION_OPERATIONS = {
+    '+': Fraction.__add__,
+    '-': Fraction.__sub__,
+    '*': Fraction.__mul__,
+    '/': Fraction.__truediv__,
+    '^': power,
+    '%': Fraction.__mod__,
+}
+
+def to_fraction(value: Any) -> Fraction:
+    """The exact value of a number, or of its text (e.g. '3.1' is 31/10)."""
+    try:
+        return Fraction(value)
+    except (ValueError, TypeError, OverflowError) as error:
+        raise EvaluationError(f"Not a number: {value}") from error
+
+def calculate_fraction(operator: str, left: Fraction, right: Fraction) -> Fraction:
+    """Apply a binary operator to exact rationals."""
+    operation = FRACTION_OPERATIONS.get(operator)
+    if operation is None:
+        raise EvaluationError(f"Unsupported operator: {operator}")
+    try:
+        return operation(left, right)
+    except ZeroDivisionError as error:
+        raise EvaluationError("Calculation error: division by zero") from error
+
+def render_fraction(value: Fraction, places: int = RESULT_DECIMAL_PLACES) -> Decimal:
+    """
+    Render an exact rational as a Decimal, rounded (half to even) to the given decimal places and normalized,
+    the same form as the Decimal results. This is the only place exact values are rounded.
+    """
+    scaled = round(value * 10 ** places)
+    sign, digits, _ = Decimal(scaled).as_tuple()
+
+    # build the Decimal directly and normalize it with enough precision for every digit, so nothing is rounded again
+    rendered = Decimal((sign, digits, -places))
+    return rendered.normalize(Context(prec=max(len(digits), 1)))
+
+class FractionEvaluator(ASTVisitor):
+    """Evaluates the AST nodes exactly, with Fraction arithmetic."""
+
+    def evaluate(self, node: Optional[ASTNode]) -> Fraction:
+        """Evaluate the tree, raising EvaluationError if it can't be evaluated."""
+        if node is None:
+            raise EvaluationError("Empty expression")
+        return self.visit(node)
+
+    def visit_none(self):
+        raise EvaluationError("Incomplete expression")
+
+    def visit_BinaryExpression(self, node: BinaryExpression, left: Fraction, right: Fraction) -> Fraction:
+        return calculate_fraction(node.operator.value, left, right)
+
+    def visit_UnaryExpression(self, node: UnaryExpression, operand: Fraction) -> Fraction:
+        if node.operator.value != '-':
+            raise EvaluationError(f"Unsupported operator: {node.operator.value}")
+        return -operand
+
+    def visit_Literal(self, node: Literal) -> Fraction:
+        return to_fraction(node.value)
+
+# the evaluator holds no per-tree state, so one instance is shared
+fraction_evaluator = FractionEvaluator()
+
+def exact_eval(ast_node: Optional[ASTNode]) -> Decimal:
+    """Evaluate the AST nodes exactly, returning the result rounded to 4 decimal places and normalized."""
+    return render_fraction(fraction_evaluator.evaluate(ast_node))
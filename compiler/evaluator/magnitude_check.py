@@ -0,0 +1,147 @@
+import math
+from decimal import Decimal
+from typing import Optional, Tuple
+from compiler.ast.ast_node import ASTNode
+from compiler.ast.expressions import BinaryExpression, Literal, UnaryExpression
+from compiler.ast.visitor import ASTVisitor
+
+# a closed interval of floats containing the exact value
+Interval = Tuple[float, float]
+
+# the interval for values that can't be bounded (e.g. a division by a value that may be zero)
+UNBOUNDED: Interval = (-math.inf, math.inf)
+
+def outward(low: float, high: float) -> Interval:
+    """Widen an interval by one unit in the last place each way, so it still holds the exact value after float rounding."""
+    if math.isnan(low) or math.isnan(high):
+        return UNBOUNDED
+    return math.nextafter(low, -math.inf), math.nextafter(high, math.inf)
+
+def hull(values: Tuple[float, ...]) -> Interval:
+    """The outward rounded interval spanning the values (inf * 0 and the like give nan, which can't be bounded)."""
+    if any(math.isnan(value) for value in values):
+        return UNBOUNDED
+    return outward(min(values), max(values))
+
+def magnitude(interval: Interval) -> float:
+    """The largest absolute value in the interval."""
+    return max(abs(interval[0]), abs(interval[1]))
+
+def power_magnitude(base: Interval, exponent: Interval) -> Interval:
+    """Bound a power by the largest |base| ^ exponent over the corners, the sign isn't tracked."""
+    low, high = base
+    bases = [abs(low), abs(high)] + ([0.0] if low < 0 < high else [])
+    try:
+        largest = max(b ** e for b in bases for e in exponent)
+    except OverflowError:
+        return UNBOUNDED
+    except ZeroDivisionError:
+        # zero to a negative power
+        return UNBOUNDED
+    return outward(-largest, largest)
+
+class IntervalEstimator(ASTVisitor):
+    """
+    Bounds the value of the AST nodes with float interval arithmetic, without evaluating them exactly.
+
+    Every operation rounds outwards, so the exact value is always inside the interval, and values too large
+    for a float give infinite bounds rather than an error. Nodes that can't be bounded (unknown operators,
+    missing children, non-numbers) give None.
+    """
+
+    def visit_none(self) -> None:
+        return None
+
+    def visit_BinaryExpression(self, node: BinaryExpression, left: Optional[Interval], right: Optional[Interval]) -> Optional[Interval]:
+        if left is None or right is None:
+            return None
+
+        (a, b), (c, d) = left, right
+        operator = node.operator.value
+
+        if operator == '+':
+            return outward(a + c, b + d)
+        if operator == '-':
+            return outward(a - d, b - c)
+        if operator == '*':
+            return hull((a * c, a * d, b * c, b * d))
+        if operator == '/':
+            if c <= 0 <= d:
+                return UNBOUNDED
+            return hull((a / c, a / d, b / c, b / d))
+        if operator == '^':
+            return power_magnitude(left, right)
+        if operator == '%':
+            # the remainder is smaller than the divisor
+            if c <= 0 <= d:
+                return UNBOUNDED
+            bound = magnitude(right)
+            return -bound, bound
+        return None
+
+    def visit_UnaryExpression(self, node: UnaryExpression, operand: Optional[Interval]) -> Optional[Interval]:
+        if operand is None or node.operator.value != '-':
+            return None
+        return -operand[1], -operand[0]
+
+    def visit_Literal(self, node: Literal) -> Optional[Interval]:
+        if not isinstance(node.value, (Decimal, int, float)):
+            return None
+        value = float(node.value)
+        return outward(value, value)
+
+# the estimator holds no per-tree state, so one instance is shared
+interval_estimator = IntervalEstimator()
+
+def estimate_interval(ast_node: Optional[ASTNode]) -> Optional[Interval]:
+    """An interval containing the value of the AST nodes, or None if it can't be bounded."""
+    if ast_node is None:
+        return None
+    return interval_estimator.visit(ast_node)
+
+def integer_digits(value: float) -> float:
+    """The number of digits before the decimal point of a magnitude (infinite for an infinite magnitude)."""
+    if math.isinf(value):
+        return math.inf
+    return max(len(str(int(value))), 1)
+
+class MagnitudeLimits:
+    """
+    Limits on the size of a result, checked with the interval estimate before the expression is evaluated,
+    so samples with unusable answers can be skipped before any evaluation or LLM work.
+
+    max_magnitude limits the absolute value of the result, and max_digits the digits before its decimal point.
+    Either can be None for no limit. Results that may be unbounded (e.g. a division by zero) exceed any limit.
+    """
+
+    def __init__(self, max_magnitude: float = None, max_digits: int = None):
+        self.max_magnitude = max_magnitude
+        self.max_digits = max_digits
+
+    @classmethod
+    def from_config(cls, config: dict) -> 'MagnitudeLimits':
+        """Read the limits from a config section, e.g. {"max_magnitude": 1e12, "max_digits": 12}."""
+        config = config or {}
+        return cls(config.get("max_magnitude"), config.get("max_digits"))
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_magnitude is not None or self.max_digits is not None
+
+    def check(self, ast_node: Optional[ASTNode]) -> Optional[str]:
+        """The reason the result of the AST nodes is over the limits, or None if it isn't (or can't be bounded)."""
+        if not self.enabled:
+            return None
+
+        interval = estimate_interval(ast_node)
+        if interval is None:
+            return None
+
+        bound = magnitude(interval)
+        if math.isinf(bound):
+            return "result may be unbounded (e.g. a division by zero or an overflow)"
+        if self.max_magnitude is not None and bound > self.max_magnitude:
+            return f"result magnitude may reach {bound:.6g}, over the limit of {self.max_magnitude:g}"
+        if self.max_digits is not None and integer_digits(bound) > self.max_digits:
+            return f"result may have {integer_digits(bound)} digits, over the limit of {self.max_digits}"
+        return None
@@ -0,0 +1,22 @@
+from decimal import Decimal, InvalidOperation
+from sympy import sympify, SympifyError
+from compiler.evaluator.decimal_evaluator import evaluation_context, finish_result
+
+def sympy_eval(expression: str) -> Decimal:
+    """Evaluate the expression text with sympy, returning the result rounded to 4 decimal places and normalized."""
+    try:
+        # Evaluate expression
+        sympy_expr = sympify(expression)
+
+        # Check for an error
+        if sympy_expr is None:
+            raise ValueError("Invalid expression resulting in None")
+
+        # Get the result
+        result = sympy_expr.evalf()
+
+        # Return the value, rounded in the evaluation context of this thread
+        decimal_result = Decimal(str(result))
+        return finish_result(decimal_result, evaluation_context())
+    except (SympifyError, InvalidOperation, ValueError) as error:
+        raise ValueError(f"Invalid expression or calculation error: {error}")
@@ -0,0 +1,51 @@
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+from compiler.instructions.instruction_emitter import InstructionEmitter
+
+# how many instructions wait on the LLM at once by default
+DEFAULT_CONCURRENCY = 8
+
+# the event loop emit_instructions runs on, one per thread, kept open between calls
+_loops = threading.local()
+
+async def aemit_instructions(instructions: Sequence[InstructionEmitter], step_by_step_template_name = "math_stepbystep_template.jinja",
+                             concurrency: int = DEFAULT_CONCURRENCY, timeout: Optional[float] = None) -> List[Optional[Dict[str, Any]]]:
+    """
+    Build the instruction records of many instructions at once with aemit_instruction, returned in the order given.
+
+    At most concurrency instructions are built at a time, and each is given timeout seconds (None for no limit).
+    An instruction that runs out of time gets None in place of its record, and nothing is cached for it,
+    so emitting it again starts over.
+    """
+    if concurrency < 1:
+        raise ValueError(f"Concurrency must be at least 1, got {concurrency}")
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def emit(instruction: InstructionEmitter) -> Optional[Dict[str, Any]]:
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(instruction.aemit_instruction(step_by_step_template_name), timeout)
+            except asyncio.TimeoutError:
+                return None
+
+    # gather keeps the order of the instructions, whatever order they finish in
+    return await asyncio.gather(*(emit(instruction) for instruction in instructions))
+
+def emit_instructions(instructions: Sequence[InstructionEmitter], step_by_step_template_name = "math_stepbystep_template.jinja",
+                      concurrency: int = DEFAULT_CONCURRENCY, timeout: Optional[float] = None) -> List[Optional[Dict[str, Any]]]:
+    """
+    aemit_instructions for code outside an event loop (e.g. the generator scripts).
+
+    Every call in a thread runs on the same event loop, as the async clients of shared LLMs (see llm_client)
+    stay bound to the loop they were first used on, and fail on any other once it is closed.
+    """
+    return event_loop().run_until_complete(aemit_instructions(instructions, step_by_step_template_name, concurrency, timeout))
+
+def event_loop() -> asyncio.AbstractEventLoop:
+    """The event loop of the thread for emit_instructions, created on first use."""
+    loop = getattr(_loops, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = _loops.loop = asyncio.new_event_loop()
+    return loop
@@ -0,0 +1,89 @@
+import asyncio
+import copy
+from typing import Any, Dict, List, Sequence, Tuple
+from compiler.instructions.async_emitter import DEFAULT_CONCURRENCY
+from compiler.instructions.instruction_emitter import InstructionEmitter
+from compiler.instructions.llm_response_cache import get_llm_response_cache
+
+# (instruction index, record field, rendered prompt) for each LLM response a batch needs
+PromptRequest = Tuple[int, str, str]
+
+def prepare_batch(instructions: Sequence[InstructionEmitter], step_by_step_template_name: str) -> Tuple[List[Dict[str, Any]], Dict[int, List[PromptRequest]]]:
+    """
+    The instruction records, prepared without their LLM responses, and the prompts still to send, grouped
+    by LLM as id(llm) -> requests. Instructions with a cached record for the template send nothing, and prompts
+    in the LLM response cache are answered from it. The records aren't cached until the responses are in (see keep_batch).
+    """
+    response_cache = get_llm_response_cache()
+    records = []
+    batches = {}
+    for index, instruction in enumerate(instructions):
+        record = instruction.cached_instruction(step_by_step_template_name)
+        if record is None:
+            record = instruction.prepare_instruction()
+            if instruction.llm:
+                requests = batches.setdefault(id(instruction.llm), [])
+                for field, prompt in instruction.llm_prompts(record, step_by_step_template_name).items():
+                    response = response_cache.get(instruction.llm, prompt) if response_cache is not None else None
+                    if response is None:
+                        requests.append((index, field, prompt))
+                    else:
+                        record[field] = response
+        records.append(record)
+
+    # leave out the LLMs whose prompts were all answered from the cache
+    return records, {llm_id: requests for llm_id, requests in batches.items() if requests}
+
+def batch_inputs(requests: List[PromptRequest]) -> List[Dict[str, str]]:
+    """The inputs of the response chain (see InstructionEmitter.llm_response_chain) for the requests."""
+    return [{"input_text": prompt} for _, _, prompt in requests]
+
+def finish_batch(records: List[Dict[str, Any]], requests: List[PromptRequest], responses: List[Any], llm: Any):
+    """
+    Put each response into the record it was requested for, errors as the message get_llm_response gives.
+    The responses (but not the errors) go into the LLM response cache.
+    """
+    response_cache = get_llm_response_cache()
+    for (index, field, prompt), response in zip(requests, responses):
+        if isinstance(response, Exception):
+            response = f"Error generating response from LLM: {response}"
+        elif response_cache is not None:
+            response_cache.put(llm, prompt, response)
+        records[index][field] = response
+
+def keep_batch(instructions: Sequence[InstructionEmitter], step_by_step_template_name: str, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Cache the finished records in their instructions, returning deep copies of them (see emit_instruction)."""
+    for instruction, record in zip(instructions, records):
+        if instruction.cached_instruction(step_by_step_template_name) is None:
+            instruction.cache_instruction(step_by_step_template_name, record)
+    return [copy.deepcopy(record) for record in records]
+
+def emit_instructions_batched(instructions: Sequence[InstructionEmitter], step_by_step_template_name = "math_stepbystep_template.jinja",
+                              max_concurrency: int = DEFAULT_CONCURRENCY) -> List[Dict[str, Any]]:
+    """
+    The instruction records of many instructions, in the order given, with the pretty-result and step-by-step
+    prompts of all of them sent through chain.batch, at most max_concurrency at a time per LLM.
+
+    The records are kept by the instructions, so the emit_* methods reuse them afterwards.
+    """
+    records, batches = prepare_batch(instructions, step_by_step_template_name)
+    for requests in batches.values():
+        instruction = instructions[requests[0][0]]
+        chain = instruction.llm_response_chain()
+        responses = chain.batch(batch_inputs(requests), config={"max_concurrency": max_concurrency}, return_exceptions=True)
+        finish_batch(records, requests, responses, instruction.llm)
+    return keep_batch(instructions, step_by_step_template_name, records)
+
+async def aemit_instructions_batched(instructions: Sequence[InstructionEmitter], step_by_step_template_name = "math_stepbystep_template.jinja",
+                                     max_concurrency: int = DEFAULT_CONCURRENCY) -> List[Dict[str, Any]]:
+    """
+    emit_instructions_batched for asyncio, with chain.abatch.
+    Preparing and finishing the batch use the response cache (sqlite), so they run in a thread to keep the event loop free.
+    """
+    records, batches = await asyncio.to_thread(prepare_batch, instructions, step_by_step_template_name)
+    for requests in batches.values():
+        instruction = instructions[requests[0][0]]
+        chain = instruction.llm_response_chain()
+        responses = await chain.abatch(batch_inputs(requests), config={"max_concurrency": max_concurrency}, return_exceptions=True)
+        await asyncio.to_thread(finish_batch, records, requests, responses, instruction.llm)
+    return keep_batch(instructions, step_by_step_template_name, records)
@@ -1,24 +1,56 @@
 import json
 import random
-from decimal import Decimal, InvalidOperation, getcontext
-from langchain_ollama import OllamaLLM
-from sympy import sympify, SympifyError
-from langchain_core.output_parsers import StrOutputParser
-from langchain.prompts import PromptTemplate
+from decimal import Decimal
+from compiler.ast.expressions import BinaryExpression, Literal, UnaryExpression
+from compiler.ast.visitor import ASTVisitor
+from compiler.evaluator.evaluator import DEFAULT_BACKEND
+from compiler.evaluator.fraction_evaluator import render_fraction
 from compiler.instructions.instruction_emitter import InstructionEmitter
 from explanations.expression_explanation_generator import ExpressionExplanationGenerator
 from explanations.expression_node import ExpressionNode
 from explanations.expression_placeholder_explanation_generator import PlaceholderExpressionExplanationGenerator
 from explanations.expression_tree import ExpressionTree
 
+class ExpressionTreeBuilder(ASTVisitor):
+    """Converts the AST nodes into ExpressionNodes, the same as ast_to_expression_tree does for the dict form."""
+
+    def visit_BinaryExpression(self, node: BinaryExpression, left, right) -> ExpressionNode:
+        return ExpressionNode(value=node.operator.value, left=left, right=right)
+
+    def visit_UnaryExpression(self, node: UnaryExpression, operand) -> ExpressionNode:
+        return unary_expression_node(node.operator.value, operand)
+
+    def visit_Literal(self, node: Literal) -> ExpressionNode:
+        # the dict form holds Decimal values as strings
+        value = str(node.value) if isinstance(node.value, Decimal) else node.value
+        return ExpressionNode(value=value)
+
+def unary_expression_node(operator: str, operand: ExpressionNode) -> ExpressionNode:
+    """
+    The ExpressionNode for a unary operator, ExpressionNodes only have binary operators and literals,
+    so a negated literal becomes a negative literal, and any other negation (0 - operand).
+    """
+    if operator == '-' and operand is not None:
+        if operand.left is None and operand.right is None and operand.value != '?':
+            # a double negative cancels out
+            value = str(operand.value)
+            return ExpressionNode(value=value[1:] if value.startswith('-') else f"-{value}")
+        return ExpressionNode(value='-', left=ExpressionNode(value='0'), right=operand)
+
+    # anything else keeps the operand on the left
+    return ExpressionNode(value=operator, left=operand, right=None)
+
+# the builder holds no per-tree state, so one instance is shared
+expression_tree_builder = ExpressionTreeBuilder()
+
 class InfixExpressionCalculatorInstruction(InstructionEmitter):
-    def __init__(self, ast: dict, tokens: list = None, llm: str = None):
+    def __init__(self, ast: dict, tokens: list = None, llm: str = None, ast_node=None, evaluator: str = DEFAULT_BACKEND):
         # Check if we're parsing an ast or tokens
         if isinstance(ast, str):
             ast = json.loads(ast)
 
         # Call the parent constructor
-        super().__init__(ast, tokens or [], llm)
+        super().__init__(ast, tokens or [], llm, ast_node=ast_node, evaluator=evaluator)
 
         # Set the tokens
         self.tokens = tokens or []
@@ -77,14 +109,8 @@ class InfixExpressionCalculatorInstruction(InstructionEmitter):
             Question: """
 
         try:
-            # Use the expression in the context
-            prompt = PromptTemplate(input_variables=["expression", "question"], template=prompt_template)
-
-            # setup the chain
-            chain = prompt | self.llm | StrOutputParser()
-
-            # execute
-            response = chain.invoke({"expression":self.expression, "question":question})
+            # execute (the chain is shared with the other instructions using the LLM, and the response may be cached)
+            response = self.invoke_llm_chain(prompt_template, {"expression": self.expression, "question": question})
 
             # return the response
             return response
@@ -92,32 +118,13 @@ class InfixExpressionCalculatorInstruction(InstructionEmitter):
             return f"Error generating instruction from LLM: {e}"
         
 
-    def safe_eval(self, expression: str) -> Decimal:
-        try:
-            # Evaluate expression
-            sympy_expr = sympify(expression)
-
-            # Check for an error
-            if sympy_expr is None:
-                raise ValueError("Invalid expression resulting in None")
-
-            # Get the result
-            result = sympy_expr.evalf()
-
-            # Return the value
-            getcontext().prec = 64
-            decimal_result = Decimal(str(result))
-            return decimal_result.quantize(Decimal('1.0000')).normalize()
-        except (SympifyError, InvalidOperation, ValueError) as error:
-            raise ValueError(f"Invalid expression or calculation error: {error}")
-
     def generate_explanation(self):
         """Generate an explanation for the evaluated expression."""
         # Convert AST to ExpressionTree
-        tree = self.ast_to_expression_tree(self.ast)
+        tree = self.build_expression_tree()
 
-        # Generate explanation
-        explanation_generator = ExpressionExplanationGenerator(tree.root)
+        # Generate explanation (exact when the answer is)
+        explanation_generator = ExpressionExplanationGenerator(tree.root, exact=self.evaluator == "exact")
         explanation_text, result = explanation_generator.generate_explanation(0)
 
         return explanation_text
@@ -131,12 +138,16 @@ class InfixExpressionCalculatorInstruction(InstructionEmitter):
         while the real steps (plain text) and final answer are in <answer>.
         """
         # 1) Convert AST -> ExpressionTree
-        tree = self.ast_to_expression_tree(self.ast)
+        tree = self.build_expression_tree()
 
-        # 2) Run the PlaceholderExpressionExplanationGenerator
-        generator = PlaceholderExpressionExplanationGenerator(tree.root)
+        # 2) Run the PlaceholderExpressionExplanationGenerator, with exact values when the answer is exact
+        exact = self.evaluator == "exact"
+        generator = PlaceholderExpressionExplanationGenerator(tree.root, exact=exact)
         explanation_data = generator.generate_explanation(missing_element=0)
 
+        # exact values are only rounded here, when they are output
+        render = render_fraction if exact else (lambda value: value)
+
         placeholder_steps = explanation_data["placeholder_steps"]
         real_steps = explanation_data["real_steps"]
         placeholder_map = explanation_data["placeholder_map"]
@@ -154,18 +165,18 @@ class InfixExpressionCalculatorInstruction(InstructionEmitter):
             lines.append("    <placeholder_map_after_step>")
             snapshot = snapshots[i]
             for ph, val in snapshot.items():
-                lines.append(f"      <placeholder name=\"{ph}\">{val}</placeholder>")
+                lines.append(f"      <placeholder name=\"{ph}\">{render(val)}</placeholder>")
             lines.append("    </placeholder_map_after_step>")
             lines.append("  </step>")
 
         # Final placeholder map
         lines.append("  <final_placeholder_map>")
         for ph, val in placeholder_map.items():
-            lines.append(f"    <placeholder name=\"{ph}\">{val}</placeholder>")
+            lines.append(f"    <placeholder name=\"{ph}\">{render(val)}</placeholder>")
         lines.append("  </final_placeholder_map>")
 
         # Final result as part of verifier_answer
-        lines.append(f"  <final_result>{final_value}</final_result>")
+        lines.append(f"  <final_result>{render(final_value)}</final_result>")
         lines.append("</verifier_answer>")
 
         # === Plain-text answer with the final numeric result
@@ -173,12 +184,21 @@ class InfixExpressionCalculatorInstruction(InstructionEmitter):
         for step_text in real_steps:
             lines.append(step_text)
         # Append the final numeric result at the end
-        lines.append(f"Final Answer: {final_value}")
+        lines.append(f"Final Answer: {render(final_value)}")
         lines.append("</answer>")
 
         return "\n".join(lines)
 
 
+    def build_expression_tree(self) -> ExpressionTree:
+        """Converts the current AST to an ExpressionTree, from the nodes when available."""
+        if self.ast_node is None:
+            return self.ast_to_expression_tree(self.ast)
+
+        expression_tree = ExpressionTree()
+        expression_tree.root = expression_tree_builder.visit(self.ast_node)
+        return expression_tree
+
     def ast_to_expression_tree(self, ast_node) -> ExpressionTree:
         """Converts an AST to an ExpressionTree."""
         if not ast_node:
@@ -195,12 +215,8 @@ class InfixExpressionCalculatorInstruction(InstructionEmitter):
 
             # Handle unary expressions (e.g. -5) if your parser produces them
             elif node.get("type") == "UnaryExpression":
-                # Typically, you’ll have node["operator"] and node["argument"]
-                return ExpressionNode(
-                    value=node["operator"]["value"],  # e.g. '-'
-                    left=build_expression_node(node["operand"]),
-                    right=None
-                )
+                # e.g. '-', as a negative literal or (0 - operand)
+                return unary_expression_node(node["operator"]["value"], build_expression_node(node["operand"]))
 
             # Handle simple literals
             elif node.get("type") == "Literal":
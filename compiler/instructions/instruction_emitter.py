@@ -1,17 +1,30 @@
+import asyncio
+import copy
 import os
 from abc import ABC, abstractmethod
 from decimal import Decimal
-from typing import Any, Dict, List
-from jinja2 import Environment, FileSystemLoader
-from langchain_ollama.llms import OllamaLLM
-from langchain_core.output_parsers import StrOutputParser
-from langchain.prompts import PromptTemplate
+from typing import Any, Dict, List, Optional
 
 from compiler.instructions.output_emitters.json_emitter import emit_json
 from compiler.instructions.output_emitters.jsonl_emitter import emit_jsonl
 from compiler.instructions.output_emitters.chat_emitter import emit_chat
 from compiler.instructions.output_emitters.llama2_emitter import emit_llama2
 from compiler.instructions.output_emitters.qa_emitter import emit_qa
+from compiler.ast.ast_node import ASTNode
+from compiler.ast.expression_printer import needs_parentheses, print_expression
+from compiler.evaluator.evaluator import DEFAULT_BACKEND, EVALUATOR_BACKENDS, evaluate
+from compiler.instructions.llm_registry import llm_chain, llm_client
+from compiler.instructions.llm_response_cache import get_llm_response_cache
+from compiler.parser.arithmetic_expression import ast_to_dict
+
+# the output formats an instruction record can be rendered in
+OUTPUT_EMITTERS = {
+    "json": emit_json,
+    "jsonl": emit_jsonl,
+    "chat": emit_chat,
+    "llama2": emit_llama2,
+    "qa": emit_qa,
+}
 
 class IInstructionEmitter(ABC):
     @abstractmethod
@@ -19,20 +32,119 @@ class IInstructionEmitter(ABC):
         pass
 
 class InstructionEmitter(IInstructionEmitter):
-    def __init__(self, ast: Dict[str, Any] = None, tokens: List[Any] = None, llm: str = None):
+    # the attributes the instruction record is built from, setting any of them drops the cached records
+    INSTRUCTION_INPUTS = frozenset({"ast", "ast_node", "tokens", "llm", "evaluator"})
+
+    def __init__(self, ast: Dict[str, Any] = None, tokens: List[Any] = None, llm: str = None, ast_node: ASTNode = None,
+                 evaluator: str = DEFAULT_BACKEND):
+        # The AST can also be given as nodes, the dict form is then built once here
+        if isinstance(ast, ASTNode):
+            ast_node = ast
+            ast = ast_to_dict(ast)
+
         self.ast = ast
+        self.ast_node = ast_node  # the nodes behind the dict, if known, so the visitors can walk them directly
         self.tokens = tokens or []
         self.expression = ""  # Ensure this is set
 
-        # Set up the LLM client using LangChain
-        if llm:
-            self.llm = OllamaLLM(model=llm)
-        else:
-            self.llm = None
+        # The backend used to evaluate the expression (see EVALUATOR_BACKENDS)
+        if evaluator not in EVALUATOR_BACKENDS:
+            raise ValueError(f"Unknown evaluator backend: {evaluator}, expected one of {', '.join(EVALUATOR_BACKENDS)}")
+        self.evaluator = evaluator
+
+        # Set up the LLM client using LangChain, shared with every instruction using the same model
+        self.llm = llm_client(llm) if llm else None
+
+    def __setattr__(self, name: str, value: Any):
+        # a new input means a new instruction record
+        if name in self.INSTRUCTION_INPUTS:
+            self.__dict__["_instructions"] = {}
+        # the nodes behind the old dict would be used in place of the new one, so set ast_node after ast to keep them
+        if name == "ast":
+            self.__dict__["ast_node"] = None
+        super().__setattr__(name, value)
 
     def emit_instruction(self, step_by_step_template_name = "math_stepbystep_template.jinja") -> Dict[str, Any]:
+        """
+        The instruction record, built once per template and reused by every output format until one of the
+        INSTRUCTION_INPUTS is set, so the expression is only evaluated and the LLM only called once per sample.
+        """
+        instruction = self.cached_instruction(step_by_step_template_name)
+        if instruction is None:
+            instruction = self.cache_instruction(step_by_step_template_name, self.build_instruction(step_by_step_template_name))
+
+        # a deep copy, so changes made by the caller (also to the nested ast and tokens) don't reach the other formats
+        return copy.deepcopy(instruction)
+
+    def cached_instruction(self, step_by_step_template_name = "math_stepbystep_template.jinja") -> Optional[Dict[str, Any]]:
+        """The instruction record built for the template, or None if there isn't one yet (the record itself, not a copy)."""
+        return self._instructions.get(step_by_step_template_name)
+
+    def cache_instruction(self, step_by_step_template_name: str, instruction: Dict[str, Any]) -> Dict[str, Any]:
+        """Keep an instruction record built for the template (e.g. by a batch), so the emit_* methods reuse it."""
+        self._instructions[step_by_step_template_name] = instruction
+        return instruction
+
+    def emit(self, formats: List[str], step_by_step_template_name = "math_stepbystep_template.jinja") -> Dict[str, str]:
+        """Render the instruction record in each of the formats (see OUTPUT_EMITTERS), keyed by format."""
+        unknown = [output_format for output_format in formats if output_format not in OUTPUT_EMITTERS]
+        if unknown:
+            raise ValueError(f"Unknown output format: {', '.join(unknown)}, expected one of {', '.join(OUTPUT_EMITTERS)}")
+
+        instruction = self.emit_instruction(step_by_step_template_name)
+        return {output_format: OUTPUT_EMITTERS[output_format](instruction) for output_format in formats}
+
+    async def aemit_instruction(self, step_by_step_template_name = "math_stepbystep_template.jinja") -> Dict[str, Any]:
+        """
+        emit_instruction for asyncio, making the LLM calls with chain.ainvoke so many instructions can wait on the LLM at once.
+        The record goes into the same per-template cache, so the emit_* methods reuse it afterwards.
+        """
+        instruction = self.cached_instruction(step_by_step_template_name)
+        if instruction is None:
+            instruction = self.cache_instruction(step_by_step_template_name, await self.abuild_instruction(step_by_step_template_name))
+
+        return copy.deepcopy(instruction)
+
+    def build_instruction(self, step_by_step_template_name = "math_stepbystep_template.jinja") -> Dict[str, Any]:
+        """Build the instruction record: evaluate the expression, explain it and make any LLM calls."""
+        instruction = self.prepare_instruction()
+
+        # Generate LLM responses only if an LLM is provided
+        if self.llm:
+            question, answer = instruction["instruction"], instruction["result"]
+            instruction["llm_pretty_result"] = self.get_pretty_result(question, answer)
+            instruction["llm_step_by_step_result"] = self.get_step_by_step_explanation(question, answer, instruction["explanation"], step_by_step_template_name)
+
+        return instruction
+
+    async def abuild_instruction(self, step_by_step_template_name = "math_stepbystep_template.jinja") -> Dict[str, Any]:
+        """build_instruction for asyncio, with both LLM calls made at once."""
+        instruction = self.prepare_instruction()
+
+        if self.llm:
+            question, answer = instruction["instruction"], instruction["result"]
+            instruction["llm_pretty_result"], instruction["llm_step_by_step_result"] = await asyncio.gather(
+                self.aget_pretty_result(question, answer),
+                self.aget_step_by_step_explanation(question, answer, instruction["explanation"], step_by_step_template_name),
+            )
+
+        return instruction
+
+    def llm_prompts(self, instruction: Dict[str, Any], step_by_step_template_name = "math_stepbystep_template.jinja") -> Dict[str, str]:
+        """The prompts for the LLM responses of a prepared instruction record, keyed by the field each response goes in."""
+        question, answer = instruction["instruction"], instruction["result"]
+        return {
+            "llm_pretty_result": self.pretty_result_prompt(question, answer),
+            "llm_step_by_step_result": self.step_by_step_prompt(question, answer, instruction["explanation"], step_by_step_template_name),
+        }
+
+    def prepare_instruction(self) -> Dict[str, Any]:
+        """The instruction record without the LLM responses, which are left as None."""
         # Extract the expression from the ast
-        self.expression = self.extract_expression_from_ast(self.ast)
+        if self.ast_node is not None:
+            self.expression = print_expression(self.ast_node)
+        else:
+            self.expression = self.extract_expression_from_ast(self.ast)
 
         # Simplify the tokens
         simplified_tokens = self.simplify_tokens(self.tokens)
@@ -47,13 +159,6 @@ class InstructionEmitter(IInstructionEmitter):
         #explanation = self.generate_explanation()
         explanation = self.generate_placeholder_explanation()
 
-        # Generate LLM responses only if an LLM is provided
-        if self.llm:
-            pretty_result = self.get_pretty_result(question, answer)
-            step_by_step_result = self.get_step_by_step_explanation(question, answer, explanation, step_by_step_template_name)
-        else:
-            pretty_result = step_by_step_result = None
-
         # Build the final instruction dict
         instruction = {
             "instruction": question,
@@ -62,12 +167,11 @@ class InstructionEmitter(IInstructionEmitter):
             "ast": self.ast,
             "result": answer,
             "explanation": explanation,
-            "llm_pretty_result": pretty_result,
-            "llm_step_by_step_result": step_by_step_result
+            "llm_pretty_result": None,
+            "llm_step_by_step_result": None
         }
 
         return instruction
-    
 
     def simplify_tokens(self, tokens: List[Any]) -> List[Dict[str, Any]]:
         """Converts tokens into a simplified representation."""
@@ -75,23 +179,23 @@ class InstructionEmitter(IInstructionEmitter):
 
     def emit_json(self):
         """Emit JSON."""
-        return emit_json(self.emit_instruction())
+        return self.emit(["json"])["json"]
 
     def emit_jsonl(self):
         """Emit JSON Lines."""
-        return emit_jsonl(self.emit_instruction())
+        return self.emit(["jsonl"])["jsonl"]
     
     def emit_chat(self, step_by_step_template_name = "math_stepbystep_template.jinja"):
         """Emit chat format."""
-        return emit_chat(self.emit_instruction(step_by_step_template_name))
+        return self.emit(["chat"], step_by_step_template_name)["chat"]
 
     def emit_llama2(self):
         """Emit llama2 format."""
-        return emit_llama2(self.emit_instruction())
+        return self.emit(["llama2"])["llama2"]
 
     def emit_qa(self):
         """Emit Q&A format."""
-        return emit_qa(self.emit_instruction())
+        return self.emit(["qa"])["qa"]
 
     def extract_expression_from_ast(self, node: Dict[str, Any]) -> str:
         """
@@ -107,8 +211,11 @@ class InstructionEmitter(IInstructionEmitter):
         if node_type == "UnaryExpression":
             # e.g. operator = '-'
             op = node.get("operator", {}).get("value", "")
-            operand_str = self.extract_expression_from_ast(node.get("operand"))
-            # Typically: '-(3)' or just '-3'; choose your style
+            operand_node = node.get("operand")
+            operand_str = self.extract_expression_from_ast(operand_node)
+            # A binary operand is always grouped, e.g. -(3 + 4)
+            if isinstance(operand_node, dict) and operand_node.get("type") == "BinaryExpression":
+                operand_str = f"({operand_str})"
             return f"{op}{operand_str}"
 
         # 2. Handle binary expression (left, operator, right)
@@ -122,7 +229,7 @@ class InstructionEmitter(IInstructionEmitter):
 
             # Determine if parentheses are needed
             left_needs_paren = self._needs_parentheses(left_node, op)
-            right_needs_paren = self._needs_parentheses(right_node, op)
+            right_needs_paren = self._needs_parentheses(right_node, op, is_right=True)
 
             if left_needs_paren:
                 left_expr = f"({left_expr})"
@@ -142,8 +249,8 @@ class InstructionEmitter(IInstructionEmitter):
         # Fallback if no recognised node type
         return ""
 
-    def _needs_parentheses(self, sub_ast: Dict[str, Any], parent_op: str) -> bool:
-        """Determines if the sub-expression needs parentheses based on the parent operator."""
+    def _needs_parentheses(self, sub_ast: Dict[str, Any], parent_op: str, is_right: bool = False) -> bool:
+        """Determines if the sub-expression needs parentheses based on the parent operator, and which side it is on."""
         if not sub_ast or not isinstance(sub_ast, dict):
             return False
         
@@ -155,15 +262,13 @@ class InstructionEmitter(IInstructionEmitter):
         if "operator" not in sub_ast:
             return False
 
-        child_op = sub_ast["operator"]["value"]
-        # Precedence rules
-        precedence = {
-            '+': 1, '-': 1,
-            '*': 2, '/': 2,
-            '^': 3
-        }
+        return needs_parentheses(sub_ast["operator"]["value"], parent_op, is_right)
 
-        return precedence.get(child_op, 0) < precedence.get(parent_op, 0)
+    def safe_eval(self, expression: str) -> Decimal:
+        """Evaluates the expression with the selected backend, raising ValueError if it can't be evaluated."""
+        # the native backend walks the AST directly, when it is the AST of the expression
+        ast_node = self.ast_node if expression == self.expression else None
+        return evaluate(expression, self.evaluator, ast_node)
 
     def evaluate_expression(self) -> str:
         """Evaluates the expression and returns the result as a string."""
@@ -175,16 +280,34 @@ class InstructionEmitter(IInstructionEmitter):
 
     def get_pretty_result(self, question, answer):
         """Generate a natural language response using the question and answer."""
+        return self.get_llm_response(self.pretty_result_prompt(question, answer))
+
+    async def aget_pretty_result(self, question, answer):
+        """get_pretty_result for asyncio."""
+        return await self.aget_llm_response(self.pretty_result_prompt(question, answer))
+
+    def pretty_result_prompt(self, question, answer) -> str:
+        """The prompt asking the LLM for a readable version of the answer."""
         response_template = """For the question "{question}" and it's associated expression "{expression}", the result is "{answer}".  Now create a highly readable version of the answer, keep it simple, not LATEX.  Just provide the answer response, no premable, do not change the values for the question or expression."""
 
-        # call the llm
-        return self.get_llm_response(response_template.format(expression=self.expression, answer=answer, question=question))
+        return response_template.format(expression=self.expression, answer=answer, question=question)
 
     def get_step_by_step_explanation(self, question, answer, explanation, template_name = "math_stepbystep_template.jinja") -> str:
         """Generate a step-by-step explanation using the Jinja template."""
+        return self.get_llm_response(self.step_by_step_prompt(question, answer, explanation, template_name))
+
+    async def aget_step_by_step_explanation(self, question, answer, explanation, template_name = "math_stepbystep_template.jinja") -> str:
+        """get_step_by_step_explanation for asyncio."""
+        return await self.aget_llm_response(self.step_by_step_prompt(question, answer, explanation, template_name))
+
+    def step_by_step_prompt(self, question, answer, explanation, template_name = "math_stepbystep_template.jinja") -> str:
+        """Render the step-by-step prompt from the Jinja template."""
         #template_name = "math_stepbystep_reflection_template.jinja"
         template_name = "math_stepbystep_template.jinja"
 
+        # jinja2 is only needed for the LLM prompts, so it's imported on first use
+        from jinja2 import Environment, FileSystemLoader
+
         # Locate the folder containing your template files
         templates_dir = os.path.join(os.path.dirname(__file__), 'prompt_templates')
 
@@ -195,28 +318,59 @@ class InstructionEmitter(IInstructionEmitter):
         template = env.get_template(template_name)
 
         # Render the template, injecting your variables
-        rendered_output = template.render(
+        return template.render(
             question=question,
             expression=self.expression,
             answer=answer,
             explanation=explanation
         )
 
-        # If you still wish to pass the rendered output to your LLM, do so here
-        return self.get_llm_response(rendered_output)
-
-
     def get_llm_response(self, input_text: str) -> str:
         """Get a response from the LLM."""
         if self.llm:
             try:
-                prompt = PromptTemplate(input_variables=["input_text"], template="{input_text}")
-                chain = prompt | self.llm | StrOutputParser()
-                response = chain.invoke({"input_text": input_text})
+                response = self.invoke_llm_chain("{input_text}", {"input_text": input_text})
                 return response
             except Exception as e:
                 return f"Error generating response from LLM: {e}"
         else:
             return input_text  # Fallback to the raw text if no LLM is available
-        
-    
\ No newline at end of file
+
+    async def aget_llm_response(self, input_text: str) -> str:
+        """get_llm_response for asyncio, awaiting the LLM with chain.ainvoke."""
+        if self.llm:
+            try:
+                return await self.ainvoke_llm_chain("{input_text}", {"input_text": input_text})
+            except Exception as e:
+                return f"Error generating response from LLM: {e}"
+        else:
+            return input_text
+
+    def invoke_llm_chain(self, template: str, inputs: Dict[str, str]) -> str:
+        """
+        Run the LLM on the prompt template filled in with the inputs, answering from the response cache
+        (see set_llm_response_cache) when the LLM has already answered the same rendered prompt.
+        """
+        cache = get_llm_response_cache()
+        prompt = template.format(**inputs)
+        response = cache.get(self.llm, prompt) if cache is not None else None
+        if response is None:
+            response = llm_chain(self.llm, template, list(inputs)).invoke(inputs)
+            if cache is not None:
+                cache.put(self.llm, prompt, response)
+        return response
+
+    async def ainvoke_llm_chain(self, template: str, inputs: Dict[str, str]) -> str:
+        """invoke_llm_chain for asyncio, the response cache (sqlite) is used from a thread so the event loop isn't blocked."""
+        cache = get_llm_response_cache()
+        prompt = template.format(**inputs)
+        response = await asyncio.to_thread(cache.get, self.llm, prompt) if cache is not None else None
+        if response is None:
+            response = await llm_chain(self.llm, template, list(inputs)).ainvoke(inputs)
+            if cache is not None:
+                await asyncio.to_thread(cache.put, self.llm, prompt, response)
+        return response
+
+    def llm_response_chain(self):
+        """The chain passing a prompt straight to the LLM and returning its text."""
+        return llm_chain(self.llm, "{input_text}", ["input_text"])
@@ -0,0 +1,48 @@
+import threading
+from typing import Any, Dict, Sequence
+from compiler.lru_cache import LRUCache
+
+# how many chains are kept, the least recently used are dropped (and rebuilt if needed again)
+CHAIN_CACHE_SIZE = 64
+
+# LLM clients by model name, and chains by (client, template, input variables), shared by every instruction
+# in the process, so the generator scripts set up each client and chain once per run rather than per sample.
+# The chains are bounded, as each keeps its LLM alive, and any LLM object can be given (e.g. stand-ins per instruction)
+_clients: Dict[str, Any] = {}
+_chains = LRUCache(maxsize=CHAIN_CACHE_SIZE)
+_lock = threading.Lock()
+
+def llm_client(model: str) -> Any:
+    """The Ollama client for the model, created on first use (LangChain is only imported then)."""
+    with _lock:
+        client = _clients.get(model)
+        if client is None:
+            from langchain_ollama.llms import OllamaLLM
+            client = _clients[model] = OllamaLLM(model=model)
+        return client
+
+def llm_chain(llm: Any, template: str, input_variables: Sequence[str]) -> Any:
+    """
+    The chain prompt | llm | StrOutputParser() for the prompt template, built once per LLM and template.
+
+    The LLM is any LangChain runnable (normally an llm_client), keyed by identity, as clients aren't hashable.
+    Only the CHAIN_CACHE_SIZE most recently used chains are kept.
+    """
+    key = (id(llm), template, tuple(input_variables))
+    with _lock:
+        entry = _chains.get(key)
+        # the entry keeps the LLM alive, so its id can't be reused by another object
+        if entry is None:
+            from langchain_core.output_parsers import StrOutputParser
+            from langchain.prompts import PromptTemplate
+
+            prompt = PromptTemplate(input_variables=list(input_variables), template=template)
+            entry = (llm, prompt | llm | StrOutputParser())
+            _chains.put(key, entry)
+        return entry[1]
+
+def clear_llm_registry():
+    """Drop the shared clients and chains (e.g. after changing the Ollama settings)."""
+    with _lock:
+        _clients.clear()
+        _chains.clear()
@@ -0,0 +1,175 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+# default limits of the cache, the least recently used responses are evicted past either
+DEFAULT_MAX_ENTRIES = 100000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# eviction goes down to this fraction of the limits, so it only runs once every many puts rather than on each one
+EVICTION_TARGET = 0.9
+
+def model_name(llm: Any) -> Optional[str]:
+    """The model name of an LLM client (e.g. OllamaLLM.model), or None for LLMs without one, which aren't cached."""
+    return getattr(llm, "model", None)
+
+def response_key(model: str, prompt: str) -> str:
+    """The cache key of a response, a hash of the model name and the rendered prompt."""
+    return hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
+
+class LLMResponseCache:
+    """
+    LLM responses kept in an SQLite file, keyed by model name and rendered prompt, so reruns of a stage
+    (and incremental dataset builds) only call the LLM for new prompts.
+
+    The cache holds at most max_entries responses and max_bytes of response text (None for no limit),
+    evicting the least recently used past either. It can be shared by threads, and by processes through the file.
+
+    The calls are synchronous, so async code runs them in a thread (e.g. with asyncio.to_thread).
+    """
+
+    def __init__(self, path: str, max_entries: Optional[int] = DEFAULT_MAX_ENTRIES, max_bytes: Optional[int] = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        # the folder of the file may not exist yet (e.g. output/ in a fresh checkout)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, model TEXT NOT NULL, response TEXT NOT NULL, size INTEGER NOT NULL, last_used INTEGER NOT NULL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+
+        # running totals of the responses and their bytes, so puts don't scan the table to check the limits
+        self._count, self._bytes = self._totals()
+
+    @classmethod
+    def from_config(cls, config: dict) -> Optional['LLMResponseCache']:
+        """Open the cache of a config section, e.g. {"path": "output/llm_cache.sqlite", "max_entries": 100000}, None without a path."""
+        config = config or {}
+        if not config.get("path"):
+            return None
+        return cls(config["path"], config.get("max_entries", DEFAULT_MAX_ENTRIES), config.get("max_bytes", DEFAULT_MAX_BYTES))
+
+    def get(self, llm: Any, prompt: str) -> Optional[str]:
+        """The cached response of the LLM to the prompt, marking it as most recently used, or None."""
+        model = model_name(llm)
+        if model is None:
+            return None
+
+        key = response_key(model, prompt)
+        with self._lock, self._connection:
+            row = self._connection.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time_ns(), key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, llm: Any, prompt: str, response: str):
+        """Cache the response of the LLM to the prompt, evicting the least recently used responses if over the limits."""
+        model = model_name(llm)
+        if model is None:
+            return
+
+        key = response_key(model, prompt)
+        size = len(response.encode("utf-8"))
+        with self._lock, self._connection:
+            # a response replaced for the same prompt no longer counts
+            row = self._connection.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._count -= 1
+                self._bytes -= row[0]
+
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, model, response, size, time.time_ns())
+            )
+            self._count += 1
+            self._bytes += size
+
+            if self._over_limits():
+                self._evict()
+
+    def _totals(self):
+        return self._connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+
+    def _over_limits(self) -> bool:
+        return ((self.max_entries is not None and self._count > self.max_entries)
+                or (self.max_bytes is not None and self._bytes > self.max_bytes))
+
+    def _evict(self):
+        """Delete the least recently used responses, down to EVICTION_TARGET of max_entries and of max_bytes."""
+        if self.max_entries is not None:
+            # keep the most recent responses, everything used before the oldest of them goes
+            keep = int(self.max_entries * EVICTION_TARGET)
+            self._connection.execute(
+                "DELETE FROM responses WHERE last_used < (SELECT last_used FROM responses ORDER BY last_used DESC LIMIT 1 OFFSET ?)",
+                (max(keep - 1, 0),)
+            )
+
+        if self.max_bytes is not None:
+            # the most recent responses that fit in the target, by the running total of their sizes newest first
+            self._connection.execute(
+                "DELETE FROM responses WHERE last_used <= (SELECT last_used FROM ("
+                "SELECT last_used, SUM(size) OVER (ORDER BY last_used DESC) AS kept FROM responses"
+                ") WHERE kept > ? ORDER BY last_used DESC LIMIT 1)",
+                (int(self.max_bytes * EVICTION_TARGET),)
+            )
+
+        # recount, as other processes may have changed the file too
+        self._count, self._bytes = self._totals()
+
+    def clear(self):
+        """Remove all responses and reset the counters."""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses")
+            self._count = self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def close(self):
+        self._connection.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """The cache counters, for sizing the cache."""
+        with self._lock:
+            size, total_bytes = self._totals()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": size,
+            "bytes": total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes
+        }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+# the cache the instructions consult before calling the LLM, None to always call it
+_response_cache: Optional[LLMResponseCache] = None
+
+def set_llm_response_cache(cache: Optional[LLMResponseCache]):
+    """Use the cache for the LLM responses of every instruction in the process (None to stop caching)."""
+    global _response_cache
+    _response_cache = cache
+
+def get_llm_response_cache() -> Optional[LLMResponseCache]:
+    return _response_cache
@@ -1,19 +1,16 @@
 import json
 import random
-from decimal import Decimal, InvalidOperation, getcontext
-from sympy import sympify, SympifyError
-from langchain_core.output_parsers import StrOutputParser
-from langchain.prompts import PromptTemplate
+from compiler.evaluator.evaluator import DEFAULT_BACKEND
 from compiler.instructions.instruction_emitter import InstructionEmitter
 
 class MATHProblemInstruction(InstructionEmitter):
-    def __init__(self, ast: dict, tokens: list = None, llm: str = None):
+    def __init__(self, ast: dict, tokens: list = None, llm: str = None, ast_node=None, evaluator: str = DEFAULT_BACKEND):
         # Check if we're parsing an ast or tokens
         if isinstance(ast, str):
             ast = json.loads(ast)
 
         # Call the parent constructor
-        super().__init__(ast, tokens or [], llm)
+        super().__init__(ast, tokens or [], llm, ast_node=ast_node, evaluator=evaluator)
 
         # Set the tokens
         self.tokens = tokens or []
@@ -52,29 +49,12 @@ class MATHProblemInstruction(InstructionEmitter):
         Problem: """
 
         try:
-            prompt = PromptTemplate(input_variables=["expression", "question"], template=prompt_template)
-            
-            # Assuming that the llm provided is a valid object handled outside of this code snippet
-            chain = prompt | self.llm | StrOutputParser()
-
-            response = chain.invoke({"expression": self.expression, "question": question})
+            response = self.invoke_llm_chain(prompt_template, {"expression": self.expression, "question": question})
 
             return response
         except Exception as e:
             return f"Error generating instruction from LLM: {e}"
 
-    def safe_eval(self, expression: str) -> Decimal:
-        try:
-            sympy_expr = sympify(expression)
-            if sympy_expr is None:
-                raise ValueError("Invalid expression resulting in None")
-            result = sympy_expr.evalf()
-            getcontext().prec = 64
-            decimal_result = Decimal(str(result))
-            return decimal_result.quantize(Decimal('1.0000')).normalize()
-        except (SympifyError, InvalidOperation, ValueError) as error:
-            raise ValueError(f"Invalid expression or calculation error: {error}")
-
     def generate_explanation(self):
         return "This explanation details the steps taken to evaluate the expression."
 
@@ -1,12 +1,25 @@
 # token.py
-from typing import Any
+from typing import Any, Union
+from compiler.lexer.token_type import TOKEN_TYPE_CODES, TOKEN_TYPE_NAMES
 
 class Token:
-    def __init__(self, type: str, value: str, position: int):
+    # no per-instance __dict__, a token is created for every lexeme of every sample
+    __slots__ = ('type', 'value', 'position')
+
+    def __init__(self, type: Union[str, int], value: Any, position: int):
+        # accept an integer token type code as well as the type name
+        if isinstance(type, int):
+            type = TOKEN_TYPE_NAMES[type]
+
         self.type = type
         self.value = value
         self.position = position
 
+    @property
+    def code(self) -> int:
+        """The integer code for the token type."""
+        return TOKEN_TYPE_CODES[self.type]
+
     def __eq__(self, other):
         if not isinstance(other, Token):
             return False
@@ -0,0 +1,183 @@
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List
+from compiler.lexer.token import Token
+from compiler.lexer.token_type import TokenType, TOKEN_TYPE_CODES, TOKEN_TYPE_NAMES
+from compiler.lexer.tokenizer import TOKEN_PATTERN, OPERATORS, PUNCTUATIONS, TokenizationError
+
+# separator used to join the expressions into the shared text buffer, it is whitespace so no token spans two expressions
+EXPRESSION_SEPARATOR = '\n'
+
+class TokenBatch:
+    """
+    Columnar tokens for a batch of expressions.
+
+    Rather than a list of Token objects per expression, every token is a row across parallel arrays:
+      - type_codes: the integer token type code (see TOKEN_TYPE_CODES)
+      - starts: the position of the token within its expression (same as Token.position)
+      - lengths: the length of the token text
+
+    The expressions are joined into a single shared text buffer:
+      - text_offsets[i]: where expression i starts in the text buffer (len(batch) + 1 entries)
+      - token_offsets[i]: the row of the first token of expression i (len(batch) + 1 entries)
+
+    The arrays support the buffer protocol, so they can be wrapped by NumPy without copying,
+    e.g. numpy.frombuffer(batch.type_codes, dtype=numpy.uint8).
+    """
+
+    def __init__(self, text: str, text_offsets: array, token_offsets: array, type_codes: array, starts: array, lengths: array):
+        self.text = text
+        self.text_offsets = text_offsets
+        self.token_offsets = token_offsets
+        self.type_codes = type_codes
+        self.starts = starts
+        self.lengths = lengths
+
+    def __len__(self) -> int:
+        # number of expressions
+        return len(self.text_offsets) - 1
+
+    @property
+    def token_count(self) -> int:
+        """Total number of tokens across all expressions."""
+        return len(self.type_codes)
+
+    def expression(self, index: int) -> str:
+        """The source text of an expression."""
+        return self.text[self.text_offsets[index]:self.text_offsets[index + 1] - len(EXPRESSION_SEPARATOR)]
+
+    def token_text(self, row: int, index: int) -> str:
+        """The source text of a token, given its row and the index of its expression."""
+        start = self.text_offsets[index] + self.starts[row]
+        return self.text[start:start + self.lengths[row]]
+
+    def tokens(self, index: int) -> List[Token]:
+        """Materialize the tokens of a single expression as Token objects."""
+        tokens = []
+
+        # loop through the rows for the expression
+        for row in range(self.token_offsets[index], self.token_offsets[index + 1]):
+            code = self.type_codes[row]
+            text = self.token_text(row, index)
+
+            # numbers hold their float value, everything else the source text
+            value = float(text) if code == TOKEN_TYPE_CODES[TokenType.NUMBER] else text
+            tokens.append(Token(code, value, self.starts[row]))
+
+        # return the tokens
+        return tokens
+
+    def expression_token_counts(self) -> array:
+        """The number of tokens in each expression."""
+        offsets = self.token_offsets
+        return array('l', (offsets[i + 1] - offsets[i] for i in range(len(self))))
+
+    def invalid_expressions(self) -> List[int]:
+        """The indexes of the expressions containing UNKNOWN tokens (only produced in recovery mode)."""
+        unknown_code = TOKEN_TYPE_CODES[TokenType.UNKNOWN]
+        offsets = self.token_offsets
+
+        # no unknown tokens at all, so skip the per-expression scan
+        if unknown_code not in self.type_codes:
+            return []
+
+        return [i for i in range(len(self)) if unknown_code in self.type_codes[offsets[i]:offsets[i + 1]]]
+
+    def type_counts(self) -> Dict[str, int]:
+        """Count the tokens of each type across the batch, keyed by token type name."""
+        return {TOKEN_TYPE_NAMES[code]: count for code, count in Counter(self.type_codes).items()}
+
+def tokenize_batch(expressions: Iterable[str], recover: bool = False) -> TokenBatch:
+    """
+    Tokenize many expressions into a single columnar TokenBatch.
+
+    Produces the same tokens as Tokenizer for each expression, without allocating a Token per lexeme.
+    Raises TokenizationError at the first unexpected character, naming the expression it was found in,
+    unless recover is set, in which case each unexpected character becomes an UNKNOWN token row.
+    """
+    # join the expressions into the shared text buffer
+    expressions = list(expressions)
+    text = ''.join(expression + EXPRESSION_SEPARATOR for expression in expressions)
+
+    # expression offsets into the text buffer
+    text_offsets = array('q', [0])
+    for expression in expressions:
+        text_offsets.append(text_offsets[-1] + len(expression) + len(EXPRESSION_SEPARATOR))
+
+    # token columns
+    token_offsets = array('q', [0])
+    type_codes = array('B')
+    starts = array('l')
+    lengths = array('l')
+
+    # local lookups for the hot loop
+    match = TOKEN_PATTERN.match
+    number_code = TOKEN_TYPE_CODES[TokenType.NUMBER]
+    function_code = TOKEN_TYPE_CODES[TokenType.FUNCTION]
+    identifier_code = TOKEN_TYPE_CODES[TokenType.IDENTIFIER]
+    unknown_code = TOKEN_TYPE_CODES[TokenType.UNKNOWN]
+    operator_codes = {op: TOKEN_TYPE_CODES[token_type] for op, token_type in OPERATORS.items()}
+    punctuation_codes = {p: TOKEN_TYPE_CODES[token_type] for p, token_type in PUNCTUATIONS.items()}
+
+    # scan the whole buffer once, tracking which expression we are in
+    index = 0
+    expression_start = 0
+    expression_end = text_offsets[1] if expressions else 0
+    pos = 0
+    length = len(text)
+
+    while pos < length:
+        # close off any expressions we have moved past
+        while pos >= expression_end:
+            token_offsets.append(len(type_codes))
+            index += 1
+            expression_start = expression_end
+            expression_end = text_offsets[index + 1]
+
+        # match the next token (or whitespace) at the current position
+        m = match(text, pos)
+
+        # unexpected character
+        if m is None:
+            if not recover:
+                raise TokenizationError(
+                    f"Unexpected character: {text[pos]} at position {pos - expression_start} in expression {index}",
+                    pos - expression_start,
+                    text[pos]
+                )
+
+            # record it as an unknown token and carry on
+            type_codes.append(unknown_code)
+            starts.append(pos - expression_start)
+            lengths.append(1)
+            pos += 1
+            continue
+
+        kind = m.lastgroup
+        end = m.end()
+
+        if kind != 'WHITESPACE':
+            if kind == 'NUMBER':
+                code = number_code
+            elif kind == 'OPERATOR':
+                code = operator_codes[m.group()]
+            elif kind == 'PUNCTUATION':
+                code = punctuation_codes[m.group()]
+            else:
+                # identifiers followed directly by an opening parenthesis are functions
+                code = function_code if text.startswith('(', end) else identifier_code
+
+            # add the row
+            type_codes.append(code)
+            starts.append(pos - expression_start)
+            lengths.append(end - pos)
+
+        # move past the match
+        pos = end
+
+    # close off the remaining expressions
+    while len(token_offsets) < len(text_offsets):
+        token_offsets.append(len(type_codes))
+
+    # return the batch
+    return TokenBatch(text, text_offsets, token_offsets, type_codes, starts, lengths)
@@ -31,3 +31,9 @@ class TokenType:
     AND = 'AND'          # '&&'
     OR = 'OR'            # '||'
     NOT = 'NOT'          # '!'
+
+# token type names in declaration order, the position of each name is its integer code
+TOKEN_TYPE_NAMES = tuple(value for name, value in vars(TokenType).items() if not name.startswith('_'))
+
+# integer code for each token type name
+TOKEN_TYPE_CODES = {name: code for code, name in enumerate(TOKEN_TYPE_NAMES)}
@@ -1,19 +1,93 @@
 import re
-from typing import List
+from typing import Iterator, List
 from compiler.lexer.token_type import TokenType  
 from compiler.lexer.token import Token
 
 class TokenizationError(Exception):
-    pass
+    def __init__(self, message: str, position: int = None, character: str = None):
+        super().__init__(message)
+
+        # where the error occurred, if known
+        self.position = position
+        self.character = character
+
+# operator table
+OPERATORS = {
+    '+': TokenType.PLUS,
+    '-': TokenType.MINUS,
+    '*': TokenType.MUL,
+    '/': TokenType.DIV,
+    '^': TokenType.POW,
+    '=': TokenType.EQ,
+    '==': TokenType.EQ,
+    '!=': TokenType.NE,
+    '<>': TokenType.NE,
+    '<=': TokenType.LE,
+    '<': TokenType.LT,
+    '>=': TokenType.GE,
+    '>': TokenType.GT,
+    '&&': TokenType.AND,
+    '||': TokenType.OR,
+    '!': TokenType.NOT
+}
+
+# operators sorted longest first, so '<=' wins over '<' (sorted once, not per token)
+SORTED_OPERATORS = sorted(OPERATORS.items(), key=lambda x: -len(x[0]))
+
+# punctuation table
+PUNCTUATIONS = {
+    ',': TokenType.COMMA,
+    ':': TokenType.COLON,
+    ';': TokenType.SEMI,
+    '(': TokenType.LPAREN,
+    ')': TokenType.RPAREN,
+    '$': TokenType.DOLLAR,
+    '%': TokenType.PERCENT
+}
+
+# single master pattern used by the regex engine, one named group per token class
+# (the alternation order mirrors the order the scanning engine tries its token methods)
+TOKEN_PATTERN = re.compile(
+    r'(?P<WHITESPACE>\s+)'
+    r'|(?P<NUMBER>\d+(?:\.\d*)?)'
+    r'|(?P<OPERATOR>' + '|'.join(re.escape(op) for op, _ in SORTED_OPERATORS) + r')'
+    r'|(?P<PUNCTUATION>[' + re.escape(''.join(PUNCTUATIONS)) + r'])'
+    r'|(?P<IDENTIFIER>[A-Za-z_][A-Za-z0-9_]*)'
+)
 
 class Tokenizer:
-    def __init__(self, input_string: str):
+    def __init__(self, input_string: str, use_regex: bool = False, recover: bool = False):
         self.input_string = input_string
         self.current_pos = 0
         self.length = len(input_string)
         self.tokens = []  # This list will store tokens as they are created
 
+        # use the single-pass regex engine rather than the per-method scanner
+        self.use_regex = use_regex
+
+        # in recovery mode unexpected characters become UNKNOWN tokens, and the errors are collected here
+        self.recover = recover
+        self.diagnostics: List[TokenizationError] = []
+
     def tokenize(self) -> List[Token]:
+        # loop through the tokens, adding each one to the list
+        for token in self.iter_tokens():
+            self.tokens.append(token)
+
+        # return tokens
+        return self.tokens
+
+    def iter_tokens(self) -> Iterator[Token]:
+        """Lazily yield tokens one at a time, without building the token list."""
+        # use the regex engine if requested
+        if self.use_regex:
+            return self.iter_tokens_regex()
+
+        # otherwise use the scanning engine
+        return self.iter_tokens_scan()
+
+    def iter_tokens_scan(self) -> Iterator[Token]:
+        """Yield tokens by trying each token method in turn at the current position."""
         # loop to the end
         while self.current_pos < self.length:
             # get next token
@@ -21,8 +95,8 @@ class Tokenizer:
 
             # check we got a token
             if token:
-                # we got a tokem, so add it
-                self.tokens.append(token)
+                # we got a tokem, so yield it
+                yield token
             else:
                 # skip whitespace
                 self.skip_whitespace()
@@ -33,10 +107,62 @@ class Tokenizer:
                     char = self.input_string[self.current_pos]
 
                     # unexpected character
-                    raise TokenizationError(f"Unexpected character: {char} at position {self.current_pos}")
-        
-        # return tokens
-        return self.tokens
+                    yield self.unexpected_character(char, self.current_pos)
+                    self.current_pos += 1
+
+    def iter_tokens_regex(self) -> Iterator[Token]:
+        """Yield tokens using the precompiled master pattern, producing the same tokens as iter_tokens_scan()."""
+        # local lookups for the hot loop
+        match = TOKEN_PATTERN.match
+        text = self.input_string
+        length = self.length
+        pos = self.current_pos
+
+        # loop to the end
+        while pos < length:
+            # match the next token (or whitespace) at the current position
+            m = match(text, pos)
+
+            # unexpected character
+            if m is None:
+                self.current_pos = pos
+                yield self.unexpected_character(text[pos], pos)
+                pos = self.current_pos = pos + 1
+                continue
+
+            kind = m.lastgroup
+            value = m.group()
+            end = m.end()
+
+            # move past the match
+            self.current_pos = end
+
+            if kind == 'NUMBER':
+                yield Token(TokenType.NUMBER, float(value), pos)
+            elif kind == 'OPERATOR':
+                yield Token(OPERATORS[value], value, pos)
+            elif kind == 'PUNCTUATION':
+                yield Token(PUNCTUATIONS[value], value, pos)
+            elif kind == 'IDENTIFIER':
+                # identifiers followed directly by an opening parenthesis are functions
+                if text.startswith('(', end):
+                    yield Token(TokenType.FUNCTION, value, pos)
+                else:
+                    yield Token(TokenType.IDENTIFIER, value, pos)
+
+            pos = end
+
+    def unexpected_character(self, char: str, position: int) -> Token:
+        """Raise for an unexpected character, or in recovery mode record it and return an UNKNOWN token."""
+        error = TokenizationError(f"Unexpected character: {char} at position {position}", position, char)
+
+        # not recovering, so stop here
+        if not self.recover:
+            raise error
+
+        # record the error and carry on
+        self.diagnostics.append(error)
+        return Token(TokenType.UNKNOWN, char, position)
 
     def get_next_token(self) -> Token:
         # skip whitespace
@@ -88,28 +214,8 @@ class Tokenizer:
         return None
 
     def get_operator(self) -> Token:
-        # operator list
-        operators = {
-            '+': TokenType.PLUS,
-            '-': TokenType.MINUS,
-            '*': TokenType.MUL,
-            '/': TokenType.DIV,
-            '^': TokenType.POW,
-            '=': TokenType.EQ,
-            '==': TokenType.EQ,
-            '!=': TokenType.NE,
-            '<>': TokenType.NE,
-            '<=': TokenType.LE,
-            '<': TokenType.LT,
-            '>=': TokenType.GE,
-            '>': TokenType.GT,
-            '&&': TokenType.AND,
-            '||': TokenType.OR,
-            '!': TokenType.NOT
-        }
-
-        # loop through the operators
-        for op, token_type in sorted(operators.items(), key=lambda x: -len(x[0])):
+        # loop through the operators (longest first)
+        for op, token_type in SORTED_OPERATORS:
             # we have an operator
             if self.input_string.startswith(op, self.current_pos):
                 # move the position along
@@ -123,19 +229,8 @@ class Tokenizer:
 
 
     def get_punctuation(self) -> Token:
-        # check for punctuation
-        punctuations = {
-            ',': TokenType.COMMA,
-            ':': TokenType.COLON,
-            ';': TokenType.SEMI,
-            '(': TokenType.LPAREN,
-            ')': TokenType.RPAREN,
-            '$': TokenType.DOLLAR,
-            '%': TokenType.PERCENT
-        }
-
         # check if we have puncatuation
-        if self.input_string[self.current_pos] in punctuations:
+        if self.input_string[self.current_pos] in PUNCTUATIONS:
             # set the value
             value = self.input_string[self.current_pos]
 
@@ -143,7 +238,7 @@ class Tokenizer:
             self.current_pos += 1
 
             # return the punctuation
-            return Token(punctuations[value], value, self.current_pos - 1)
+            return Token(PUNCTUATIONS[value], value, self.current_pos - 1)
         
         # no punctuation
         return None
@@ -1,12 +1,12 @@
+from compiler.ast.ast_node import ASTNode
+from compiler.ast.expressions import BinaryExpression, Literal, UnaryExpression
+from compiler.ast.visitor import ASTVisitor
 from compiler.lexer.tokenizer import Tokenizer, TokenizationError
 from compiler.parser.parser import Parser
 from compiler.lexer.tokenizer import Token
+from compiler.lru_cache import LRUCache
 from decimal import Decimal
-import json
-
-from compiler.lexer.tokenizer import Tokenizer, TokenizationError
-from compiler.parser.parser import Parser
-from decimal import Decimal
+from typing import Any, List, NamedTuple, Optional
 import json
 
 class ArithmeticExpression:
@@ -31,6 +31,14 @@ class ArithmeticExpression:
             print(f"Error tokenizing expression: {e}")  # Debug statement
             raise ValueError(f"Error tokenizing expression: {e}")
 
+    def validate(self) -> List[TokenizationError]:
+        """Tokenize the expression in one recovering pass and return every tokenization error found."""
+        tokenizer = Tokenizer(self.expression, recover=True)
+        tokenizer.tokenize()
+
+        # return the errors, empty if the expression is valid
+        return tokenizer.diagnostics
+
     def parse(self):
         """Parse the expression into an AST and store it."""
         try:
@@ -60,23 +68,96 @@ class ArithmeticExpression:
 
     def ast_to_dict(self, ast_node):
         """Recursively convert the AST into a dictionary."""
-        if isinstance(ast_node, list):
-            return [self.ast_to_dict(node) for node in ast_node]
-        elif isinstance(ast_node, dict):
-            return {key: self.ast_to_dict(value) for key, value in ast_node.items()}
-        elif isinstance(ast_node, Decimal):
-            return str(ast_node)  # Convert Decimal to string
-        elif isinstance(ast_node, Token):
-            # Handle Token instances
-            return {
-                "type": ast_node.type,  # Use the token type
-                "value": ast_node.value,
-                "position": ast_node.position
-            }
-        elif hasattr(ast_node, '__dict__'):
-            node_dict = {key: self.ast_to_dict(value) for key, value in ast_node.__dict__.items()}
-            node_dict['type'] = ast_node.__class__.__name__  # Use 'type' instead of '__class__'
-            return node_dict
-        else:
-            return ast_node
+        return ast_to_dict(ast_node)
+
+class ASTDictBuilder(ASTVisitor):
+    """Converts the AST into the dictionary form used in the output (keys in node attribute order)."""
+
+    def visit_BinaryExpression(self, node: BinaryExpression, left, right) -> dict:
+        return {
+            "left": left,
+            "operator": reflective_ast_to_dict(node.operator),
+            "right": right,
+            "type": "BinaryExpression"
+        }
+
+    def visit_UnaryExpression(self, node: UnaryExpression, operand) -> dict:
+        return {
+            "operator": reflective_ast_to_dict(node.operator),
+            "operand": operand,
+            "type": "UnaryExpression"
+        }
+
+    def visit_Literal(self, node: Literal) -> dict:
+        return {"value": reflective_ast_to_dict(node.value), "type": "Literal"}
+
+    def generic_visit(self, node):
+        # anything else is converted by reflection
+        return reflective_ast_to_dict(node)
+
+# the builder holds no per-tree state, so one instance is shared
+ast_dict_builder = ASTDictBuilder()
+
+def ast_to_dict(ast_node):
+    """Convert the AST into a dictionary."""
+    if isinstance(ast_node, (list, dict)):
+        return reflective_ast_to_dict(ast_node)
+    return ast_dict_builder.visit(ast_node)
+
+def reflective_ast_to_dict(ast_node):
+    """Recursively convert any object into a dictionary, using its __dict__."""
+    if isinstance(ast_node, list):
+        return [ast_to_dict(node) for node in ast_node]
+    elif isinstance(ast_node, dict):
+        return {key: ast_to_dict(value) for key, value in ast_node.items()}
+    elif isinstance(ast_node, Decimal):
+        return str(ast_node)  # Convert Decimal to string
+    elif isinstance(ast_node, Token):
+        # Handle Token instances
+        return {
+            "type": ast_node.type,  # Use the token type
+            "value": ast_node.value,
+            "position": ast_node.position
+        }
+    elif hasattr(ast_node, '__dict__'):
+        node_dict = {key: ast_to_dict(value) for key, value in ast_node.__dict__.items()}
+        node_dict['type'] = ast_node.__class__.__name__  # Use 'type' instead of '__class__'
+        return node_dict
+    else:
+        return ast_node
+
+class ParseResult(NamedTuple):
+    """The front end output for an expression."""
+    tokens: List[Token]
+    ast: Optional[ASTNode]
+    ast_dict: Any
+
+# parse results shared across samples, keyed by normalized expression text
+parse_cache = LRUCache(maxsize=4096)
+
+def normalize_expression(expression: str) -> str:
+    """Strip the expression and collapse runs of whitespace to a single space."""
+    return " ".join(expression.split())
+
+def parse_expression_cached(expression: str) -> ParseResult:
+    """
+    Tokenize and parse an expression, returning the tokens, AST and AST dict from the parse cache where possible.
+    The expression is normalized first, so token positions refer to the normalized text.
+    The cached results are shared between callers, and must not be modified.
+    """
+    # check the cache
+    key = normalize_expression(expression)
+    result = parse_cache.get(key)
+
+    if result is None:
+        # run the front end
+        arithmetic_expression = ArithmeticExpression(key)
+        tokens = arithmetic_expression.tokenize()
+        ast = arithmetic_expression.parse()
+        result = ParseResult(tokens, ast, ast_to_dict(ast))
+
+        # cache it
+        parse_cache.put(key, result)
 
+    # return the result
+    return result
@@ -1,54 +1,123 @@
-from decimal import Decimal
-from typing import List, Optional
+from typing import Iterable, Iterator, Optional
 from compiler.ast.ast_node import ASTNode
 from compiler.ast.expressions.binary_expression import BinaryExpression
 from compiler.ast.expressions.literal_expression import Literal
 from compiler.ast.expressions.unary_expression import UnaryExpression
 from compiler.lexer.token_type import TokenType
-from compiler.lexer.tokenizer import Token
+from compiler.lexer.tokenizer import Token, OPERATORS, PUNCTUATIONS
+
+# binary operator precedence, higher binds tighter
+PRECEDENCE = {
+    TokenType.OR: 1,
+    TokenType.AND: 2,
+    TokenType.EQ: 3, TokenType.NE: 3,
+    TokenType.LT: 4, TokenType.LE: 4, TokenType.GT: 4, TokenType.GE: 4,
+    TokenType.PLUS: 5, TokenType.MINUS: 5,
+    TokenType.MUL: 6, TokenType.DIV: 6, TokenType.PERCENT: 6,
+    TokenType.POW: 7,
+}
+
+# binary operators that group to the right, i.e. 2 ^ 3 ^ 2 is 2 ^ (3 ^ 2)
+RIGHT_ASSOCIATIVE = {TokenType.POW}
+
+# prefix operators, applied to the primary that follows them
+PREFIX_OPERATORS = {TokenType.MINUS, TokenType.NOT}
+
+# (precedence, right binding power) for each binary operator, so the parse loop does a single lookup per token
+# the right hand side of an operator takes operators binding tighter than the right binding power
+BINDING_POWERS = {
+    token_type: (precedence, precedence - 1 if token_type in RIGHT_ASSOCIATIVE else precedence)
+    for token_type, precedence in PRECEDENCE.items()
+}
+
+# the same tables keyed by operator symbol, for code working with the operator text (e.g. when printing expressions)
+SYMBOL_PRECEDENCE = {
+    symbol: PRECEDENCE[token_type]
+    for symbol, token_type in {**OPERATORS, **PUNCTUATIONS}.items() if token_type in PRECEDENCE
+}
+RIGHT_ASSOCIATIVE_SYMBOLS = {
+    symbol for symbol, token_type in {**OPERATORS, **PUNCTUATIONS}.items() if token_type in RIGHT_ASSOCIATIVE
+}
 
 class Parser:
-    def __init__(self, tokens: List[Token]):
+    def __init__(self, tokens: Iterable[Token], iterative: bool = False, arena=None):
+        # tokens can be a list, or any iterator (e.g. Tokenizer.iter_tokens()) which is consumed with one-token lookahead
         self.tokens = tokens
+        self.token_stream = iter(tokens)
         self.current_pos = 0
-        self.current_token = self.tokens[self.current_pos] if self.tokens else None
+        self.current_token = next(self.token_stream, None)
+
+        # use the explicit-stack parser rather than recursive descent, for deeply nested expressions
+        self.iterative = iterative
+
+        # the node constructors, when given an ASTArena the nodes are added to it as rows,
+        # and the parse methods return row indexes rather than node objects
+        self.arena = arena
+        if arena is None:
+            self.make_literal = Literal
+            self.make_binary = BinaryExpression
+            self.make_unary = UnaryExpression
+        else:
+            self.make_literal = arena.add_literal
+            self.make_binary = arena.add_binary
+            self.make_unary = arena.add_unary
 
     def advance(self):
         """Advance to the next token in the stream."""
         # move to next token
         self.current_pos += 1
 
-        # check we stil got tokens
-        if self.current_pos < len(self.tokens):
-            # set the current token
-            self.current_token = self.tokens[self.current_pos]
-        else:
-            # no more tokens
-            self.current_token = None
+        # set the current token, or None if there are no more tokens
+        self.current_token = next(self.token_stream, None)
 
     def parse(self) -> Optional[ASTNode]:
         """Parse the tokens to create an AST."""
-        if not self.tokens:
+        if self.current_token is None:
             # no tokens
             return None
         
         # parse the expression
+        return self.parse_next_expression()
+
+    def parse_next_expression(self) -> Optional[ASTNode]:
+        """Parse the next expression using the selected parser mode."""
+        if self.iterative:
+            return self.parse_expression_iterative()
         return self.parse_expression()
 
+    def iter_expressions(self) -> Iterator[Optional[ASTNode]]:
+        """Lazily parse ';'-separated expressions, yielding one AST at a time."""
+        # keep going while we have tokens
+        while self.current_token is not None:
+            # skip empty statements
+            if self.current_token.type == TokenType.SEMI:
+                self.advance()
+                continue
+
+            # parse the expression
+            expression = self.parse_next_expression()
+
+            # each expression must be followed by a separator or the end of the stream
+            if self.current_token is not None:
+                if self.current_token.type != TokenType.SEMI:
+                    raise SyntaxError(f"Unexpected token: {self.current_token}")
+                self.advance()
+
+            # return the expression
+            yield expression
+
     def parse_expression(self, precedence=0) -> Optional[ASTNode]:
         """Parse an expression based on the precedence."""
         # Parse the initial primary expression
         left = self.parse_primary()
 
-        # keep going if we have token, and it's an operator
-        while self.current_token and self.current_token.type in {
-            TokenType.PLUS, TokenType.MINUS, TokenType.MUL, TokenType.DIV, TokenType.POW
-        }:
-            # get the precedence
-            current_precedence = self.get_operator_precedence(self.current_token.type)
+        # keep going while we have a token
+        while self.current_token:
+            # get the binding powers, None if the token isn't a binary operator
+            binding_powers = BINDING_POWERS.get(self.current_token.type)
 
-            # check the precedence
-            if current_precedence <= precedence:
+            # check it's an operator, and the precedence
+            if binding_powers is None or binding_powers[0] <= precedence:
                 break
 
             # get the operator
@@ -58,14 +127,98 @@ class Parser:
             self.advance()
 
             # parse the right hand side of the expression
-            right = self.parse_expression(current_precedence)
+            right = self.parse_expression(binding_powers[1])
 
             # set the left handside
-            left = BinaryExpression(left, operator, right)
+            left = self.make_binary(left, operator, right)
 
         # return the expression
         return left
 
+    def parse_expression_iterative(self) -> Optional[ASTNode]:
+        """
+        Parse an expression using explicit operand/operator stacks rather than recursion.
+        Produces the same tree as parse_expression(), but the nesting depth is not bound by the recursion limit.
+        """
+        # operands, and operators (with their right binding power) waiting to be combined
+        operands = []
+        operators = []
+
+        # one frame per open parenthesis: (unary operators applied to the group, operator stack depth at the group start)
+        frames = []
+
+        make_binary = self.make_binary
+        make_unary = self.make_unary
+
+        def reduce():
+            # combine the top operator with the top two operands
+            operator, _ = operators.pop()
+            right = operands.pop()
+            left = operands.pop()
+            operands.append(make_binary(left, operator, right))
+
+        def apply_unary(unary, operand):
+            # the operator nearest the operand is applied first
+            for operator in reversed(unary):
+                operand = make_unary(operator, operand)
+            return operand
+
+        while True:
+            # collect any prefix operators in front of the primary
+            unary = []
+            while self.current_token and self.current_token.type in PREFIX_OPERATORS:
+                unary.append(self.current_token)
+                self.advance()
+
+            # parse the primary
+            token = self.current_token
+            if token is None:
+                operand = None
+            elif token.type == TokenType.NUMBER:
+                self.advance()
+                operand = self.make_literal(token.value)
+            elif token.type == TokenType.LPAREN:
+                # open a group, and parse its first operand
+                self.advance()
+                frames.append((unary, len(operators)))
+                continue
+            else:
+                raise SyntaxError(f"Unexpected token: {token}")
+
+            operands.append(apply_unary(unary, operand))
+
+            # handle the operators (and closing parentheses) that follow the operand
+            while True:
+                token = self.current_token
+                floor = frames[-1][1] if frames else 0
+                binding_powers = BINDING_POWERS.get(token.type) if token else None
+
+                if binding_powers is not None:
+                    # combine the operators in this group whose right hand side can't take this operator
+                    precedence = binding_powers[0]
+                    while len(operators) > floor and operators[-1][1] >= precedence:
+                        reduce()
+
+                    # push the operator, and parse the next operand
+                    operators.append((token, binding_powers[1]))
+                    self.advance()
+                    break
+
+                # end of the group, combine everything in it
+                while len(operators) > floor:
+                    reduce()
+
+                # end of the expression
+                if not frames:
+                    return operands.pop()
+
+                # close the group
+                if not (token and token.type == TokenType.RPAREN):
+                    raise SyntaxError("Expected ')'")
+                self.advance()
+                unary, _ = frames.pop()
+                operands.append(apply_unary(unary, operands.pop()))
+
     def parse_primary(self) -> Optional[ASTNode]:
         token = self.current_token
 
@@ -75,17 +228,17 @@ class Parser:
         if token.type == TokenType.NUMBER:
             self.advance()
 
-            # return a literal for the number
-            return Literal(Decimal(token.value))
-        elif token.type == TokenType.MINUS:
-            # Handle unary minus as a UnaryExpression
+            # return a literal for the number (converted to a Decimal)
+            return self.make_literal(token.value)
+        elif token.type in PREFIX_OPERATORS:
+            # Handle unary minus (and logical not) as a UnaryExpression
             self.advance()
 
             # parse primary
             operand = self.parse_primary()
 
             # return a unary expression
-            return UnaryExpression(operator=token, operand=operand)
+            return self.make_unary(token, operand)
         elif token.type == TokenType.LPAREN:
             self.advance()
             expr = self.parse_expression()
@@ -98,11 +251,4 @@ class Parser:
 
     def get_operator_precedence(self, operator_type: str) -> int:
         """Return the precedence of the operator."""
-        precedences = {
-            TokenType.PLUS: 5, TokenType.MINUS: 5,
-            TokenType.MUL: 6, TokenType.DIV: 6,
-            TokenType.POW: 7,
-        }
-
-        # return the precedence
-        return precedences.get(operator_type, 0)
+        return PRECEDENCE.get(operator_type, 0)
@@ -0,0 +1,91 @@
+import math
+from typing import Any, Callable, Dict
+from explanations.expression_node import ExpressionNode
+
+# the operators ExpressionNode evaluates, each is the Python operator of the same symbol
+COMPILED_OPERATORS = ('+', '-', '*', '/')
+
+# Python limits how deeply brackets can nest in source, so deeper trees are left to ExpressionNode.evaluate
+MAX_COMPILED_DEPTH = 100
+
+def compile_expression(root: ExpressionNode) -> Callable[[float], float]:
+    """
+    Compile an expression tree into a single Python function of the missing element, giving the same results
+    (and raising the same errors) as root.evaluate(missing_element), without walking the tree on each call.
+
+    e.g. (3 + ?) * 2 compiles to: lambda missing_element: ((3.0 + missing_element) * 2.0)
+
+    As with evaluate, '?' is the missing element and a missing child counts as 0.
+    Trees deeper than MAX_COMPILED_DEPTH return root.evaluate itself.
+    """
+    if root is None:
+        raise ValueError("No expression to compile")
+
+    # names the source refers to, for values that can't be written as Python literals
+    namespace: Dict[str, Any] = {}
+
+    # source for the visited nodes, and (node, depth, children visited) to visit
+    parts = []
+    stack = [(root, 1, False)]
+
+    while stack:
+        node, depth, children_visited = stack.pop()
+
+        # a missing child counts as 0
+        if node is None:
+            parts.append('0')
+            continue
+
+        if depth > MAX_COMPILED_DEPTH:
+            return root.evaluate
+
+        # the missing element
+        if node.value == '?':
+            parts.append('missing_element')
+            continue
+
+        # a number
+        if not node.left and not node.right:
+            parts.append(literal_source(node.value, namespace))
+            continue
+
+        # come back to the operator once both children are done
+        if not children_visited:
+            stack.append((node, depth, True))
+            stack.append((node.right, depth + 1, False))
+            stack.append((node.left, depth + 1, False))
+            continue
+
+        right = parts.pop()
+        left = parts.pop()
+        if node.value in COMPILED_OPERATORS:
+            parts.append(f"({left} {node.value} {right})")
+        else:
+            # both sides are still evaluated first, as they are by evaluate
+            name = bind(namespace, unknown_operator(node.value))
+            parts.append(f"{name}({left}, {right})")
+
+    return eval(f"lambda missing_element: {parts[0]}", namespace)
+
+def literal_source(value: Any, namespace: Dict[str, Any]) -> str:
+    """The source for a number node, converted to a float once rather than on each call."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        # not a number, so converting it on each call raises the same error as evaluate
+        return f"float({bind(namespace, value)})"
+
+    # repr gives back the same float, except for inf and nan which aren't literals
+    return f"({number!r})" if math.isfinite(number) else bind(namespace, number)
+
+def bind(namespace: Dict[str, Any], value: Any) -> str:
+    """Add a value to the namespace of the compiled function, returning its name."""
+    name = f"_value_{len(namespace)}"
+    namespace[name] = value
+    return name
+
+def unknown_operator(operator: Any) -> Callable[[float, float], float]:
+    """A function raising the error evaluate raises for an operator it doesn't know."""
+    def calculate(left_value: float, right_value: float) -> float:
+        raise ValueError(f"Unknown operator: {operator}")
+    return calculate
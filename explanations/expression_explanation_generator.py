@@ -1,10 +1,15 @@
+from fractions import Fraction
+from compiler.evaluator.fraction_evaluator import calculate_fraction, render_fraction, to_fraction
 from explanations.expression_node import ExpressionNode
 
 class ExpressionExplanationGenerator:
-    def __init__(self, root: ExpressionNode):
+    def __init__(self, root: ExpressionNode, exact: bool = False):
         self.root = root
         self.explanations = []
 
+        # calculate with exact fractions, only rounding for display
+        self.exact = exact
+
     def generate_explanation(self, missing_element: float) -> str:
         self.explanations = []  # Reset explanations
         result = self._evaluate_and_explain(self.root, missing_element)
@@ -12,15 +17,20 @@ class ExpressionExplanationGenerator:
 
     def _evaluate_and_explain(self, node: ExpressionNode, missing_element: float) -> float:
         if node.value == '?':
-            explanation = f"? = {missing_element}"
+            if self.exact:
+                missing_element = to_fraction(missing_element)
+                explanation = f"? = {render_fraction(missing_element)}"
+            else:
+                explanation = f"? = {missing_element}"
             self.explanations.append(f"STEP {len(self.explanations)}: {explanation}")
             return missing_element
 
         if not node.left and not node.right:
-            return float(node.value)
+            return to_fraction(node.value) if self.exact else float(node.value)
 
-        left_value = self._evaluate_and_explain(node.left, missing_element) if node.left else 0
-        right_value = self._evaluate_and_explain(node.right, missing_element) if node.right else 0
+        zero = Fraction(0) if self.exact else 0
+        left_value = self._evaluate_and_explain(node.left, missing_element) if node.left else zero
+        right_value = self._evaluate_and_explain(node.right, missing_element) if node.right else zero
 
         result = self._perform_calculation(node.value, left_value, right_value)
         rounded_result_for_display = self._round_result_for_display(result)
@@ -34,6 +44,8 @@ class ExpressionExplanationGenerator:
         return result
 
     def _perform_calculation(self, operator: str, left_value: float, right_value: float) -> float:
+        if self.exact:
+            return calculate_fraction(operator, left_value, right_value)
         if operator == '+':
             return left_value + right_value
         if operator == '-':
@@ -45,8 +57,12 @@ class ExpressionExplanationGenerator:
         raise ValueError(f"Unknown operator: {operator}")
 
     def _round_result_for_display(self, num: float) -> str:
+        if self.exact:
+            return str(render_fraction(num))
         rounded_number = round(num, 4)
         return str(int(rounded_number)) if rounded_number.is_integer() else str(rounded_number)
 
     def _format_number_for_display(self, num: float) -> str:
+        if self.exact:
+            return str(render_fraction(num))
         return str(int(num)) if num.is_integer() else str(num)
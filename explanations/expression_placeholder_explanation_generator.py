@@ -1,5 +1,6 @@
 # compiler/explanations/expression_placeholder_explanation_generator.py
 
+from compiler.evaluator.fraction_evaluator import calculate_fraction, render_fraction, to_fraction
 from explanations.expression_node import ExpressionNode
 
 class PlaceholderExpressionExplanationGenerator:
@@ -14,6 +15,9 @@ class PlaceholderExpressionExplanationGenerator:
       - Snapshots of the map after each step,
       - Final placeholder and final numeric value.
 
+    In exact mode the values are fractions.Fraction rather than float, and are only rounded
+    (to 4 decimal places) when displayed, so the final value matches the exact evaluator.
+
     Typical Usage:
       1. Construct an ExpressionNode-based AST:
          root = ExpressionNode("*",
@@ -23,11 +27,13 @@ class PlaceholderExpressionExplanationGenerator:
       3. Call generate_explanation(missing_element=0) to produce the dictionary of results.
     """
 
-    def __init__(self, root: ExpressionNode):
+    def __init__(self, root: ExpressionNode, exact: bool = False):
         """
         :param root: The root ExpressionNode of the expression tree.
+        :param exact: Calculate with exact fractions rather than floats.
         """
         self.root = root
+        self.exact = exact
         
         # Placeholder steps, e.g. STEP 0: <x1> = 3
         self.placeholder_steps = []
@@ -92,6 +98,9 @@ class PlaceholderExpressionExplanationGenerator:
         """
         # 1) Special case: node.value == '?' (missing element)
         if node.value == '?':
+            if self.exact:
+                missing_element = to_fraction(missing_element)
+
             placeholder_label = self._assign_placeholder()
             self.placeholder_map[placeholder_label] = missing_element
             
@@ -104,7 +113,7 @@ class PlaceholderExpressionExplanationGenerator:
             # Real step
             step_count_r = len(self.real_steps)
             self.real_steps.append(
-                f"STEP {step_count_r}: ? = {missing_element}"
+                f"STEP {step_count_r}: ? = {self._format_value(missing_element)}"
             )
             
             self._snapshot_placeholder_map()
@@ -113,7 +122,7 @@ class PlaceholderExpressionExplanationGenerator:
         # 2) If node is a leaf literal (e.g. '3')
         if node.left is None and node.right is None:
             placeholder_label = self._assign_placeholder()
-            numeric_value = float(node.value)  # Convert string to float
+            numeric_value = to_fraction(node.value) if self.exact else float(node.value)  # Convert string to number
             self.placeholder_map[placeholder_label] = numeric_value
             
             # Show each literal introduction
@@ -123,7 +132,7 @@ class PlaceholderExpressionExplanationGenerator:
             )
             step_count_r = len(self.real_steps)
             self.real_steps.append(
-                f"STEP {step_count_r}: {node.value} = {numeric_value}"
+                f"STEP {step_count_r}: {node.value} = {self._format_value(numeric_value)}"
             )
             
             self._snapshot_placeholder_map()
@@ -173,8 +182,11 @@ class PlaceholderExpressionExplanationGenerator:
     def _perform_calculation(self, operator: str, left: float, right: float) -> float:
         """
         Perform the math operation given the operator and operand values.
-        Supports +, -, *, /.
+        Supports +, -, *, / (and ^, % in exact mode).
         """
+        if self.exact:
+            return calculate_fraction(operator, left, right)
+
         if operator == '+':
             return left + right
         elif operator == '-':
@@ -192,11 +204,22 @@ class PlaceholderExpressionExplanationGenerator:
         Helper to produce a more readable string for the numeric steps.
         Rounds to 4 decimals and removes trailing .0 if integer.
         """
+        if self.exact:
+            return str(render_fraction(num))
+
         rounded = round(num, 4)
         if rounded.is_integer():
             return str(int(rounded))
         return str(rounded)
 
+    def _format_value(self, value) -> str:
+        """
+        Helper to show a value as it is, exact values are rounded to 4 decimals.
+        """
+        if self.exact:
+            return str(render_fraction(value))
+        return str(value)
+
     def _snapshot_placeholder_map(self):
         """
         Capture the current state of the placeholder map (dict) 
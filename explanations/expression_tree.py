@@ -1,11 +1,46 @@
+from typing import Callable, Iterable, List
+from explanations.expression_compiler import compile_expression
 from explanations.expression_node import ExpressionNode
 
 class ExpressionTree:
     def __init__(self):
         self.root = None
 
+    @property
+    def root(self) -> ExpressionNode:
+        return self._root
+
+    @root.setter
+    def root(self, root: ExpressionNode):
+        # setting the root (even to the same node, after changing it in place) drops the compiled function
+        self._root = root
+        self._compiled = None
+
+    def compile(self) -> Callable[[float], float]:
+        """The tree as a single function of the missing element, compiled on first use and reused until root is set."""
+        if self._compiled is None:
+            self._compiled = compile_expression(self.root)
+        return self._compiled
+
     def evaluate(self, missing_element: float) -> float:
-        return self.root.evaluate(missing_element)
+        return self.compile()(missing_element)
+
+    def evaluate_many(self, missing_elements: Iterable[float]) -> List[float]:
+        """Evaluate the tree for each candidate missing element."""
+        function = self.compile()
+        return [function(missing_element) for missing_element in missing_elements]
+
+    def solve(self, target: float, missing_elements: Iterable[float]) -> List[float]:
+        """The candidate missing elements the tree evaluates to target for (skipping any that divide by zero)."""
+        function = self.compile()
+        solutions = []
+        for missing_element in missing_elements:
+            try:
+                if function(missing_element) == target:
+                    solutions.append(missing_element)
+            except ZeroDivisionError:
+                continue
+        return solutions
 
     def print_tree(self, node: ExpressionNode, depth=0) -> str:
         if not node:
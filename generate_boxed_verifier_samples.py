@@ -4,6 +4,11 @@ import json
 import re
 
 from compiler.arithmetic_compiler import ArithmeticCompiler
+from compiler.evaluator.evaluator import DEFAULT_BACKEND, EVALUATOR_BACKENDS
+from compiler.evaluator.magnitude_check import MagnitudeLimits
+from compiler.instructions.async_emitter import DEFAULT_CONCURRENCY
+from compiler.instructions.batch_emitter import emit_instructions_batched
+from compiler.instructions.llm_response_cache import LLMResponseCache, set_llm_response_cache
 from expression_generator.arithmetic_expression_generator import ArithmeticExpressionGenerator
 
 def strip_control_characters(text: str) -> str:
@@ -44,83 +49,135 @@ def main():
         default=None,
         help="Specify the language model name if needed."
     )
+    parser.add_argument(
+        "--evaluator",
+        type=str,
+        choices=EVALUATOR_BACKENDS,
+        default=DEFAULT_BACKEND,
+        help="Backend used to evaluate the answers (native is faster, but large results can differ from sympy in their last digits)."
+    )
+    parser.add_argument(
+        "--max-magnitude",
+        type=float,
+        default=None,
+        help="Skip expressions whose result may be larger than this (checked before evaluation)."
+    )
+    parser.add_argument(
+        "--max-digits",
+        type=int,
+        default=None,
+        help="Skip expressions whose result may have more digits before the decimal point than this."
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=16,
+        help="Number of samples whose LLM prompts are sent together as one batch."
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="Maximum number of LLM requests of a batch in flight at once (e.g. the parallel slots of the Ollama server)."
+    )
+    parser.add_argument(
+        "--llm-cache",
+        type=str,
+        default=None,
+        help="SQLite file to cache the LLM responses in, so reruns only call the LLM for new prompts."
+    )
     args = parser.parse_args()
 
     generator = ArithmeticExpressionGenerator()
-
-    for _ in range(args.num_samples):
-        # 1. Generate a random expression (e.g. "80 + 91")
-        expression = generator.generate_random_expression(args.difficulty)
-
-        # 2. Compile the expression
-        compiler = ArithmeticCompiler(expression)
-        compiler.parse_expression()
-        compiler.generate_instruction(args.llm)
-        if not compiler.instruction:
-            print("Failed to generate instruction.")
-            continue
-
-        # 3. Retrieve a Python dict from the instruction emitter
-        #    e.g. {
-        #       "instruction": "What is 389 + 646?",
-        #       "expression": "389 + 646",
-        #       "result": "1035",
-        #       ...
-        #    }
-        instruction_dict = compiler.instruction.emit_instruction()
-
-        # 4. Retrieve the numeric answer (string) from the instruction
-        numeric_answer_str = instruction_dict.get("result", None)
-        # Try converting to an integer (or float) if it’s truly numeric.
-        # Some instructions might return a string like "No solution" or an empty string.
-        try:
-            numeric_answer = int(float(numeric_answer_str))  # handles "1035", "1035.0"
-        except (ValueError, TypeError):
-            numeric_answer = None
-
-        # 5. Retrieve JSON from emit_chat() for the user question
-        step_by_step_template_name = "math_stepbystep_template.jinja"
-        chat_output_str = compiler.instruction.emit_chat(step_by_step_template_name)
-
-        # Clean up the raw JSON string
-        chat_output_str = strip_control_characters(replace_latex_symbols(chat_output_str))
-
-        # 6. Parse JSON to find the user's question
-        try:
-            chat_output = json.loads(chat_output_str)
-            # Find the first user message (the prompt)
-            user_message = next(
-                msg["content"] for msg in chat_output["messages"] if msg["role"] == "user"
-            )
-        except (KeyError, StopIteration, json.JSONDecodeError):
-            print("Could not parse user message from emit_chat output.")
-            continue
-
-        # 7. Build the verifiers list
-        verifiers = [
-            {
-                "name": "reasoning_format",
-                "url": "http://0.0.0.0:8000"
-            }
-        ]
-        # If we have a numeric answer, add the "boxed_answer" verifier with gold_solution
-        if numeric_answer is not None:
-            verifiers.append({
-                "name": "boxed_answer",
-                "url": "http://0.0.0.0:8000",
-                "args": {
-                    "gold_solution": f"\\(\\boxed{{{numeric_answer}}}\\)"
+    limits = MagnitudeLimits(args.max_magnitude, args.max_digits)
+
+    # Answer prompts seen in earlier runs from the cache
+    if args.llm and args.llm_cache:
+        set_llm_response_cache(LLMResponseCache(args.llm_cache))
+
+    step_by_step_template_name = "math_stepbystep_template.jinja"
+
+    for start in range(0, args.num_samples, args.batch_size):
+        instructions = []
+        for _ in range(min(args.batch_size, args.num_samples - start)):
+            # 1. Generate a random expression (e.g. "80 + 91")
+            expression = generator.generate_random_expression(args.difficulty)
+
+            # 2. Compile the expression
+            compiler = ArithmeticCompiler(expression, evaluator=args.evaluator, limits=limits)
+            compiler.parse_expression()
+            compiler.generate_instruction(args.llm)
+            if not compiler.instruction:
+                print("Failed to generate instruction.")
+                continue
+
+            instructions.append(compiler.instruction)
+
+        # Build the records of the batch, sending the LLM prompts of all the samples together
+        emit_instructions_batched(instructions, step_by_step_template_name, args.max_concurrency)
+
+        for instruction in instructions:
+            # 3. Retrieve a Python dict from the instruction emitter
+            #    e.g. {
+            #       "instruction": "What is 389 + 646?",
+            #       "expression": "389 + 646",
+            #       "result": "1035",
+            #       ...
+            #    }
+            #    The record was built with the batch, and is reused by emit_chat() below
+            instruction_dict = instruction.emit_instruction(step_by_step_template_name)
+
+            # 4. Retrieve the numeric answer (string) from the instruction
+            numeric_answer_str = instruction_dict.get("result", None)
+            # Try converting to an integer (or float) if it’s truly numeric.
+            # Some instructions might return a string like "No solution" or an empty string.
+            try:
+                numeric_answer = int(float(numeric_answer_str))  # handles "1035", "1035.0"
+            except (ValueError, TypeError):
+                numeric_answer = None
+
+            # 5. Retrieve JSON from emit_chat() for the user question
+            chat_output_str = instruction.emit_chat(step_by_step_template_name)
+
+            # Clean up the raw JSON string
+            chat_output_str = strip_control_characters(replace_latex_symbols(chat_output_str))
+
+            # 6. Parse JSON to find the user's question
+            try:
+                chat_output = json.loads(chat_output_str)
+                # Find the first user message (the prompt)
+                user_message = next(
+                    msg["content"] for msg in chat_output["messages"] if msg["role"] == "user"
+                )
+            except (KeyError, StopIteration, json.JSONDecodeError):
+                print("Could not parse user message from emit_chat output.")
+                continue
+
+            # 7. Build the verifiers list
+            verifiers = [
+                {
+                    "name": "reasoning_format",
+                    "url": "http://0.0.0.0:8000"
                 }
-            })
-
-        # 8. Construct the final JSON line
-        jsonl_entry = {
-            "prompt": user_message,
-            "verifiers": verifiers
-        }
+            ]
+            # If we have a numeric answer, add the "boxed_answer" verifier with gold_solution
+            if numeric_answer is not None:
+                verifiers.append({
+                    "name": "boxed_answer",
+                    "url": "http://0.0.0.0:8000",
+                    "args": {
+                        "gold_solution": f"\\(\\boxed{{{numeric_answer}}}\\)"
+                    }
+                })
+
+            # 8. Construct the final JSON line
+            jsonl_entry = {
+                "prompt": user_message,
+                "verifiers": verifiers
+            }
 
-        # 9. Print as a single JSON line
-        print(json.dumps(jsonl_entry))
+            # 9. Print as a single JSON line
+            print(json.dumps(jsonl_entry))
 
 if __name__ == "__main__":
     main()
@@ -2,6 +2,11 @@
 import argparse
 import re
 from compiler.arithmetic_compiler import ArithmeticCompiler
+from compiler.evaluator.evaluator import DEFAULT_BACKEND, EVALUATOR_BACKENDS
+from compiler.evaluator.magnitude_check import MagnitudeLimits
+from compiler.instructions.async_emitter import DEFAULT_CONCURRENCY
+from compiler.instructions.batch_emitter import emit_instructions_batched
+from compiler.instructions.llm_response_cache import LLMResponseCache, set_llm_response_cache
 from expression_generator.arithmetic_expression_generator import ArithmeticExpressionGenerator
 
 def strip_control_characters(text: str) -> str:
@@ -42,36 +47,86 @@ def main():
         default=None,
         help="Specify the name of the language model to use."
     )
+    parser.add_argument(
+        "--evaluator",
+        type=str,
+        choices=EVALUATOR_BACKENDS,
+        default=DEFAULT_BACKEND,
+        help="Backend used to evaluate the answers (native is faster, but large results can differ from sympy in their last digits)."
+    )
+    parser.add_argument(
+        "--max-magnitude",
+        type=float,
+        default=None,
+        help="Skip expressions whose result may be larger than this (checked before evaluation)."
+    )
+    parser.add_argument(
+        "--max-digits",
+        type=int,
+        default=None,
+        help="Skip expressions whose result may have more digits before the decimal point than this."
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=16,
+        help="Number of samples whose LLM prompts are sent together as one batch."
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="Maximum number of LLM requests of a batch in flight at once (e.g. the parallel slots of the Ollama server)."
+    )
+    parser.add_argument(
+        "--llm-cache",
+        type=str,
+        default=None,
+        help="SQLite file to cache the LLM responses in, so reruns only call the LLM for new prompts."
+    )
 
     args = parser.parse_args()
 
     generator = ArithmeticExpressionGenerator()
+    limits = MagnitudeLimits(args.max_magnitude, args.max_digits)
+
+    # Answer prompts seen in earlier runs from the cache
+    if args.llm and args.llm_cache:
+        set_llm_response_cache(LLMResponseCache(args.llm_cache))
+
+    #step_by_step_template_name = "math_stepbystep_reflection_template.jinja"
+    step_by_step_template_name = "math_stepbystep_template.jinja"
+
+    for start in range(0, args.num_samples, args.batch_size):
+        instructions = []
+        for _ in range(min(args.batch_size, args.num_samples - start)):
+            # 1. Generate a random expression based on the chosen difficulty
+            expression = generator.generate_random_expression(args.difficulty)
+
+            # 2. Compile the expression
+            compiler = ArithmeticCompiler(expression, evaluator=args.evaluator, limits=limits)
+            compiler.parse_expression()
+            compiler.generate_instruction(args.llm)
 
-    for _ in range(args.num_samples):
-        # 1. Generate a random expression based on the chosen difficulty
-        expression = generator.generate_random_expression(args.difficulty)
+            if not compiler.instruction:
+                # If instruction generation fails, you may want to skip or print an error
+                print("Failed to generate instruction.")
+                continue
 
-        # 2. Compile the expression
-        compiler = ArithmeticCompiler(expression)
-        compiler.parse_expression()
-        compiler.generate_instruction(args.llm)
+            instructions.append(compiler.instruction)
 
-        if not compiler.instruction:
-            # If instruction generation fails, you may want to skip or print an error
-            print("Failed to generate instruction.")
-            continue
+        # 3. Build the records of the batch, sending the LLM prompts of all the samples together
+        emit_instructions_batched(instructions, step_by_step_template_name, args.max_concurrency)
 
-        # 3. Retrieve the emitted output in “chat” format
-        #    The compiler’s `emit_chat()` method returns JSON (dict) serialised as a string (or you can serialise it here)
-        #step_by_step_template_name = "math_stepbystep_reflection_template.jinja"
-        step_by_step_template_name = "math_stepbystep_template.jinja"
-        chat_output = compiler.instruction.emit_chat(step_by_step_template_name)
+        for instruction in instructions:
+            # 4. Retrieve the emitted output in “chat” format (from the record built above)
+            chat_output = instruction.emit_chat(step_by_step_template_name)
 
-        # Optionally strip control characters / replace LaTeX if needed
-        chat_output = strip_control_characters(replace_latex_symbols(chat_output))
+            # Optionally strip control characters / replace LaTeX if needed
+            chat_output = strip_control_characters(replace_latex_symbols(chat_output))
 
-        # 4. Print each compiled chat sample as its own JSON line
-        print(chat_output)
+            # 5. Print each compiled chat sample as its own JSON line
+            print(chat_output)
 
 if __name__ == "__main__":
     main()
@@ -2,10 +2,15 @@
 import argparse
 import json
 import re
+import sys
 import yaml
 
 # Local imports
 from compiler.arithmetic_compiler import ArithmeticCompiler
+from compiler.evaluator.magnitude_check import MagnitudeLimits
+from compiler.instructions.async_emitter import DEFAULT_CONCURRENCY, emit_instructions
+from compiler.instructions.batch_emitter import emit_instructions_batched
+from compiler.instructions.llm_response_cache import LLMResponseCache, get_llm_response_cache, set_llm_response_cache
 from expression_generator.arithmetic_expression_generator import ArithmeticExpressionGenerator
 
 def parse_args():
@@ -48,6 +53,22 @@ def main():
     # If there's a top-level "verifier_url" in the YAML, use that; else default:
     default_verifier_url = config.get("verifier_url", "http://0.0.0.0:8000")
 
+    # Limits on the size of the answers, samples over them are skipped before evaluation
+    default_limits = config.get("limits") or {}
+
+    # How many samples wait on the LLM at once, and how long each may take in seconds (no limit if not set)
+    default_concurrency = config.get("concurrency", DEFAULT_CONCURRENCY)
+    default_timeout = config.get("timeout")
+
+    # Whether the LLM prompts of a chunk are sent as one batch (concurrency then limits the requests in flight)
+    default_batch = config.get("batch", False)
+
+    # How many samples are built together, each chunk is written out as soon as it is done
+    default_batch_size = config.get("batch_size", 16)
+
+    # Cache of the LLM responses, so reruns only call the LLM for new prompts (opened by the first stage using an LLM)
+    llm_cache_config = config.get("llm_cache")
+
     # List of stages, each containing difficulty, count, optional LLM, template, etc.
     stages = config.get("stages", [])
     
@@ -65,77 +86,120 @@ def main():
         # Get the LLM
         llm = stage.get("llm", "granite3.1-dense")
 
+        # Open the LLM response cache, if the stage uses an LLM and a cache is set
+        if llm and llm_cache_config and get_llm_response_cache() is None:
+            set_llm_response_cache(LLMResponseCache.from_config(llm_cache_config))
+
         # Get the template
         template_name = stage.get("template", "math_stepbystep_template.jinja")
 
-        # Generate the specified number of samples
-        for _ in range(count):
-            # Generate an expression based on the difficulty
-            expression = generator.generate_random_expression(difficulty)
-
-            # Setup the arithmetic compiler
-            compiler = ArithmeticCompiler(expression)
-            compiler.parse_expression()
-            compiler.generate_instruction(llm)
-
-            # Check we got an instruction
-            if not compiler.instruction:
-                # If instruction generation failed, skip
-                continue
-
-            # Extract numeric result
-            instruction_dict = compiler.instruction.emit_instruction()
-            numeric_answer_str = instruction_dict.get("result", None)
-
-            # We'll just store numeric_answer as the raw string (or None)
-            numeric_answer = numeric_answer_str
-
-            # Generate the chat prompt using the given template
-            chat_output_str = compiler.instruction.emit_chat(template_name)
-
-            # Clean up any control characters or LaTeX
-            chat_output_str = strip_control_characters(
-                replace_latex_symbols(chat_output_str)
-            )
-
-            # Extract user prompt from the chat JSON
-            try:
-                chat_output = json.loads(chat_output_str)
-                user_message = next(
-                    msg["content"] for msg in chat_output["messages"]
-                    if msg["role"] == "user"
+        # Get the limits, the stage can override the top-level ones
+        limits = MagnitudeLimits.from_config({**default_limits, **(stage.get("limits") or {})})
+
+        # Get the concurrency and timeout, which the stage can also override
+        concurrency = stage.get("concurrency", default_concurrency)
+        timeout = stage.get("timeout", default_timeout)
+
+        # Get the chunk size, which the stage can also override
+        batch_size = stage.get("batch_size", default_batch_size)
+
+        # Count the samples written, and those that timed out
+        written = 0
+        timed_out = 0
+
+        for start in range(0, count, batch_size):
+            # Compile the samples of the chunk
+            instructions = []
+            for _ in range(min(batch_size, count - start)):
+                # Generate an expression based on the difficulty
+                expression = generator.generate_random_expression(difficulty)
+
+                # Setup the arithmetic compiler
+                compiler = ArithmeticCompiler(expression, limits=limits)
+                compiler.parse_expression()
+                compiler.generate_instruction(llm)
+
+                # Check we got an instruction
+                if not compiler.instruction:
+                    # If instruction generation failed, skip
+                    continue
+
+                instructions.append(compiler.instruction)
+
+            # Build the records of the chunk concurrently, they are kept by each instruction for the chat output below
+            if stage.get("batch", default_batch):
+                records = emit_instructions_batched(instructions, template_name, concurrency)
+            else:
+                records = emit_instructions(instructions, template_name, concurrency, timeout)
+
+            for instruction, instruction_dict in zip(instructions, records):
+                # Skip samples that timed out
+                if instruction_dict is None:
+                    timed_out += 1
+                    print(f"Timed out after {timeout}s, skipping: {instruction.expression}", file=sys.stderr)
+                    continue
+
+                # Extract numeric result
+                numeric_answer_str = instruction_dict.get("result", None)
+
+                # We'll just store numeric_answer as the raw string (or None)
+                numeric_answer = numeric_answer_str
+
+                # Generate the chat prompt using the given template
+                chat_output_str = instruction.emit_chat(template_name)
+
+                # Clean up any control characters or LaTeX
+                chat_output_str = strip_control_characters(
+                    replace_latex_symbols(chat_output_str)
                 )
-            except (KeyError, StopIteration, json.JSONDecodeError):
-                # If we can't parse the user message, skip
-                continue
-
-            # Build the verifiers list
-            verifiers = [
-                {
-                    "name": "reasoning_format_with_verifier_answer",
-                    "url": default_verifier_url
-                }
-            ]
-
-            # If we have a numeric answer, add the "verifier_answer"
-            if numeric_answer is not None:
-                verifiers.append({
-                    "name": "verifier_answer",
-                    "url": default_verifier_url,
-                    "args": {
-                        "gold_solution": str(numeric_answer)
+
+                # Extract user prompt from the chat JSON
+                try:
+                    chat_output = json.loads(chat_output_str)
+                    user_message = next(
+                        msg["content"] for msg in chat_output["messages"]
+                        if msg["role"] == "user"
+                    )
+                except (KeyError, StopIteration, json.JSONDecodeError):
+                    # If we can't parse the user message, skip
+                    continue
+
+                # Build the verifiers list
+                verifiers = [
+                    {
+                        "name": "reasoning_format_with_verifier_answer",
+                        "url": default_verifier_url
                     }
-                })
+                ]
+
+                # If we have a numeric answer, add the "verifier_answer"
+                if numeric_answer is not None:
+                    verifiers.append({
+                        "name": "verifier_answer",
+                        "url": default_verifier_url,
+                        "args": {
+                            "gold_solution": str(numeric_answer)
+                        }
+                    })
+
+                # Construct the JSONL entry
+                jsonl_entry = {
+                    "prompt": user_message,
+                    "min_reward": 1.0,
+                    "verifiers": verifiers
+                }
+
+                # Output as a JSON line
+                print(json.dumps(jsonl_entry))
+                written += 1
 
-            # Construct the JSONL entry
-            jsonl_entry = {
-                "prompt": user_message,
-                "min_reward": 1.0,
-                "verifiers": verifiers
-            }
+            # Write out each chunk as soon as it is done
+            sys.stdout.flush()
 
-            # Output as a JSON line
-            print(json.dumps(jsonl_entry))
+        # Report any samples the stage is short of
+        if written < count:
+            print(f"Stage '{difficulty}': wrote {written} of {count} samples ({timed_out} timed out, "
+                  f"{count - written - timed_out} failed or skipped)", file=sys.stderr)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,87 @@
+import random
+import pytest
+from decimal import Decimal
+from compiler.ast.arena import ASTArena, KIND_BINARY, KIND_LITERAL, KIND_UNARY, NO_NODE, parse_to_arena
+from compiler.ast.expressions import Literal
+from compiler.lexer.token import Token
+from compiler.lexer.token_type import TokenType
+from compiler.lexer.tokenizer import Tokenizer
+from compiler.parser.parser import Parser
+from expression_generator.arithmetic_expression_generator import ArithmeticExpressionGenerator
+
+DIFFICULTIES = ["very easy", "easy", "pretty easy", "medium", "hard", "pretty hard", "very hard"]
+
+def parse_nodes(expression):
+    return Parser(Tokenizer(expression).tokenize()).parse()
+
+def test_arena_rows():
+    arena = parse_to_arena(["-3 + 4"])
+    assert list(arena.kinds) == [KIND_LITERAL, KIND_UNARY, KIND_LITERAL, KIND_BINARY]
+    assert list(arena.lefts) == [NO_NODE, 0, NO_NODE, 1]
+    assert list(arena.rights) == [NO_NODE, NO_NODE, NO_NODE, 2]
+    assert list(arena.positions) == [NO_NODE, 0, NO_NODE, 3]
+    assert list(arena.roots) == [3]
+    assert arena.literal_pool == [Decimal(3), Decimal(4)]
+
+def test_arena_pools_equal_literals():
+    arena = parse_to_arena(["2 * 2", "2 + 3"])
+    assert arena.node_count == 6
+    assert arena.literal_pool == [Decimal(2), Decimal(3)]
+
+@pytest.mark.parametrize("expression", ["", "3 +", "-(3 + 4)", "2 ^ 3 ^ 2", "1 <> 2 != 3 = 4 == 5", "!1 && 0 || 1"])
+@pytest.mark.parametrize("iterative", [False, True])
+def test_parse_to_arena_matches_nodes(expression, iterative):
+    arena = parse_to_arena([expression], iterative=iterative)
+    assert arena.tree(0) == parse_nodes(expression)
+
+@pytest.mark.parametrize("difficulty", DIFFICULTIES)
+def test_arena_round_trip_generated(difficulty):
+    random.seed(difficulty)
+    generator = ArithmeticExpressionGenerator()
+    corpus = [generator.generate_random_expression(difficulty) for _ in range(200)]
+    nodes = [parse_nodes(expression) for expression in corpus]
+
+    parsed = parse_to_arena(corpus)
+    converted = ASTArena.from_nodes(nodes)
+
+    assert len(parsed) == len(converted) == len(corpus)
+    assert all(parsed.tree(i) == node for i, node in enumerate(nodes))
+    assert all(converted.tree(i) == node for i, node in enumerate(nodes))
+    assert parsed.kinds == converted.kinds and parsed.lefts == converted.lefts and parsed.rights == converted.rights
+
+def test_arena_handles_deep_trees():
+    plus = Token(TokenType.PLUS, '+', 0)
+    arena = ASTArena()
+    row = arena.add_literal(0)
+    for i in range(5000):
+        row = arena.add_binary(row, plus, arena.add_literal(i))
+    arena.add_root(row)
+
+    # node equality is recursive, so compare the rows of the round trip instead
+    round_trip = ASTArena.from_nodes([arena.tree(0)])
+    assert round_trip.lefts == arena.lefts and round_trip.rights == arena.rights and round_trip.roots == arena.roots
+
+def test_arena_keeps_literal_spelling():
+    arena = ASTArena.from_nodes([Literal(Decimal("1.0")), Literal(Decimal("1"))])
+    assert [str(arena.tree(i)) for i in range(2)] == ["1.0", "1"]
+
+def test_arena_rejects_unknown_operator():
+    with pytest.raises(ValueError, match="Unsupported operator"):
+        ASTArena().add_unary(Token(TokenType.COMMA, ',', 0), None)
+
+def test_parse_to_arena_drops_nodes_of_a_failed_parse():
+    arena = parse_to_arena(["1 + 2"])
+    node_count, literal_pool = arena.node_count, list(arena.literal_pool)
+    with pytest.raises(SyntaxError):
+        parse_to_arena(["3 * (4 + 5", "6"], arena=arena)
+    assert arena.node_count == node_count
+    assert arena.literal_pool == literal_pool
+
+    # the literals of the failed parse are added again when next seen
+    parse_to_arena(["4 + 1"], arena=arena)
+    assert arena.literal_pool == literal_pool + [4]
+
+    # the next expression is still the next AST
+    parse_to_arena(["6 - 7"], arena=arena)
+    assert len(arena) == 3
+    assert str(arena.tree(2)) == str(parse_to_arena(["6 - 7"]).tree(0))
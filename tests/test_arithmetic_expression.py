@@ -98,3 +98,33 @@ def test_unary_minus():
     )
 
     assert ast == expected_ast, f"AST mismatch: expected {repr(expected_ast)}, got {repr(ast)}"
+
+def test_validate_collects_all_errors():
+    errors = ArithmeticExpression("3 @ 4 # 5").validate()
+    assert [str(error) for error in errors] == [
+        "Unexpected character: @ at position 2",
+        "Unexpected character: # at position 6",
+    ]
+    assert ArithmeticExpression("3 + 4").validate() == []
+
+def test_parse_expression_cached_hits_on_normalized_text():
+    from compiler.parser.arithmetic_expression import parse_cache, parse_expression_cached
+    parse_cache.clear()
+
+    first = parse_expression_cached("3 + 5 * (10 - 4)")
+    second = parse_expression_cached("  3   +  5 * (10 - 4) ")
+
+    # the second lookup returns the same (shared) result
+    assert second is first
+    assert parse_cache.hits == 1
+    assert parse_cache.misses == 1
+    assert first.ast == ArithmeticExpression("3 + 5 * (10 - 4)").parse()
+    assert first.ast_dict == json.loads(ArithmeticExpression("3 + 5 * (10 - 4)").ast_as_json())
+
+def test_parse_expression_cached_does_not_cache_errors():
+    from compiler.parser.arithmetic_expression import parse_cache, parse_expression_cached
+    parse_cache.clear()
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            parse_expression_cached("3 + * 5")
+    assert len(parse_cache) == 0
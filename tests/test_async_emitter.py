@@ -0,0 +1,127 @@
+import asyncio
+import random
+import pytest
+from compiler.instructions.async_emitter import aemit_instructions, emit_instructions
+from compiler.instructions.infix_expression_calculator_instruction import InfixExpressionCalculatorInstruction
+from compiler.parser.arithmetic_expression import ArithmeticExpression
+
+def make_instructions(expressions, llm):
+    instructions = []
+    for expression in expressions:
+        instruction = InfixExpressionCalculatorInstruction(ast=ArithmeticExpression(expression).parse(), tokens=[])
+        instruction.llm = llm
+        instructions.append(instruction)
+    return instructions
+
+def echo_llm(in_flight=None):
+    """A stand-in LLM echoing the prompt after a random delay, counting the calls waiting at once."""
+    from langchain_core.runnables import RunnableLambda
+
+    async def respond(prompt):
+        if in_flight is not None:
+            in_flight["now"] += 1
+            in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        await asyncio.sleep(random.uniform(0, 0.01))
+        if in_flight is not None:
+            in_flight["now"] -= 1
+        return f"echo: {prompt.to_string()}"
+
+    return RunnableLambda(respond)
+
+def test_records_are_in_the_order_given():
+    expressions = [f"{n} + {n + 1}" for n in range(20)]
+    records = emit_instructions(make_instructions(expressions, echo_llm()), concurrency=5)
+
+    assert [record["expression"] for record in records] == expressions
+    assert [record["result"] for record in records] == [str(2 * n + 1) for n in range(20)]
+    for expression, record in zip(expressions, records):
+        assert record["llm_pretty_result"].startswith("echo: ")
+        assert f'"{expression}"' in record["llm_pretty_result"]
+        assert record["llm_step_by_step_result"].startswith("echo: ")
+
+def test_concurrency_is_bounded():
+    in_flight = {"now": 0, "peak": 0}
+    emit_instructions(make_instructions([f"{n} * 2" for n in range(30)], echo_llm(in_flight)), concurrency=3)
+
+    # each instruction makes its two LLM calls at once
+    assert 1 < in_flight["peak"] <= 3 * 2
+
+def test_timed_out_instruction_is_none_and_not_cached():
+    from langchain_core.language_models.fake import FakeListLLM
+    from langchain_core.runnables import RunnableLambda
+
+    async def slow(prompt):
+        await asyncio.sleep(0.5)
+        return "slow"
+
+    instructions = make_instructions(["1 + 2", "3 + 4"], RunnableLambda(slow))
+    instructions[1].llm = FakeListLLM(responses=["fast"])
+
+    records = emit_instructions(instructions, timeout=0.05)
+    assert records[0] is None
+    assert records[1]["result"] == "7"
+    assert records[1]["llm_pretty_result"] == "fast"
+    assert instructions[0]._instructions == {}
+
+def test_async_record_is_reused_by_the_emitters():
+    from langchain_core.language_models.fake import FakeListLLM
+    instruction = make_instructions(["6 / 3"], FakeListLLM(responses=["two"]))[0]
+
+    record = asyncio.run(instruction.aemit_instruction())
+    assert record["result"] == "2"
+    assert record["llm_pretty_result"] == record["llm_step_by_step_result"] == "two"
+
+    # no more LLM calls are made for the other formats
+    instruction.llm.responses = ["changed"]
+    assert instruction.emit_instruction() == record
+    assert '"two"' in instruction.emit_json()
+
+def test_llm_errors_become_the_response():
+    from langchain_core.runnables import RunnableLambda
+
+    async def fail(prompt):
+        raise RuntimeError("model not found")
+
+    records = emit_instructions(make_instructions(["1 + 1"], RunnableLambda(fail)))
+    assert records[0]["llm_pretty_result"] == "Error generating response from LLM: model not found"
+
+def test_invalid_concurrency():
+    with pytest.raises(ValueError, match="Concurrency must be at least 1"):
+        asyncio.run(aemit_instructions([], concurrency=0))
+
+def test_shared_client_works_across_calls(monkeypatch):
+    pytest.importorskip("langchain_ollama")
+    import json
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from compiler.instructions.llm_registry import clear_llm_registry, llm_client
+
+    class FakeOllama(BaseHTTPRequestHandler):
+        # keep-alive, so the client pools its connections on the event loop of the first call
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            body = (json.dumps({"model": "fake", "response": "hi", "done": True}) + "\n").encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOllama)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("OLLAMA_HOST", f"http://127.0.0.1:{server.server_port}")
+    clear_llm_registry()
+    try:
+        llm = llm_client("fake")
+        for expression in ["1 + 2", "3 + 4"]:
+            record = emit_instructions(make_instructions([expression], llm))[0]
+            assert record["llm_pretty_result"] == record["llm_step_by_step_result"] == "hi"
+    finally:
+        clear_llm_registry()
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+from compiler.instructions.batch_emitter import aemit_instructions_batched, emit_instructions_batched
+from compiler.instructions.infix_expression_calculator_instruction import InfixExpressionCalculatorInstruction
+from compiler.parser.arithmetic_expression import ArithmeticExpression
+
+def make_instructions(expressions, llm):
+    instructions = []
+    for expression in expressions:
+        instruction = InfixExpressionCalculatorInstruction(ast=ArithmeticExpression(expression).parse(), tokens=[])
+        instruction.llm = llm
+        instructions.append(instruction)
+    return instructions
+
+def echo_llm(calls=None):
+    """A stand-in LLM echoing the prompt, counting the calls in flight at once."""
+    from langchain_core.runnables import RunnableLambda
+    lock = threading.Lock()
+
+    def respond(prompt):
+        if calls is not None:
+            with lock:
+                calls["count"] += 1
+                calls["now"] += 1
+                calls["peak"] = max(calls["peak"], calls["now"])
+            time.sleep(0.005)
+            with lock:
+                calls["now"] -= 1
+        return f"echo: {prompt.to_string()}"
+
+    return RunnableLambda(respond)
+
+def test_responses_go_back_to_their_samples():
+    expressions = [f"{n} + {n + 1}" for n in range(12)]
+    calls = {"count": 0, "now": 0, "peak": 0}
+    instructions = make_instructions(expressions, echo_llm(calls))
+
+    records = emit_instructions_batched(instructions, max_concurrency=3)
+    assert [record["expression"] for record in records] == expressions
+    for instruction, record in zip(instructions, records):
+        prompts = instruction.llm_prompts(record)
+        assert record["llm_pretty_result"] == f"echo: {prompts['llm_pretty_result']}"
+        assert record["llm_step_by_step_result"] == f"echo: {prompts['llm_step_by_step_result']}"
+
+    # two prompts per sample, at most max_concurrency at a time
+    assert calls["count"] == 2 * len(expressions)
+    assert calls["peak"] <= 3
+
+def test_batched_records_are_reused_by_the_emitters():
+    calls = {"count": 0, "now": 0, "peak": 0}
+    instructions = make_instructions(["1 + 2", "3 * 4"], echo_llm(calls))
+    records = emit_instructions_batched(instructions)
+
+    assert [instruction.emit_instruction() for instruction in instructions] == records
+    instructions[0].emit_chat()
+    emit_instructions_batched(instructions)
+    assert calls["count"] == 4
+
+def test_samples_without_an_llm_are_not_sent():
+    from langchain_core.language_models.fake import FakeListLLM
+    instructions = make_instructions(["1 + 2", "3 * 4"], FakeListLLM(responses=["response"]))
+    instructions[1].llm = None
+
+    records = emit_instructions_batched(instructions)
+    assert records[0]["llm_pretty_result"] == "response"
+    assert records[1]["llm_pretty_result"] is None
+    assert records[1]["result"] == "12"
+
+def test_errors_become_the_response():
+    from langchain_core.runnables import RunnableLambda
+
+    def respond(prompt):
+        if "1 + 2" in prompt.to_string():
+            raise RuntimeError("model not found")
+        return "fine"
+
+    records = emit_instructions_batched(make_instructions(["1 + 2", "3 * 4"], RunnableLambda(respond)))
+    assert records[0]["llm_pretty_result"] == "Error generating response from LLM: model not found"
+    assert records[1]["llm_pretty_result"] == "fine"
+
+def test_async_batch_matches():
+    from langchain_core.language_models.fake import FakeListLLM
+    instructions = make_instructions(["6 / 3", "2 * 4"], FakeListLLM(responses=["response"]))
+
+    records = asyncio.run(aemit_instructions_batched(instructions, max_concurrency=2))
+    assert [record["result"] for record in records] == ["2", "8"]
+    assert all(record["llm_step_by_step_result"] == "response" for record in records)
@@ -0,0 +1,100 @@
+import random
+import pytest
+from decimal import Decimal
+from compiler.ast.arena import parse_to_arena
+from compiler.ast.expressions.literal_expression import Literal
+from compiler.evaluator.batch_evaluator import BatchEvaluator, evaluate_batch, numpy
+from compiler.evaluator.decimal_evaluator import EvaluationError, native_eval
+from compiler.parser.arithmetic_expression import ArithmeticExpression
+from expression_generator.arithmetic_expression_generator import ArithmeticExpressionGenerator
+
+DIFFICULTIES = ["very easy", "easy", "pretty easy", "medium", "hard", "pretty hard", "very hard"]
+
+EDGE_CASES = [
+    "1 / 0",
+    "5 % 0",
+    "98 - 98",
+    "0 * -5",
+    "-0.00001",
+    "1 / 3",
+    "2 ^ 3",
+    "2 ^ 0.5",
+    "(-8) ^ 0.5",
+    "9 ^ 9 ^ 9",
+    "0.99999999999999999999",
+    "1 + 0.00005",
+    "3 / 3 + 0.00005",
+    "((0.00025) / 0.2) + 2",
+    "99999999999 * 99999999999",
+    "3 +",
+    "!3",
+    "3 < 4",
+    "",
+]
+
+# Helper function to evaluate a single tree natively, returning the result or the error message
+def run_native(ast_node):
+    try:
+        return native_eval(ast_node)
+    except EvaluationError as e:
+        return str(e)
+
+# Helper function to line up batch results with the native ones
+def run_batch(evaluator, results):
+    return [str(evaluator.errors[row]) if row in evaluator.errors else result for row, result in enumerate(results)]
+
+def parse(expression):
+    return ArithmeticExpression(expression).parse()
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+@pytest.mark.parametrize("difficulty", DIFFICULTIES)
+def test_batch_parity_generated(difficulty, use_numpy):
+    random.seed(difficulty)
+    generator = ArithmeticExpressionGenerator()
+    expressions = [generator.generate_random_expression(difficulty) for _ in range(300)]
+    nodes = [parse(expression) for expression in expressions]
+    expected = [run_native(node) for node in nodes]
+
+    evaluator = BatchEvaluator(use_numpy=use_numpy)
+    assert run_batch(evaluator, evaluator.evaluate(nodes)) == expected
+    assert run_batch(evaluator, evaluator.evaluate_arena(parse_to_arena(expressions))) == expected
+    assert evaluator.float_rows + evaluator.decimal_rows == len(expressions)
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_batch_parity_edge_cases(use_numpy):
+    nodes = [parse(expression) for expression in EDGE_CASES] + [None, Literal("abc")]
+    expected = [run_native(node) for node in nodes]
+
+    evaluator = BatchEvaluator(use_numpy=use_numpy)
+    assert run_batch(evaluator, evaluator.evaluate(nodes)) == expected
+    assert run_batch(evaluator, evaluator.evaluate_arena(parse_to_arena(EDGE_CASES))) == expected[:len(EDGE_CASES)]
+
+def test_batch_errors_keyed_by_row():
+    evaluator = BatchEvaluator()
+    results = evaluator.evaluate([parse("1 + 2"), parse("1 / 0"), None])
+    assert results == [Decimal("3"), None, None]
+    assert sorted(evaluator.errors) == [1, 2]
+    assert isinstance(evaluator.errors[1], EvaluationError)
+
+def test_batch_zero_has_no_sign():
+    results = evaluate_batch([parse("-0.00001"), parse("0 * -5")])
+    assert [str(result) for result in results] == [str(native_eval(parse("-0.00001"))), "0"] == ["0", "0"]
+
+def test_batch_empty():
+    evaluator = BatchEvaluator()
+    assert evaluator.evaluate([]) == []
+    assert evaluator.evaluate_arena(parse_to_arena([])) == []
+    assert evaluator.float_rows == evaluator.decimal_rows == 0
+
+@pytest.mark.skipif(numpy is None, reason="numpy is not installed")
+def test_batch_uses_float_path():
+    random.seed(1)
+    generator = ArithmeticExpressionGenerator()
+    evaluator = BatchEvaluator()
+    evaluator.evaluate_arena(parse_to_arena(generator.generate_random_expression("easy") for _ in range(200)))
+    assert evaluator.float_rows > evaluator.decimal_rows
+
+def test_batch_without_numpy_uses_decimal():
+    evaluator = BatchEvaluator(use_numpy=False)
+    evaluator.evaluate([parse("1 + 2"), parse("3 * 4")])
+    assert (evaluator.float_rows, evaluator.decimal_rows) == (0, 2)
@@ -0,0 +1,158 @@
+import random
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, getcontext, localcontext
+from fractions import Fraction
+from compiler.ast.expression_printer import print_expression
+from compiler.evaluator.decimal_evaluator import EVALUATION_PRECISION, evaluation_context
+from compiler.evaluator.evaluator import evaluate
+from compiler.evaluator.fraction_evaluator import render_fraction
+from compiler.instructions.infix_expression_calculator_instruction import InfixExpressionCalculatorInstruction
+from compiler.parser.arithmetic_expression import ArithmeticExpression, ast_to_dict
+from expression_generator.arithmetic_expression_generator import ArithmeticExpressionGenerator
+
+DIFFICULTIES = ["very easy", "easy", "pretty easy", "medium", "hard", "pretty hard", "very hard"]
+
+# Helper function to evaluate, returning the result or None on an error
+def try_evaluate(expression, backend, ast_node=None):
+    try:
+        return evaluate(expression, backend, ast_node)
+    except ValueError:
+        return None
+
+@pytest.mark.parametrize("expression, expected", [
+    ("3 + 5 * (10 - 4)", "33"),
+    ("10 / 4", "2.5"),
+    ("1 / 3", "0.3333"),
+    ("2 ^ 3 ^ 2", "512"),
+    ("-7 % 3", "2"),
+    ("7 % -3", "-2"),
+    ("0 * -5", "0"),
+    ("-(3 + 4)", "-7"),
+    ("10 * 10", "1E+2"),
+])
+def test_native_evaluator(expression, expected):
+    assert str(evaluate(expression, "native")) == expected
+
+@pytest.mark.parametrize("expression", ["1 / 0", "3 +", "", "3 < 4", "!1", "(-8) ^ 0.5", "3 @ 4"])
+def test_native_evaluator_errors(expression):
+    with pytest.raises(ValueError, match="Invalid expression or calculation error"):
+        evaluate(expression, "native")
+
+def test_unknown_backend():
+    with pytest.raises(ValueError, match="Unknown evaluator backend"):
+        evaluate("1 + 2", "abacus")
+    with pytest.raises(ValueError, match="Unknown evaluator backend"):
+        InfixExpressionCalculatorInstruction(ast={}, evaluator="abacus")
+
+@pytest.mark.parametrize("backend", ["native", "exact", "sympy"])
+@pytest.mark.parametrize("expression", ["-0.00001", "0 * -5", "-0.00004 * 1", "1 - 1.00004"])
+def test_zero_results_have_no_sign(backend, expression):
+    assert str(evaluate(expression, backend)) == "0"
+
+@pytest.mark.parametrize("difficulty", DIFFICULTIES)
+def test_native_matches_sympy(difficulty):
+    random.seed(difficulty)
+    generator = ArithmeticExpressionGenerator()
+    for _ in range(300):
+        ast = ArithmeticExpression(generator.generate_random_expression(difficulty)).parse()
+        expression = print_expression(ast)
+
+        native = try_evaluate(expression, "native", ast)
+        sympy = try_evaluate(expression, "sympy")
+        assert (native is None) == (sympy is None), expression
+        if native is None:
+            continue
+
+        # sympy rounds to 15 significant digits before the result is quantized
+        assert abs(native - sympy) <= Decimal("0.0001") + abs(sympy) * Decimal("1e-14"), expression
+
+@pytest.mark.parametrize("evaluator", ["native", "sympy"])
+def test_instruction_evaluator_backends(evaluator):
+    ast = ArithmeticExpression("3 + 5 * (10 - 4)").parse()
+    from_dict = InfixExpressionCalculatorInstruction(ast=ast_to_dict(ast), evaluator=evaluator)
+    from_nodes = InfixExpressionCalculatorInstruction(ast=ast_to_dict(ast), ast_node=ast, evaluator=evaluator)
+    assert from_dict.emit_instruction()["result"] == from_nodes.emit_instruction()["result"] == "33"
+
+@pytest.mark.parametrize("expression, expected", [
+    ("1 / 3", "0.3333"),
+    ("0.1 + 0.2", "0.3"),
+    ("2 ^ -2", "0.25"),
+    ("-7 % 3", "2"),
+    ("-0.00001", "0"),
+    ("10 * 10", "1E+2"),
+    ("99999999999 * 99999999999", "9999999999800000000001"),
+])
+def test_exact_evaluator(expression, expected):
+    assert str(evaluate(expression, "exact")) == expected
+
+@pytest.mark.parametrize("expression", ["1 / 0", "2 ^ 0.5", "3 +", "3 < 4"])
+def test_exact_evaluator_errors(expression):
+    with pytest.raises(ValueError, match="Invalid expression or calculation error"):
+        evaluate(expression, "exact")
+
+@pytest.mark.parametrize("value, places, expected", [
+    (Fraction(1, 3), 4, "0.3333"),
+    (Fraction(2, 3), 2, "0.67"),
+    (Fraction(5, 100000), 4, "0"),
+    (Fraction(15, 100000), 4, "0.0002"),
+    (Fraction(-25, 100000), 4, "-0.0002"),
+    (Fraction(7), 4, "7"),
+])
+def test_render_fraction(value, places, expected):
+    assert str(render_fraction(value, places)) == expected
+
+@pytest.mark.parametrize("difficulty", DIFFICULTIES)
+def test_exact_matches_native(difficulty):
+    random.seed(difficulty)
+    generator = ArithmeticExpressionGenerator()
+    for _ in range(300):
+        ast = ArithmeticExpression(generator.generate_random_expression(difficulty)).parse()
+        native = try_evaluate("", "native", ast)
+        exact = try_evaluate("", "exact", ast)
+        assert (native is None) == (exact is None)
+        if native is not None:
+            assert abs(native - exact) <= Decimal("0.0001") + abs(exact) * Decimal("1e-60")
+
+@pytest.mark.parametrize("difficulty", DIFFICULTIES)
+def test_exact_answer_matches_explanation(difficulty):
+    random.seed(difficulty)
+    generator = ArithmeticExpressionGenerator()
+    for _ in range(50):
+        ast = ArithmeticExpression(generator.generate_random_expression(difficulty)).parse()
+        instruction = InfixExpressionCalculatorInstruction(ast=ast_to_dict(ast), ast_node=ast, evaluator="exact")
+        output = instruction.emit_instruction()
+        assert output["explanation"].endswith(f"Final Answer: {output['result']}\n</answer>")
+
+@pytest.mark.parametrize("backend", ["native", "exact", "sympy"])
+def test_evaluation_leaves_the_global_context_alone(backend):
+    with localcontext() as context:
+        context.prec = 5
+        assert str(evaluate("123456789 * 3 + 1 / 3", backend)) == "370370367.3333"
+        assert getcontext().prec == 5
+
+def test_evaluation_context_per_thread():
+    contexts = []
+    thread = threading.Thread(target=lambda: contexts.append(evaluation_context()))
+    thread.start()
+    thread.join()
+
+    assert evaluation_context() is evaluation_context()
+    assert contexts[0] is not evaluation_context()
+    assert contexts[0].prec == evaluation_context().prec == EVALUATION_PRECISION
+
+@pytest.mark.parametrize("backend", ["native", "sympy"])
+def test_concurrent_evaluation(backend):
+    random.seed(backend)
+    generator = ArithmeticExpressionGenerator()
+    expressions = [print_expression(ArithmeticExpression(generator.generate_random_expression("hard")).parse()) for _ in range(200)]
+    expected = [try_evaluate(expression, backend) for expression in expressions]
+
+    # each worker changes its own global context, which mustn't affect the results
+    def evaluate_in_worker(expression):
+        getcontext().prec = random.randint(2, 10)
+        return try_evaluate(expression, backend)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert list(executor.map(evaluate_in_worker, expressions)) == expected
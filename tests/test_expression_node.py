@@ -1,5 +1,7 @@
+from fractions import Fraction
 from explanations.expression_explanation_generator import ExpressionExplanationGenerator
 from explanations.expression_node import ExpressionNode
+from explanations.expression_placeholder_explanation_generator import PlaceholderExpressionExplanationGenerator
 
 def test_evaluate_simple_number():
     node = ExpressionNode("5")
@@ -38,3 +40,25 @@ def test_evaluate_and_explain():
     assert explanation_text.split("\n") == expected_explanations
 
 
+
+def test_evaluate_and_explain_exact():
+    node = ExpressionNode("+",
+                          ExpressionNode("0.1"),
+                          ExpressionNode("/", ExpressionNode("2"), ExpressionNode("3")))
+    explanation_generator = ExpressionExplanationGenerator(node, exact=True)
+    explanation_text, result = explanation_generator.generate_explanation(0)
+    assert result == Fraction(23, 30)
+    assert explanation_text.split("\n") == [
+        "STEP 0: (2 / 3) = 0.6667",
+        "STEP 1: (0.1 + 0.6667) = 0.7667"
+    ]
+
+def test_placeholder_explanation_exact():
+    node = ExpressionNode("-", ExpressionNode("0.3"), ExpressionNode("0.1"))
+    explanation_data = PlaceholderExpressionExplanationGenerator(node, exact=True).generate_explanation(0)
+    assert explanation_data["final_value"] == Fraction(1, 5)
+    assert explanation_data["real_steps"] == [
+        "STEP 0: 0.3 = 0.3",
+        "STEP 1: 0.1 = 0.1",
+        "STEP 2: (0.3 - 0.1) = 0.2"
+    ]
@@ -1,3 +1,5 @@
+import pytest
+from explanations.expression_compiler import compile_expression, MAX_COMPILED_DEPTH
 from explanations.expression_node import ExpressionNode
 from explanations.expression_tree import ExpressionTree
 
@@ -12,3 +14,53 @@ def test_print_tree():
         "    |-- 7\n"
     )
     assert tree.print_tree(tree.root).strip() == expected_output.strip()
+
+def build_tree(root):
+    tree = ExpressionTree()
+    tree.root = root
+    return tree
+
+def run_node(function, missing_element):
+    try:
+        return function(missing_element)
+    except (ValueError, ZeroDivisionError) as e:
+        return f"{e.__class__.__name__}: {e}"
+
+@pytest.mark.parametrize("root", [
+    ExpressionNode("*", ExpressionNode("+", ExpressionNode("3"), ExpressionNode("?")), ExpressionNode("2")),
+    ExpressionNode("-", None, ExpressionNode("?")),
+    ExpressionNode("+", ExpressionNode("?"), None),
+    ExpressionNode("/", ExpressionNode("1"), ExpressionNode("?")),
+    ExpressionNode("^", ExpressionNode("2"), ExpressionNode("?")),
+    ExpressionNode("+", ExpressionNode("x"), ExpressionNode("1")),
+    ExpressionNode("*", ExpressionNode("inf"), ExpressionNode("-1.5")),
+    ExpressionNode("?"),
+    ExpressionNode("7"),
+])
+def test_compiled_matches_evaluate(root):
+    function = compile_expression(root)
+    for missing_element in [0, 2, -0.5]:
+        assert run_node(function, missing_element) == run_node(root.evaluate, missing_element)
+
+def test_compile_deep_tree_falls_back_to_evaluate():
+    root = ExpressionNode("?")
+    for _ in range(MAX_COMPILED_DEPTH + 1):
+        root = ExpressionNode("+", root, ExpressionNode("1"))
+    assert compile_expression(root) == root.evaluate
+    assert build_tree(root).evaluate(1) == MAX_COMPILED_DEPTH + 2
+
+def test_compiled_function_is_cached_until_root_is_set():
+    root = ExpressionNode("+", ExpressionNode("?"), ExpressionNode("1"))
+    tree = build_tree(root)
+    assert tree.compile() is tree.compile()
+    assert tree.evaluate(2) == 3.0
+
+    # changes in place are picked up once the root is set again
+    root.value = "*"
+    tree.root = root
+    assert tree.evaluate(2) == 2.0
+
+def test_evaluate_many_and_solve():
+    tree = build_tree(ExpressionNode("/", ExpressionNode("6"), ExpressionNode("?")))
+    assert tree.evaluate_many([1, 2, 3]) == [6.0, 3.0, 2.0]
+    assert tree.solve(3.0, range(-5, 6)) == [2]
@@ -0,0 +1,77 @@
+import random
+import pytest
+from decimal import Decimal
+from compiler.ast.expressions import BinaryExpression, Literal
+from compiler.ast.expression_printer import print_expression
+from compiler.ast.hashing import NO_ID, StructuralHasher, structural_hash, structural_key
+from compiler.lexer.token import Token
+from compiler.lexer.token_type import TokenType
+from compiler.parser.arithmetic_expression import ArithmeticExpression
+from expression_generator.arithmetic_expression_generator import ArithmeticExpressionGenerator
+
+def parse(expression):
+    return ArithmeticExpression(expression).parse()
+
+def test_structure_ignores_positions_and_spacing():
+    hasher = StructuralHasher()
+    assert hasher.structural_id(parse("3+4*2")) == hasher.structural_id(parse("3 + 4 * 2"))
+    assert structural_key(parse("3+4*2")) == structural_key(parse("(3 + (4 * 2))"))
+    assert structural_hash(parse("3+4*2")) == structural_hash(parse("3 + 4 * 2"))
+
+@pytest.mark.parametrize("first, second", [
+    ("3 + 4", "4 + 3"),
+    ("3 - 4", "3 + 4"),
+    ("-3 - 4", "3 - 4"),
+    ("(1 - 2) - 3", "1 - (2 - 3)"),
+    ("3 +", "3"),
+    ("1 != 2", "1 <> 2"),
+])
+def test_structure_distinguishes_trees(first, second):
+    hasher = StructuralHasher()
+    assert hasher.structural_id(parse(first)) != hasher.structural_id(parse(second))
+    assert structural_key(parse(first)) != structural_key(parse(second))
+
+def test_structure_keeps_literal_spelling():
+    assert structural_key(Literal(Decimal("1.0"))) != structural_key(Literal(Decimal("1")))
+
+def test_structural_id_of_no_tree():
+    assert StructuralHasher().structural_id(None) == NO_ID
+    assert structural_key(None) == (None,)
+
+def test_duplicate_detection_matches_printed_expressions():
+    random.seed(12)
+    generator = ArithmeticExpressionGenerator()
+    asts = [parse(generator.generate_random_expression("very easy")) for _ in range(2000)]
+
+    hasher = StructuralHasher()
+    ids = [hasher.structural_id(ast) for ast in asts]
+    keys = [structural_key(ast) for ast in asts]
+    printed = [print_expression(ast) for ast in asts]
+
+    assert len(set(ids)) == len(set(keys)) == len(set(printed)) < len(asts)
+
+def test_intern_shares_identical_subtrees():
+    hasher = StructuralHasher(share_subtrees=True)
+    first = hasher.intern(parse("(1 + 2) * (1 + 2)"))
+    second = hasher.intern(parse("7 - (1 + 2)"))
+
+    assert first.left is first.right
+    assert second.right is first.left
+    assert hasher.intern(parse("(1 + 2) * (1 + 2)")) is first
+    assert structural_key(first) == structural_key(parse("(1 + 2) * (1 + 2)"))
+
+def test_intern_needs_sharing():
+    with pytest.raises(ValueError):
+        StructuralHasher().intern(Literal(1))
+
+def test_hashing_deep_trees():
+    plus = Token(TokenType.PLUS, '+', 0)
+    ast = Literal(0)
+    for i in range(5000):
+        ast = BinaryExpression(ast, plus, Literal(i))
+
+    assert len(structural_key(ast)) == 10001
+    # Literal(0) appears twice, so there are 5000 distinct literals and 5000 distinct sums
+    hasher = StructuralHasher()
+    hasher.structural_id(ast)
+    assert len(hasher) == 10000
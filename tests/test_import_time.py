@@ -0,0 +1,11 @@
+import pytest
+from benchmarks.import_time import ENTRY_POINTS, heavy_imports, import_times
+
+# generous, as the import time depends on the machine, the LLM dependencies alone take over a second
+IMPORT_TIME_BUDGET_US = 500_000
+
+@pytest.mark.parametrize("module", ENTRY_POINTS)
+def test_entry_point_import_time(module):
+    times = import_times(module)
+    assert heavy_imports(times) == []
+    assert times[module] < IMPORT_TIME_BUDGET_US
@@ -75,3 +75,103 @@ def test_to_qa(mock_safe_eval, mock_get_instruction, setup_instruction):
         "EXPLANATION: This explanation details the steps taken to evaluate the expression."
     )
     assert qa_output == expected_result
+
+@pytest.mark.parametrize("expression, expected", [
+    ("8 - (4 - 2)", "8 - (4 - 2)"),
+    ("(8 - 4) - 2", "8 - 4 - 2"),
+    ("16 / (4 / 2)", "16 / (4 / 2)"),
+    ("3 + (4 + 5)", "3 + 4 + 5"),
+    ("2 ^ 3 ^ 2", "2 ^ 3 ^ 2"),
+    ("(2 ^ 3) ^ 2", "(2 ^ 3) ^ 2"),
+    ("3 + 5 * (10 - 4)", "3 + 5 * (10 - 4)"),
+])
+def test_extract_expression_keeps_needed_parentheses(expression, expected):
+    from compiler.parser.arithmetic_expression import ArithmeticExpression
+    ast = json.loads(ArithmeticExpression(expression).ast_as_json())
+    instruction = InfixExpressionCalculatorInstruction(ast=ast, tokens=[])
+    assert instruction.extract_expression_from_ast(ast) == expected
+
+def test_instruction_accepts_ast_nodes():
+    from compiler.parser.arithmetic_expression import ArithmeticExpression
+    arithmetic_expression = ArithmeticExpression("3 + 5 * (10 - 4)")
+    ast = arithmetic_expression.parse()
+
+    from_nodes = InfixExpressionCalculatorInstruction(ast=ast, tokens=arithmetic_expression.tokens)
+    from_json = InfixExpressionCalculatorInstruction(ast=arithmetic_expression.ast_as_json(), tokens=arithmetic_expression.tokens)
+    assert from_nodes.ast == from_json.ast
+
+def test_compiler_hands_off_ast_dict_without_json():
+    from compiler.arithmetic_compiler import ArithmeticCompiler
+    compiler = ArithmeticCompiler("3 + 5 * (10 - 4)")
+    compiler.parse_expression()
+    compiler.generate_instruction(None)
+
+    # the instruction shares the dict built by the front end, JSON is only produced on demand
+    assert compiler.instruction.ast is compiler.ast_dict
+    assert json.loads(compiler.json_ast) == compiler.ast_dict
+
+@pytest.mark.parametrize("expression, expected", [
+    ("-3 + 4", "1"),
+    ("-(3 + 4) * -2", "14"),
+    ("--3", "3"),
+])
+def test_placeholder_explanation_negation(expression, expected):
+    from compiler.parser.arithmetic_expression import ArithmeticExpression, ast_to_dict
+    ast = ArithmeticExpression(expression).parse()
+    for instruction in [
+        InfixExpressionCalculatorInstruction(ast=ast_to_dict(ast), tokens=[]),
+        InfixExpressionCalculatorInstruction(ast=ast_to_dict(ast), tokens=[], ast_node=ast),
+    ]:
+        output = instruction.emit_instruction()
+        assert output["result"] == expected
+        assert output["explanation"].endswith(f"Final Answer: {float(expected)}\n</answer>")
+
+def test_instruction_record_is_built_once(setup_instruction):
+    with patch.object(InfixExpressionCalculatorInstruction, 'safe_eval', return_value=75.5) as mock_safe_eval:
+        outputs = setup_instruction.emit(["json", "chat", "qa"])
+        assert setup_instruction.emit_json() == outputs["json"]
+        assert setup_instruction.emit_chat() == outputs["chat"]
+        assert setup_instruction.emit_qa() == outputs["qa"]
+        assert setup_instruction.emit_jsonl().strip() == json.dumps(setup_instruction.emit_instruction())
+        assert mock_safe_eval.call_count == 1
+
+        # the instruction question is picked once too
+        assert json.loads(outputs["json"])["instruction"] == setup_instruction.emit_instruction()["instruction"]
+
+def test_instruction_record_is_rebuilt_when_an_input_changes(setup_instruction):
+    from compiler.parser.arithmetic_expression import ArithmeticExpression, ast_to_dict
+    assert setup_instruction.emit_instruction()["result"] == "75.5"
+
+    setup_instruction.ast = ast_to_dict(ArithmeticExpression("1 + 2").parse())
+    assert setup_instruction.emit_instruction()["result"] == "3"
+
+def test_instruction_record_copies_are_independent(setup_instruction):
+    output = setup_instruction.emit_instruction()
+    output["result"] = "changed"
+    assert setup_instruction.emit_instruction()["result"] == "75.5"
+
+def test_nested_fields_of_the_copies_are_independent(setup_instruction):
+    from compiler.parser.arithmetic_expression import ArithmeticExpression
+    setup_instruction.tokens = ArithmeticExpression("3 + 5").tokenize()
+    output = setup_instruction.emit_instruction()
+    output["ast"]["operator"]["value"] = "-"
+    output["tokens"].clear()
+
+    assert setup_instruction.emit_instruction()["ast"]["operator"]["value"] == "+"
+    assert setup_instruction.emit_instruction()["tokens"]
+    assert setup_instruction.ast["operator"]["value"] == "+"
+
+def test_emit_unknown_format(setup_instruction):
+    with pytest.raises(ValueError, match="Unknown output format: xml"):
+        setup_instruction.emit(["json", "xml"])
+
+def test_reassigning_ast_drops_the_old_nodes():
+    from compiler.parser.arithmetic_expression import ArithmeticExpression, ast_to_dict
+    ast = ArithmeticExpression("3 + 5 * (10 - 4)").parse()
+    instruction = InfixExpressionCalculatorInstruction(ast=ast, tokens=[])
+    assert instruction.emit_instruction()["expression"] == "3 + 5 * (10 - 4)"
+
+    instruction.ast = ast_to_dict(ArithmeticExpression("1 + 2").parse())
+    assert instruction.ast_node is None
+    output = instruction.emit_instruction()
+    assert (output["expression"], output["result"]) == ("1 + 2", "3")
@@ -0,0 +1,71 @@
+import pytest
+from unittest.mock import patch
+from compiler.arithmetic_compiler import ArithmeticCompiler
+from compiler.instructions.infix_expression_calculator_instruction import InfixExpressionCalculatorInstruction
+from compiler.instructions.llm_registry import CHAIN_CACHE_SIZE, clear_llm_registry, llm_chain, llm_client
+
+@pytest.fixture(autouse=True)
+def empty_registry():
+    clear_llm_registry()
+    yield
+    clear_llm_registry()
+
+def compile_instruction(expression, llm):
+    compiler = ArithmeticCompiler(expression)
+    compiler.parse_expression()
+    compiler.generate_instruction(llm)
+    return compiler.instruction
+
+def test_client_is_shared_per_model():
+    pytest.importorskip("langchain_ollama")
+    first = compile_instruction("1 + 2", "granite3.1-dense")
+    second = compile_instruction("3 * 4", "granite3.1-dense")
+    other = compile_instruction("5 - 6", "mistral-nemo")
+
+    assert first.llm is second.llm is llm_client("granite3.1-dense")
+    assert other.llm is not first.llm
+    assert other.llm.model == "mistral-nemo"
+
+def test_chain_is_built_once_per_llm_and_template():
+    from langchain_core.language_models.fake import FakeListLLM
+    llm, other_llm = FakeListLLM(responses=["a"]), FakeListLLM(responses=["b"])
+
+    chain = llm_chain(llm, "{input_text}", ["input_text"])
+    assert llm_chain(llm, "{input_text}", ["input_text"]) is chain
+    assert llm_chain(llm, "Q: {input_text}", ["input_text"]) is not chain
+    assert llm_chain(other_llm, "{input_text}", ["input_text"]) is not chain
+    assert chain.invoke({"input_text": "hello"}) == "a"
+
+def test_chains_of_dropped_llms_are_let_go():
+    import gc
+    import weakref
+    from langchain_core.language_models.fake import FakeListLLM
+
+    # a new LLM per sample, as with per-instruction stand-ins
+    dropped = []
+    for _ in range(CHAIN_CACHE_SIZE * 2):
+        llm = FakeListLLM(responses=["a"])
+        llm_chain(llm, "{input_text}", ["input_text"])
+        dropped.append(weakref.ref(llm))
+    del llm
+    gc.collect()
+
+    # only the most recently used chains keep their LLMs
+    assert sum(ref() is not None for ref in dropped) == CHAIN_CACHE_SIZE
+    assert dropped[-1]() is not None
+
+def test_instructions_share_chains():
+    from langchain.prompts import PromptTemplate
+    from langchain_core.language_models.fake import FakeListLLM
+    llm = FakeListLLM(responses=["response"])
+
+    with patch("langchain.prompts.PromptTemplate", wraps=PromptTemplate) as prompt_template:
+        for expression in ["1 + 2", "3 * 4", "5 - 6"]:
+            instruction = InfixExpressionCalculatorInstruction(ast=compile_instruction(expression, None).ast_node, tokens=[])
+            instruction.llm = llm
+            record = instruction.emit_instruction()
+            assert record["llm_pretty_result"] == record["llm_step_by_step_result"] == "response"
+            assert instruction.get_instruction_from_llm("What is it?") == "response"
+
+        # one prompt for the responses, one for the questions, however many samples
+        assert prompt_template.call_count == 2
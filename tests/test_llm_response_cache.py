@@ -0,0 +1,173 @@
+import pytest
+from compiler.instructions.batch_emitter import emit_instructions_batched
+from compiler.instructions.infix_expression_calculator_instruction import InfixExpressionCalculatorInstruction
+from compiler.instructions.llm_response_cache import LLMResponseCache, set_llm_response_cache
+from compiler.parser.arithmetic_expression import ArithmeticExpression
+
+class ModelLLM:
+    """Stands in for an LLM client with a model name, e.g. OllamaLLM."""
+    def __init__(self, model):
+        self.model = model
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm_cache.sqlite"))
+    yield cache
+    set_llm_response_cache(None)
+    cache.close()
+
+def counting_llm():
+    """A stand-in LLM with a model name, answering with the number of calls made so far."""
+    from langchain_core.language_models.fake import FakeListLLM
+
+    class CountingLLM(FakeListLLM):
+        model: str = "counting"
+        calls: int = 0
+
+        def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+            self.calls += 1
+            return f"response {self.calls}"
+
+        async def _acall(self, prompt, stop=None, run_manager=None, **kwargs):
+            return self._call(prompt, stop)
+
+    return CountingLLM(responses=[""])
+
+def make_instruction(expression, llm):
+    instruction = InfixExpressionCalculatorInstruction(ast=ArithmeticExpression(expression).parse(), tokens=[])
+    instruction.llm = llm
+    return instruction
+
+def test_get_and_put(cache):
+    llm = ModelLLM("granite3.1-dense")
+    assert cache.get(llm, "prompt") is None
+    cache.put(llm, "prompt", "response")
+    assert cache.get(llm, "prompt") == "response"
+
+    # the model is part of the key
+    assert cache.get(ModelLLM("mistral-nemo"), "prompt") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+def test_llms_without_a_model_name_are_not_cached(cache):
+    llm = object()
+    cache.put(llm, "prompt", "response")
+    assert cache.get(llm, "prompt") is None
+    assert len(cache) == 0
+
+def test_responses_persist_across_opens(tmp_path):
+    path = str(tmp_path / "llm_cache.sqlite")
+    first = LLMResponseCache(path)
+    first.put(ModelLLM("model"), "prompt", "response")
+    first.close()
+
+    second = LLMResponseCache(path)
+    assert second.get(ModelLLM("model"), "prompt") == "response"
+    second.close()
+
+def test_evicts_least_recently_used_past_max_entries(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm_cache.sqlite"), max_entries=10, max_bytes=None)
+    llm = ModelLLM("model")
+    for n in range(10):
+        cache.put(llm, f"prompt {n}", str(n))
+
+    # using the first makes the next two the least recently used, eviction goes down to 90% of the limit
+    cache.get(llm, "prompt 0")
+    cache.put(llm, "prompt 10", "10")
+    assert len(cache) == 9
+    assert cache.get(llm, "prompt 0") == "0"
+    assert cache.get(llm, "prompt 1") is None
+    assert cache.get(llm, "prompt 2") is None
+    assert cache.get(llm, "prompt 10") == "10"
+    cache.close()
+
+def test_totals_follow_replaced_responses(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm_cache.sqlite"), max_entries=3, max_bytes=None)
+    llm = ModelLLM("model")
+    for _ in range(5):
+        cache.put(llm, "prompt", "response")
+    assert len(cache) == 1
+    assert cache.stats()["bytes"] == len("response")
+    cache.close()
+
+def test_creates_the_folder_of_the_file(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "missing" / "llm_cache.sqlite"))
+    cache.put(ModelLLM("model"), "prompt", "response")
+    assert (tmp_path / "missing" / "llm_cache.sqlite").exists()
+    cache.close()
+
+def test_evicts_least_recently_used_past_max_bytes(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm_cache.sqlite"), max_entries=None, max_bytes=10)
+    llm = ModelLLM("model")
+    cache.put(llm, "a", "x" * 4)
+    cache.put(llm, "b", "y" * 4)
+    cache.put(llm, "c", "z" * 4)
+
+    assert cache.get(llm, "a") is None
+    assert cache.get(llm, "c") == "zzzz"
+    assert cache.stats()["bytes"] == 8
+    cache.close()
+
+def test_from_config(tmp_path):
+    assert LLMResponseCache.from_config(None) is None
+    cache = LLMResponseCache.from_config({"path": str(tmp_path / "llm_cache.sqlite"), "max_entries": 5})
+    assert (cache.max_entries, cache.max_bytes) == (5, 256 * 1024 * 1024)
+    cache.close()
+
+def test_rerun_only_calls_the_llm_for_new_prompts(cache):
+    set_llm_response_cache(cache)
+    llm = counting_llm()
+
+    first = make_instruction("1 + 2", llm).emit_instruction()
+    assert llm.calls == 2
+
+    # the same prompts in a new run (with a new instruction) are answered from the cache
+    rerun = make_instruction("1 + 2", llm)
+    rerun.get_random_instruction = lambda use_llm=False: first["instruction"]
+    assert rerun.emit_instruction() == first
+    assert llm.calls == 2
+
+    assert rerun.get_instruction_from_llm("What is 1 + 2?") == "response 3"
+    assert rerun.get_instruction_from_llm("What is 1 + 2?") == "response 3"
+    assert llm.calls == 3
+
+def test_batches_only_send_new_prompts(cache):
+    set_llm_response_cache(cache)
+    llm = counting_llm()
+
+    first = emit_instructions_batched([make_instruction("1 + 2", llm)])[0]
+    assert llm.calls == 2
+
+    rerun = make_instruction("1 + 2", llm)
+    rerun.get_random_instruction = lambda use_llm=False: first["instruction"]
+    records = emit_instructions_batched([rerun, make_instruction("3 * 4", llm)])
+    assert records[0] == first
+    assert llm.calls == 4
+
+def test_errors_are_not_cached(cache):
+    from langchain_core.language_models.fake import FakeListLLM
+
+    class FailingLLM(FakeListLLM):
+        model: str = "failing"
+
+        def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+            raise RuntimeError("model not found")
+
+    set_llm_response_cache(cache)
+    instruction = make_instruction("1 + 2", FailingLLM(responses=[""]))
+    assert instruction.get_llm_response("prompt") == "Error generating response from LLM: model not found"
+    assert len(cache) == 0
+
+def test_async_paths_use_the_cache(cache):
+    import asyncio
+    from compiler.instructions.batch_emitter import aemit_instructions_batched
+    set_llm_response_cache(cache)
+    llm = counting_llm()
+
+    first = asyncio.run(make_instruction("1 + 2", llm).aemit_instruction())
+    assert llm.calls == 2
+
+    rerun = make_instruction("1 + 2", llm)
+    rerun.get_random_instruction = lambda use_llm=False: first["instruction"]
+    assert asyncio.run(aemit_instructions_batched([rerun]))[0] == first
+    assert llm.calls == 2
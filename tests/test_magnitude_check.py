@@ -0,0 +1,78 @@
+import math
+import random
+import pytest
+from decimal import Decimal
+from compiler.arithmetic_compiler import ArithmeticCompiler
+from compiler.evaluator.decimal_evaluator import EvaluationError, native_eval
+from compiler.evaluator.magnitude_check import UNBOUNDED, MagnitudeLimits, estimate_interval
+from compiler.parser.arithmetic_expression import ArithmeticExpression
+from expression_generator.arithmetic_expression_generator import ArithmeticExpressionGenerator
+
+DIFFICULTIES = ["very easy", "medium", "very hard"]
+
+def parse(expression):
+    return ArithmeticExpression(expression).parse()
+
+@pytest.mark.parametrize("difficulty", DIFFICULTIES)
+def test_interval_contains_result(difficulty):
+    random.seed(difficulty)
+    generator = ArithmeticExpressionGenerator()
+    for _ in range(300):
+        ast = parse(generator.generate_random_expression(difficulty))
+        try:
+            result = native_eval(ast)
+        except EvaluationError:
+            continue
+
+        # the result is rounded to 4 decimal places
+        low, high = estimate_interval(ast)
+        assert Decimal(low) - Decimal("0.00005") <= result <= Decimal(high) + Decimal("0.00005")
+
+@pytest.mark.parametrize("expression", ["1 / 0", "1 / (98 - 98)", "7 % 0", "9 ^ 9 ^ 9", "0 ^ -1"])
+def test_unbounded_results(expression):
+    assert estimate_interval(parse(expression)) == UNBOUNDED
+
+@pytest.mark.parametrize("expression, low, high", [
+    ("3 + 4", 7, 7),
+    ("-(3 * 4)", -12, -12),
+    ("1 / 3", 1 / 3, 1 / 3),
+    ("2 ^ 10", -1024, 1024),
+    ("-7 % 3", -3, 3),
+])
+def test_interval_bounds(expression, low, high):
+    interval = estimate_interval(parse(expression))
+    assert interval[0] <= low and high <= interval[1]
+    assert math.isclose(interval[0], low) and math.isclose(interval[1], high)
+
+def test_unknown_structure_is_not_bounded():
+    assert estimate_interval(parse("3 +")) is None
+    assert estimate_interval(None) is None
+
+def test_limits():
+    limits = MagnitudeLimits(max_magnitude=1000, max_digits=3)
+    assert limits.check(parse("999 + 0.5")) is None
+    assert "magnitude" in limits.check(parse("999 + 2"))
+    assert "unbounded" in limits.check(parse("1 / 0"))
+    assert "digits" in MagnitudeLimits(max_digits=3).check(parse("-1000.5"))
+
+    # no limits, or nothing to bound
+    assert MagnitudeLimits().check(parse("9 ^ 9 ^ 9")) is None
+    assert limits.check(parse("3 +")) is None
+
+def test_limits_from_config():
+    limits = MagnitudeLimits.from_config({"max_magnitude": 1.0e+12})
+    assert (limits.max_magnitude, limits.max_digits) == (1.0e+12, None)
+    assert not MagnitudeLimits.from_config(None).enabled
+
+def test_compiler_skips_expressions_over_the_limits():
+    compiler = ArithmeticCompiler("123456 * 654321", limits=MagnitudeLimits(max_digits=6))
+    compiler.parse_expression()
+    compiler.generate_instruction(None)
+    assert compiler.instruction is None
+    assert "digits" in compiler.limit_error
+
+    compiler = ArithmeticCompiler("123 * 456", limits=MagnitudeLimits(max_digits=6))
+    compiler.parse_expression()
+    compiler.generate_instruction(None)
+    assert compiler.instruction is not None
+    assert compiler.limit_error is None
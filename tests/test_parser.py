@@ -1,3 +1,5 @@
+import pytest
+import random
 from compiler.lexer.tokenizer import Tokenizer
 from compiler.parser.parser import Parser
 from compiler.ast.expressions.literal_expression import Literal
@@ -5,6 +7,7 @@ from compiler.ast.expressions.binary_expression import BinaryExpression
 from compiler.ast.expressions.unary_expression import UnaryExpression
 from compiler.lexer.token_type import TokenType
 from compiler.lexer.tokenizer import Token
+from expression_generator.arithmetic_expression_generator import ArithmeticExpressionGenerator
 
 # Helper function to generate tokens from an expression string
 def tokenize(expression):
@@ -86,3 +89,118 @@ def test_complex_expression():
     assert isinstance(ast.right.right.right, Literal)
     assert ast.right.right.right.value == 4
 
+
+def test_parse_from_token_iterator():
+    expression = "3 + 5 * (10 - -4)"
+    streamed = Parser(Tokenizer(expression).iter_tokens()).parse()
+    assert streamed == parse_tokens(expression)
+
+def test_parse_empty_token_iterator():
+    assert Parser(iter([])).parse() is None
+
+def test_iter_expressions_semicolon_separated():
+    expressions = ["3 + 5", "(1 - 2) * 4", "7"]
+    parser = Parser(Tokenizer(";".join(expressions) + ";;").iter_tokens())
+    results = list(parser.iter_expressions())
+
+    # token positions refer to the combined string, so compare the rendered expressions
+    assert [str(ast) for ast in results] == [str(parse_tokens(expression)) for expression in expressions]
+
+def test_iter_expressions_consumes_lazily():
+    consumed = []
+
+    def recording_stream():
+        for token in Tokenizer("1 + 2; 3 * 4; 5").iter_tokens():
+            consumed.append(token)
+            yield token
+
+    expressions = Parser(recording_stream()).iter_expressions()
+    first = next(expressions)
+    assert str(first) == "1 + 2"
+
+    # only the first expression, its separator and one token of lookahead have been read
+    assert [token.value for token in consumed] == [1.0, '+', 2.0, ';', 3.0]
+
+def test_iter_expressions_missing_separator():
+    parser = Parser(Tokenizer("1 + 2 3").iter_tokens())
+    with pytest.raises(SyntaxError, match="Unexpected token"):
+        list(parser.iter_expressions())
+
+# Helper function to parse with either parser mode, returning the AST repr or the error
+def parse_outcome(expression, iterative):
+    try:
+        return repr(Parser(tokenize(expression), iterative=iterative).parse())
+    except SyntaxError as e:
+        return f"error: {e}"
+
+@pytest.mark.parametrize("expression", [
+    "", "3", "-3", "--3", "-(3 + 4)", "3 + 5 * 2", "(3 + 5) * 2", "2 ^ 3 ^ 2", "8 - 4 - 2",
+    "8 / 4 * 2 - 1 + 7 ^ 2 * 3", "((((1))))", "-(-(2 - -3)) * -4", "3 +", "(3", "(3 +", "()", "3 + * 5", "3 4", ")",
+])
+def test_iterative_parser_parity_handwritten(expression):
+    assert parse_outcome(expression, iterative=True) == parse_outcome(expression, iterative=False)
+
+def test_iterative_parser_parity_generated():
+    random.seed(6)
+    generator = ArithmeticExpressionGenerator()
+    for difficulty in ["very easy", "pretty easy", "medium", "hard", "very hard"]:
+        for _ in range(100):
+            expression = generator.generate_random_expression(difficulty)
+            assert parse_outcome(expression, iterative=True) == parse_outcome(expression, iterative=False)
+
+def test_iterative_parser_parity_random_tokens():
+    random.seed(66)
+    pieces = ["1", "2.5", "+", "-", "*", "/", "^", "(", ")"]
+    for _ in range(2000):
+        expression = " ".join(random.choice(pieces) for _ in range(random.randint(0, 12)))
+        assert parse_outcome(expression, iterative=True) == parse_outcome(expression, iterative=False)
+
+def test_iterative_parser_deep_nesting():
+    depth = 20000
+    expression = "(" * depth + "1 + -" * 3 + "2" + ")" * depth
+    ast = Parser(tokenize(expression), iterative=True).parse()
+    assert isinstance(ast, BinaryExpression)
+
+    # unary minus chains are also parsed without recursion
+    ast = Parser(tokenize("-" * depth + "1"), iterative=True).parse()
+    for _ in range(depth):
+        assert isinstance(ast, UnaryExpression)
+        ast = ast.operand
+    assert ast == Literal(1)
+
+def test_iterative_iter_expressions():
+    parser = Parser(Tokenizer("1 + 2; (3)").iter_tokens(), iterative=True)
+    assert [str(ast) for ast in parser.iter_expressions()] == ["1 + 2", "3"]
+
+@pytest.mark.parametrize("iterative", [False, True])
+def test_pow_is_right_associative(iterative):
+    ast = Parser(tokenize("2 ^ 3 ^ 2"), iterative=iterative).parse()
+    assert ast.operator.type == TokenType.POW
+    assert ast.left == Literal(2)
+    assert isinstance(ast.right, BinaryExpression)
+    assert str(ast.right) == "3 ^ 2"
+
+@pytest.mark.parametrize("iterative", [False, True])
+def test_pow_binds_tighter_than_mul(iterative):
+    ast = Parser(tokenize("2 * 3 ^ 2 * 4"), iterative=iterative).parse()
+    assert ast.operator.type == TokenType.MUL
+    assert str(ast.left) == "2 * 3 ^ 2"
+    assert str(ast.left.right) == "3 ^ 2"
+
+@pytest.mark.parametrize("iterative", [False, True])
+def test_percent_has_mul_precedence(iterative):
+    ast = Parser(tokenize("1 + 7 % 3 * 2"), iterative=iterative).parse()
+    assert ast.operator.type == TokenType.PLUS
+    assert ast.right.operator.type == TokenType.MUL
+    assert ast.right.left.operator.type == TokenType.PERCENT
+
+@pytest.mark.parametrize("iterative", [False, True])
+def test_comparison_and_logical_operators(iterative):
+    ast = Parser(tokenize("1 + 2 < 4 && 3 == 3 || !1"), iterative=iterative).parse()
+    assert ast.operator.type == TokenType.OR
+    assert ast.left.operator.type == TokenType.AND
+    assert ast.left.left.operator.type == TokenType.LT
+    assert ast.left.left.left.operator.type == TokenType.PLUS
+    assert ast.left.right.operator.type == TokenType.EQ
+    assert isinstance(ast.right, UnaryExpression)
+    assert ast.right.operator.type == TokenType.NOT
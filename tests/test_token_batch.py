@@ -0,0 +1,54 @@
+import random
+import pytest
+from compiler.lexer.token_batch import tokenize_batch
+from compiler.lexer.tokenizer import Tokenizer, TokenizationError
+from compiler.lexer.token_type import TokenType, TOKEN_TYPE_CODES
+from expression_generator.arithmetic_expression_generator import ArithmeticExpressionGenerator
+
+def test_tokenize_batch_columns():
+    batch = tokenize_batch(["3 + 5", "", "f(2.5)"])
+    assert len(batch) == 3
+    assert batch.token_count == 7
+    assert list(batch.token_offsets) == [0, 3, 3, 7]
+    assert list(batch.type_codes[:3]) == [
+        TOKEN_TYPE_CODES[TokenType.NUMBER], TOKEN_TYPE_CODES[TokenType.PLUS], TOKEN_TYPE_CODES[TokenType.NUMBER]
+    ]
+    assert list(batch.starts[3:]) == [0, 1, 2, 5]
+    assert list(batch.lengths[3:]) == [1, 1, 3, 1]
+    assert batch.expression(2) == "f(2.5)"
+    assert list(batch.expression_token_counts()) == [3, 0, 4]
+
+def test_tokenize_batch_empty():
+    batch = tokenize_batch([])
+    assert len(batch) == 0
+    assert batch.token_count == 0
+    assert batch.type_counts() == {}
+
+def test_tokenize_batch_matches_tokenizer():
+    random.seed(4)
+    generator = ArithmeticExpressionGenerator()
+    expressions = [generator.generate_random_expression(difficulty)
+                   for difficulty in ["very easy", "medium", "very hard"] for _ in range(100)]
+    expressions += ["  ", "x<=y", "sqrt (4)", " 1\n+\t2 "]
+
+    batch = tokenize_batch(expressions)
+    for index, expression in enumerate(expressions):
+        assert batch.tokens(index) == Tokenizer(expression).tokenize()
+
+def test_tokenize_batch_type_counts():
+    batch = tokenize_batch(["1 + 2", "(3 * 4) + 5"])
+    assert batch.type_counts() == {
+        TokenType.NUMBER: 5, TokenType.PLUS: 2, TokenType.MUL: 1, TokenType.LPAREN: 1, TokenType.RPAREN: 1
+    }
+
+def test_tokenize_batch_unexpected_character():
+    with pytest.raises(TokenizationError, match="Unexpected character: @ at position 2 in expression 1"):
+        tokenize_batch(["1 + 2", "3 @ 4"])
+
+def test_tokenize_batch_recover_mode():
+    expressions = ["1 + 2", "3 @ 4", "5 ? ?"]
+    batch = tokenize_batch(expressions, recover=True)
+    assert batch.invalid_expressions() == [1, 2]
+    for index, expression in enumerate(expressions):
+        tokens = Tokenizer(expression, recover=True).tokenize()
+        assert [(t.type, t.position) for t in batch.tokens(index)] == [(t.type, t.position) for t in tokens]
@@ -0,0 +1,130 @@
+import random
+import pytest
+from compiler.lexer.tokenizer import Tokenizer, TokenizationError
+from compiler.lexer.token_type import TokenType, TOKEN_TYPE_CODES, TOKEN_TYPE_NAMES
+from compiler.lexer.token import Token
+from expression_generator.arithmetic_expression_generator import ArithmeticExpressionGenerator
+
+DIFFICULTIES = ["very easy", "easy", "pretty easy", "medium", "hard", "pretty hard", "very hard"]
+
+# Helper function to tokenize with either engine, returning the tokens or the error message
+def run_tokenizer(expression, use_regex):
+    try:
+        return Tokenizer(expression, use_regex=use_regex).tokenize()
+    except TokenizationError as e:
+        return f"error: {e}"
+
+def test_tokenize_simple_expression():
+    tokens = Tokenizer("3 + 5.5").tokenize()
+    assert tokens == [
+        Token(TokenType.NUMBER, 3.0, 0),
+        Token(TokenType.PLUS, '+', 2),
+        Token(TokenType.NUMBER, 5.5, 4),
+    ]
+
+def test_regex_engine_longest_operator_wins():
+    tokens = Tokenizer("a<=b<>c==d", use_regex=True).tokenize()
+    assert [token.type for token in tokens] == [
+        TokenType.IDENTIFIER, TokenType.LE, TokenType.IDENTIFIER, TokenType.NE,
+        TokenType.IDENTIFIER, TokenType.EQ, TokenType.IDENTIFIER,
+    ]
+
+def test_regex_engine_function_token():
+    tokens = Tokenizer("sqrt(4) + x (1)", use_regex=True).tokenize()
+    assert tokens[0] == Token(TokenType.FUNCTION, 'sqrt', 0)
+    assert tokens[5] == Token(TokenType.IDENTIFIER, 'x', 10)
+
+def test_regex_engine_unexpected_character():
+    with pytest.raises(TokenizationError, match=r"Unexpected character: @ at position 4"):
+        Tokenizer("3 + @5", use_regex=True).tokenize()
+
+@pytest.mark.parametrize("expression", [
+    "",
+    "   ",
+    "3",
+    "3.",
+    "3.25 * (10 - -4.5)",
+    "  42  ",
+    "1+2-3*4/5^6",
+    "a == b != c <> d <= e < f >= g > h && i || !j = k",
+    "f(x, y); g :$ 10%",
+    "_private_1 + foo_bar(2)",
+    "\t3\n+\r4",
+    "3 + @ 5",
+    "3 # 4",
+    "12.5.6",
+    "é + 1",
+    "3 ? 4",
+])
+def test_engine_parity_handwritten(expression):
+    assert run_tokenizer(expression, use_regex=True) == run_tokenizer(expression, use_regex=False)
+
+@pytest.mark.parametrize("difficulty", DIFFICULTIES)
+def test_engine_parity_generated(difficulty):
+    random.seed(difficulty)
+    generator = ArithmeticExpressionGenerator()
+    for _ in range(200):
+        expression = generator.generate_random_expression(difficulty)
+        assert run_tokenizer(expression, use_regex=True) == run_tokenizer(expression, use_regex=False)
+
+def test_engine_parity_random_characters():
+    random.seed(1234)
+    alphabet = "0123456789.+-*/^=!<>&|,:;()$%_ abcXYZ\t@#?"
+    for _ in range(2000):
+        expression = "".join(random.choice(alphabet) for _ in range(random.randint(0, 20)))
+        assert run_tokenizer(expression, use_regex=True) == run_tokenizer(expression, use_regex=False)
+
+@pytest.mark.parametrize("use_regex", [False, True])
+def test_iter_tokens_matches_tokenize(use_regex):
+    expression = "f(3.5, x) + 2 * (1 - 4)"
+    assert list(Tokenizer(expression, use_regex=use_regex).iter_tokens()) == Tokenizer(expression).tokenize()
+
+@pytest.mark.parametrize("use_regex", [False, True])
+def test_iter_tokens_is_lazy(use_regex):
+    tokens = Tokenizer("1 + 2 @", use_regex=use_regex).iter_tokens()
+
+    # tokens before the bad character are produced before the error is raised
+    assert next(tokens) == Token(TokenType.NUMBER, 1.0, 0)
+    assert next(tokens) == Token(TokenType.PLUS, '+', 2)
+    assert next(tokens) == Token(TokenType.NUMBER, 2.0, 4)
+    with pytest.raises(TokenizationError, match="at position 6"):
+        next(tokens)
+
+def test_token_has_no_instance_dict():
+    token = Token(TokenType.PLUS, '+', 2)
+    assert not hasattr(token, '__dict__')
+
+def test_token_type_codes_round_trip():
+    for name in TOKEN_TYPE_NAMES:
+        token = Token(TOKEN_TYPE_CODES[name], None, 0)
+        assert token.type == name
+        assert token.code == TOKEN_TYPE_CODES[name]
+    assert Token(TokenType.MINUS, '-', 0) == Token(TOKEN_TYPE_CODES[TokenType.MINUS], '-', 0)
+
+@pytest.mark.parametrize("use_regex", [False, True])
+def test_recover_mode_reports_all_bad_characters(use_regex):
+    tokenizer = Tokenizer("3 @ 4 # (5?)", use_regex=use_regex, recover=True)
+    tokens = tokenizer.tokenize()
+
+    assert [token.type for token in tokens] == [
+        TokenType.NUMBER, TokenType.UNKNOWN, TokenType.NUMBER, TokenType.UNKNOWN,
+        TokenType.LPAREN, TokenType.NUMBER, TokenType.UNKNOWN, TokenType.RPAREN,
+    ]
+    assert [(error.character, error.position) for error in tokenizer.diagnostics] == [('@', 2), ('#', 6), ('?', 10)]
+    assert str(tokenizer.diagnostics[0]) == "Unexpected character: @ at position 2"
+
+@pytest.mark.parametrize("use_regex", [False, True])
+def test_recover_mode_valid_expression(use_regex):
+    tokenizer = Tokenizer("3 + 4", use_regex=use_regex, recover=True)
+    assert tokenizer.tokenize() == Tokenizer("3 + 4").tokenize()
+    assert tokenizer.diagnostics == []
+
+def test_recover_mode_engine_parity():
+    random.seed(99)
+    alphabet = "0123456789.+-*/ ()@#?~"
+    for _ in range(500):
+        expression = "".join(random.choice(alphabet) for _ in range(random.randint(0, 20)))
+        scan = Tokenizer(expression, recover=True)
+        regex = Tokenizer(expression, use_regex=True, recover=True)
+        assert scan.tokenize() == regex.tokenize()
+        assert [str(e) for e in scan.diagnostics] == [str(e) for e in regex.diagnostics]
@@ -0,0 +1,101 @@
+import json
+import random
+import pytest
+from compiler.ast.expressions import BinaryExpression, Literal, UnaryExpression
+from compiler.ast.expression_printer import print_expression
+from compiler.ast.visitor import ASTVisitor, ASTTransformer
+from compiler.instructions.infix_expression_calculator_instruction import InfixExpressionCalculatorInstruction, expression_tree_builder
+from compiler.lexer.token import Token
+from compiler.lexer.token_type import TokenType
+from compiler.parser.arithmetic_expression import ArithmeticExpression, ast_to_dict, reflective_ast_to_dict
+from expression_generator.arithmetic_expression_generator import ArithmeticExpressionGenerator
+
+DIFFICULTIES = ["very easy", "easy", "pretty easy", "medium", "hard", "pretty hard", "very hard"]
+
+# Helper function to compare ExpressionNode trees
+def tree_shape(node):
+    if node is None:
+        return None
+    return (node.value, tree_shape(node.left), tree_shape(node.right))
+
+class CountingVisitor(ASTVisitor):
+    def visit_BinaryExpression(self, node, left, right):
+        return left + right + 1
+
+    def visit_UnaryExpression(self, node, operand):
+        return operand + 1
+
+    def visit_Literal(self, node):
+        return 1
+
+    def visit_none(self):
+        return 0
+
+def test_visitor_dispatches_post_order():
+    ast = ArithmeticExpression("-3 + 4 * 5").parse()
+    assert CountingVisitor().visit(ast) == 6
+
+def test_visitor_falls_back_to_base_class_methods():
+    class SubLiteral(Literal):
+        pass
+
+    class LiteralVisitor(ASTVisitor):
+        def visit_Literal(self, node):
+            return node.value
+
+    assert LiteralVisitor().visit(SubLiteral(7)) == 7
+
+def test_visitor_walks_the_children_of_subclasses():
+    class SubBinaryExpression(BinaryExpression):
+        pass
+
+    class SubUnaryExpression(UnaryExpression):
+        pass
+
+    plus = Token(TokenType.PLUS, '+', 0)
+    minus = Token(TokenType.MINUS, '-', 0)
+    ast = SubBinaryExpression(Literal(1), plus, SubUnaryExpression(operator=minus, operand=Literal(2)))
+    assert CountingVisitor().visit(ast) == 4
+
+def test_visitor_generic_visit_raises():
+    with pytest.raises(TypeError, match="ASTVisitor can't visit Literal"):
+        ASTVisitor().visit(Literal(1))
+
+def test_visitor_handles_deep_trees():
+    # deeper than the recursion limit
+    plus = Token(TokenType.PLUS, '+', 0)
+    ast = Literal(0)
+    for i in range(5000):
+        ast = BinaryExpression(ast, plus, Literal(i))
+    assert CountingVisitor().visit(ast) == 10001
+
+def test_transformer_rebuilds_equal_tree():
+    ast = ArithmeticExpression("-(3 + 4) * 2 ^ 3").parse()
+    rebuilt = ASTTransformer().visit(ast)
+    assert rebuilt is not ast
+    assert rebuilt == ast
+
+@pytest.mark.parametrize("difficulty", DIFFICULTIES)
+def test_visitors_match_dict_walks(difficulty):
+    random.seed(difficulty)
+    generator = ArithmeticExpressionGenerator()
+    for _ in range(100):
+        ast = ArithmeticExpression(generator.generate_random_expression(difficulty)).parse()
+        ast_dict = reflective_ast_to_dict(ast)
+        instruction = InfixExpressionCalculatorInstruction(ast=ast_dict, tokens=[])
+
+        assert json.dumps(ast_to_dict(ast)) == json.dumps(ast_dict)
+        assert print_expression(ast) == instruction.extract_expression_from_ast(ast_dict)
+        assert tree_shape(expression_tree_builder.visit(ast)) == tree_shape(instruction.ast_to_expression_tree(ast_dict).root)
+
+@pytest.mark.parametrize("expression, expected", [
+    ("-(3 + 4)", "-(3 + 4)"),
+    ("-3 + 4", "-3 + 4"),
+    ("2 * -(1 - 5)", "2 * -(1 - 5)"),
+    ("3 +", "3 + "),
+])
+def test_printer_unary_and_partial_expressions(expression, expected):
+    ast = ArithmeticExpression(expression).parse()
+    instruction = InfixExpressionCalculatorInstruction(ast=ast_to_dict(ast), tokens=[])
+    assert print_expression(ast) == expected
+    assert instruction.extract_expression_from_ast(instruction.ast) == expected